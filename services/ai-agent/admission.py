@@ -0,0 +1,188 @@
+"""
+Admission control and upstream concurrency limits for AI Concierge Agent
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from config import config
+
+# Lower value = served first when waiting for an upstream slot
+PRIORITY_QUERY = 0
+PRIORITY_PLAN = 1
+PRIORITY_BACKGROUND = 2
+
+# Priority of the request being served; copied into worker threads by asyncio.to_thread
+current_priority: ContextVar[int] = ContextVar("current_priority", default=PRIORITY_PLAN)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a pool's wait queue is full or the wait timed out"""
+
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(f"{pool} capacity exhausted, retry after {retry_after}s")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class UpstreamBusy(Exception):
+    """Raised when no upstream slot frees up within the wait timeout; answered with 429 like AdmissionRejected"""
+
+    def __init__(self, upstream: str, timeout: float, retry_after: int):
+        super().__init__(f"{upstream} busy: no slot within {timeout}s")
+        self.pool = upstream
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """
+    Bounded concurrency pool with a bounded wait queue for one endpoint class
+
+    Up to `max_concurrent` requests run at once and up to `max_queue` wait;
+    anything beyond that is rejected immediately instead of queueing forever.
+    Background work that is already bounded by its own queue (plan jobs)
+    admits with `wait=True` and waits for a slot instead of being rejected.
+    """
+
+    def __init__(self, name: str, priority: int, max_concurrent: int, max_queue: int,
+                 queue_timeout: float, retry_after: int):
+        self.name = name
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.background_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def admit(self, wait: bool = False):
+        """Hold a slot in this pool for the duration of the block"""
+        # Created lazily so it binds to the server's running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        if wait:
+            self.background_waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.background_waiting -= 1
+        else:
+            if self._semaphore.locked() and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(self.name, self.retry_after)
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AdmissionRejected(self.name, self.retry_after)
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        token = current_priority.set(self.priority)
+        try:
+            yield
+        finally:
+            current_priority.reset(token)
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "background_waiting": self.background_waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamLimiter:
+    """
+    Priority-aware concurrency cap for a blocking upstream client (Tavily, OpenAI)
+
+    Calls run in worker threads; when all slots are taken, waiters are served
+    in priority order (interactive queries before plan generation), FIFO within
+    a priority.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._counter = itertools.count()
+        self.active = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold one upstream slot for the duration of the block"""
+        ticket = (current_priority.get(), next(self._counter))
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            while self.active >= self.max_concurrent or self._waiters[0] != ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                    raise UpstreamBusy(self.name, self.timeout, config.ADMISSION_RETRY_AFTER)
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiters)
+            self.active += 1
+            self._cond.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+plan_pool = AdmissionPool(
+    "plan",
+    priority=PRIORITY_PLAN,
+    max_concurrent=config.PLAN_MAX_CONCURRENT,
+    max_queue=config.PLAN_MAX_QUEUE,
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+    retry_after=config.ADMISSION_RETRY_AFTER
+)
+
+query_pool = AdmissionPool(
+    "query",
+    priority=PRIORITY_QUERY,
+    max_concurrent=config.QUERY_MAX_CONCURRENT,
+    max_queue=config.QUERY_MAX_QUEUE,
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+    retry_after=config.ADMISSION_RETRY_AFTER
+)
+
+tavily_limiter = UpstreamLimiter("tavily", config.TAVILY_MAX_CONCURRENT, config.UPSTREAM_WAIT_TIMEOUT)
+openai_limiter = UpstreamLimiter("openai", config.OPENAI_MAX_CONCURRENT, config.UPSTREAM_WAIT_TIMEOUT)
@@ -1,19 +1,33 @@
 """
 AI Concierge Agent using Langchain and Tavily
 """
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import SystemMessage, HumanMessage
+from langchain.schema import HumanMessage, AIMessage
 from tavily import TavilyClient
 
 from config import config
-from models import (
-    AgentRequest, AgentResponse, DayPlan, ActivityCard, 
-    RestaurantCard, PriceTier, TravelerPreferences
+from logs import get_logger
+from models import AgentRequest, AgentResponse, PriceTier, TravelerPreferences
+from records import ActivityRecord, DayRecord, PlanRecord, RestaurantRecord, to_response
+from utils import (
+    WeatherService, PackingListGenerator, extract_location_city, calculate_trip_length,
+    canonical_location, preferences_fingerprint
 )
-from utils import WeatherService, PackingListGenerator, extract_location_city, calculate_trip_length
+from cache import TTLCache
+from refresh import refresh_scheduler
+from admission import UpstreamBusy, tavily_limiter
+from model_router import build_model_router, ITINERARY, QUERY
+from search import build_searcher
+from planner import build_planner, normalize_term_text
+from intent_router import IntentRouter
+from ranking import result_processor
+from incremental import PlanState, IncrementalPlanner, day_fingerprint
+from enrichment import enricher, Enrichment
+from tracing import tracer
+from prompts import ITINERARY_PROMPT, QUERY_PROMPT, prompt_hash
+
+logger = get_logger("agent")
 
 class AIConciergeAgent:
     """
@@ -23,40 +37,138 @@ class AIConciergeAgent:
     
     def __init__(self):
         """Initialize AI agent with Langchain and Tavily"""
-        self.llm = ChatOpenAI(
-            model=config.MODEL_NAME,
-            temperature=config.MODEL_TEMPERATURE,
-            api_key=config.OPENAI_API_KEY
-        )
+        self.models = build_model_router()
         self.tavily_client = TavilyClient(api_key=config.TAVILY_API_KEY)
+        self.searcher = build_searcher(self._tavily_search)
+        self.planner = build_planner(self.searcher)
+        self.itinerary_cache = TTLCache(
+            "itinerary",
+            ttl=config.ITINERARY_CACHE_TTL,
+            max_size=config.ITINERARY_CACHE_SIZE,
+            soft_ttl=config.ITINERARY_CACHE_SOFT_TTL,
+            refresher=refresh_scheduler
+        )
+        self.weather_cache = TTLCache(
+            "weather",
+            ttl=config.WEATHER_CACHE_TTL,
+            max_size=config.WEATHER_CACHE_SIZE,
+            soft_ttl=config.WEATHER_CACHE_SOFT_TTL,
+            refresher=refresh_scheduler
+        )
+        self.plan_states = TTLCache(
+            "plan_state",
+            ttl=config.PLAN_STATE_TTL,
+            max_size=config.PLAN_STATE_SIZE
+        )
+        self.incremental = IncrementalPlanner(self._weather_forecast)
+        # Local weather/packing answers share the plan's cached forecasts
+        self.intent_router = IntentRouter(self._weather_forecast)
+        self.prompt_cache = TTLCache(
+            "prompt",
+            ttl=config.PROMPT_CACHE_TTL,
+            max_size=config.PROMPT_CACHE_SIZE
+        )
     
     def generate_itinerary(self, request: AgentRequest) -> AgentResponse:
+        """Generate complete trip itinerary with activities, restaurants, and packing list"""
+        return to_response(self.plan_itinerary(request))
+    
+    def plan_itinerary(self, request: AgentRequest) -> PlanRecord:
         """
-        Generate complete trip itinerary with activities, restaurants, and packing list
+        Generate the itinerary as internal records, for callers that serialize it directly
+        
+        Finished plans are cached by destination, dates and preferences, so an
+        identical trip for another booking is served without search or LLM calls.
         """
         try:
             booking = request.booking_context
             preferences = request.preferences
             
-            # Calculate trip details
-            trip_length = calculate_trip_length(booking.start_date, booking.end_date)
-            location_city = extract_location_city(booking.location)
+            cache_key = self._itinerary_cache_key(booking, preferences)
+            cached = self.itinerary_cache.get(cache_key)
+            tracer.current().set("itinerary_cache_hit", cached is not None)
+            if cached is not None:
+                return self._rebind_itinerary(cached, booking, preferences)
             
-            # Get weather forecast
-            weather_forecast = WeatherService.get_weather_forecast(
-                location_city, 
-                booking.start_date, 
-                booking.end_date
-            )
+            # Intermediate results of this booking's previous plan, reused stage by stage
+            previous_state = self.plan_states.get(booking.booking_id) if config.INCREMENTAL_PLANNING else None
+            state = PlanState(previous_state)
             
-            # Search for local attractions and POIs
-            attractions = self._search_attractions(location_city, preferences)
-            restaurants = self._search_restaurants(location_city, preferences)
+            response = self._build_itinerary(booking, preferences, state)
+            if state.degraded:
+                # Served, but neither cached nor refreshed: the next request tries the searches again
+                tracer.current().set("degraded", True)
+            else:
+                # A background refresh rebuilds the plan without reusing this booking's earlier stages
+                self.itinerary_cache.set(
+                    cache_key, response,
+                    loader=lambda: self._refresh_itinerary(booking, preferences)
+                )
+            if config.INCREMENTAL_PLANNING:
+                self.plan_states.set(booking.booking_id, state.finish())
+            return response
+        
+        except UpstreamBusy:
+            raise
+        except Exception as e:
+            logger.error("Agent error: %s", e)
+            tracer.current().set("error", str(e))
+            return PlanRecord(success=False, message=f"Error generating itinerary: {str(e)}")
+    
+    def _refresh_itinerary(self, booking, preferences: TravelerPreferences) -> Optional[PlanRecord]:
+        """Rebuilt plan for a background refresh, or None (keep the cached one) if it came out degraded"""
+        state = PlanState()
+        plan = self._build_itinerary(booking, preferences, state)
+        return None if state.degraded else plan
+    
+    def _build_itinerary(self, booking, preferences: TravelerPreferences, state: PlanState) -> PlanRecord:
+        """Run the planning pipeline for a booking; raises on failure"""
+        # Calculate trip details
+        trip_length = calculate_trip_length(booking.start_date, booking.end_date)
+        location_city = extract_location_city(booking.location)
+        
+        with tracer.span(
+            "agent.build_itinerary",
+            city=location_city,
+            trip_length=trip_length,
+            interests=len(preferences.interests),
+            dietary_restrictions=len(preferences.dietary_restrictions)
+        ):
+            # Get weather forecast, fetching only days the previous plan did not cover
+            with tracer.span("weather", city=location_city, days=trip_length) as span:
+                weather_forecast = self.incremental.weather(
+                    state,
+                    location_city, 
+                    booking.start_date, 
+                    booking.end_date
+                )
+                span.set("forecast_days", len(weather_forecast))
+            
+            # Search for local attractions, POIs and restaurants in as few upstream calls as possible
+            with tracer.span("search.plan", city=location_city) as span:
+                planned = self.planner.plan(canonical_location(booking), location_city, preferences)
+                span.update(
+                    intents=len(planned.intents),
+                    upstream_searches=planned.searches,
+                    attractions=len(planned.attractions),
+                    restaurants=len(planned.restaurants)
+                )
+                if not planned.attractions or not planned.restaurants:
+                    state.degraded = True
+            
+            # Drop near-duplicate listicles and rank by relevance so prompts are short and days distinct
+            with tracer.span("search.rank") as span:
+                terms = list(preferences.interests) + list(preferences.dietary_restrictions)
+                attractions = result_processor.process(planned.attractions, terms, booking.city)
+                restaurants = result_processor.process(planned.restaurants, terms, booking.city, exclude=attractions)
+                span.update(attractions=len(attractions), restaurants=len(restaurants))
             
             # Generate day-by-day itinerary using LLM
-            itinerary = self._generate_daily_plans(
-                booking, preferences, attractions, restaurants, weather_forecast
-            )
+            with tracer.span("itinerary.days", trip_length=trip_length) as span:
+                itinerary = self._generate_daily_plans(
+                    booking, preferences, attractions, restaurants, weather_forecast, state
+                )
+                span.set("days", len(itinerary))
             
             # Generate packing list
             packing_list = PackingListGenerator.generate(
@@ -67,87 +179,70 @@ class AIConciergeAgent:
             
             # Generate general tips
             tips = self._generate_tips(booking, preferences, weather_forecast)
-            
-            return AgentResponse(
-                success=True,
-                message="Itinerary generated successfully",
-                itinerary=itinerary,
-                packing_list=packing_list,
-                weather_forecast=weather_forecast,
-                tips=tips
-            )
         
-        except Exception as e:
-            print(f"Agent error: {e}")
-            return AgentResponse(
-                success=False,
-                message=f"Error generating itinerary: {str(e)}",
-                itinerary=[],
-                packing_list=[],
-                weather_forecast=[],
-                tips=[]
-            )
+        return PlanRecord(
+            success=True,
+            message="Itinerary generated successfully",
+            itinerary=tuple(itinerary),
+            packing_list=packing_list,
+            weather_forecast=tuple(weather_forecast),
+            tips=tuple(tips)
+        )
     
-    def _search_attractions(self, location: str, preferences: TravelerPreferences) -> List[Dict]:
-        """Search for attractions using Tavily"""
-        try:
-            # Build search query based on preferences
-            interests_str = ", ".join(preferences.interests) if preferences.interests else "popular attractions"
-            query = f"best {interests_str} things to do in {location}"
-            
-            if preferences.has_children:
-                query += " family-friendly"
-            if preferences.wheelchair_accessible:
-                query += " wheelchair accessible"
-            
-            # Search with Tavily
-            results = self.tavily_client.search(
-                query=query,
-                max_results=10,
-                search_depth="advanced"
-            )
-            
-            return results.get('results', [])
-        except Exception as e:
-            print(f"Tavily search error: {e}")
-            return []
+    def warm_weather(self, booking) -> None:
+        """Load a booking's forecast into the weather cache ahead of its first plan or query"""
+        self._weather_forecast(extract_location_city(booking.location), booking.start_date, booking.end_date)
     
-    def _search_restaurants(self, location: str, preferences: TravelerPreferences) -> List[Dict]:
-        """Search for restaurants using Tavily"""
-        try:
-            # Extract cuisine preferences from interests
-            cuisine_keywords = [
-                'indian', 'italian', 'chinese', 'japanese', 'thai', 'mexican',
-                'french', 'greek', 'mediterranean', 'american', 'korean', 'vietnamese',
-                'spanish', 'lebanese', 'turkish', 'brazilian', 'caribbean', 'seafood',
-                'steakhouse', 'pizza', 'sushi', 'bbq', 'barbecue'
-            ]
-            
-            cuisine_prefs = [interest for interest in preferences.interests if interest.lower() in cuisine_keywords]
-            
-            # Build restaurant search query
-            cuisine_str = " ".join(cuisine_prefs) if cuisine_prefs else ""
-            dietary_str = " ".join(preferences.dietary_restrictions) if preferences.dietary_restrictions else ""
-            
-            # Prioritize cuisine preferences, then dietary restrictions
-            if cuisine_str:
-                query = f"best {cuisine_str} restaurants in {location} {dietary_str}"
-            else:
-                query = f"best restaurants in {location} {dietary_str}"
-            
-            print(f"🍽️ Restaurant search query: {query}")
-            
-            # Search with Tavily
-            results = self.tavily_client.search(
-                query=query,
-                max_results=10,
-                search_depth="advanced"
+    def _weather_forecast(self, location: str, start_date, end_date) -> List:
+        """Weather forecast for a date range, cached per city and range"""
+        key = (location.lower(), start_date.isoformat(), end_date.isoformat())
+        forecast = self.weather_cache.get(key)
+        if forecast is None:
+            with tracer.span("weather.fetch", city=location, start=key[1], end=key[2]):
+                forecast = WeatherService.get_weather_forecast(location, start_date, end_date)
+            self.weather_cache.set(
+                key, forecast,
+                loader=lambda: WeatherService.get_weather_forecast(location, start_date, end_date)
             )
-            
-            return results.get('results', [])
-        except Exception as e:
-            print(f"Tavily restaurant search error: {e}")
-            return []
+        return forecast
+    
+    def _tavily_search(self, **kwargs) -> Dict:
+        """Run a Tavily search within the shared upstream concurrency cap"""
+        with tracer.span(
+            "tavily.search",
+            # Length only: query text carries traveler input and is not recorded
+            query_chars=len(kwargs.get("query") or ""),
+            search_depth=kwargs.get("search_depth"),
+            max_results=kwargs.get("max_results")
+        ) as span:
+            with tavily_limiter.slot():
+                response = self.tavily_client.search(**kwargs)
+            span.set("results", len(response.get("results", [])))
+            return response
+    
+    def _llm_invoke(self, call_site: str, messages):
+        """Invoke the model routed for this call site; a prompt already answered is served from the prompt cache"""
+        key = (call_site, prompt_hash(messages))
+        response = self.prompt_cache.get(key)
+        if response is not None:
+            tracer.current().set("prompt_cache", "hit")
+            return response
+        response = self.models.invoke(call_site, messages)
+        self.prompt_cache.set(key, response)
+        return response
+    
+    def _itinerary_cache_key(self, booking, preferences: TravelerPreferences) -> tuple:
+        """Cache key for a finished itinerary"""
+        return (
+            canonical_location(booking),
+            booking.start_date.isoformat(),
+            booking.end_date.isoformat(),
+            preferences_fingerprint(preferences)
+        )
+    
+    def _rebind_itinerary(self, cached: PlanRecord, booking, preferences: TravelerPreferences) -> PlanRecord:
+        """Reuse a cached itinerary for another booking, regenerating only booking-specific fields"""
+        return cached._replace(tips=tuple(self._generate_tips(booking, preferences, cached.weather_forecast)))
     
     def _generate_daily_plans(
         self, 
@@ -155,69 +250,72 @@ class AIConciergeAgent:
         preferences: TravelerPreferences,
         attractions: List[Dict],
         restaurants: List[Dict],
-        weather_forecast
-    ) -> List[DayPlan]:
-        """Generate day-by-day itinerary using LLM"""
+        weather_forecast,
+        state: Optional[PlanState] = None
+    ) -> List[DayRecord]:
+        """Generate day-by-day itinerary using LLM, reusing unchanged stages from `state.previous`"""
+        
+        # Days are built from their search results, so when every day is unchanged the LLM call is skipped
+        if state is not None and self.incremental.reuses_all_days(state, [
+            day_fingerprint(attractions[day_attractions], restaurants[day_restaurants], preferences)
+            for _, _, day_attractions, day_restaurants in self._day_slices(booking, attractions)
+        ]):
+            return self._parse_llm_itinerary("", booking, preferences, attractions, restaurants, state)
         
         # Prepare context for LLM
         trip_length = calculate_trip_length(booking.start_date, booking.end_date)
         location = extract_location_city(booking.location)
         
-        # Build prompt with all context
-        system_prompt = f"""You are an expert travel concierge creating a {trip_length}-day itinerary for {location}.
-
-Booking Details:
-- Location: {booking.location}
-- Dates: {booking.start_date} to {booking.end_date}
-- Guests: {booking.guests}
-
-Traveler Preferences:
-- Budget: {preferences.budget}
-- Interests: {', '.join(preferences.interests) if preferences.interests else 'General sightseeing'}
-- Dietary Restrictions: {', '.join(preferences.dietary_restrictions) if preferences.dietary_restrictions else 'None'}
-- Has Children: {'Yes' if preferences.has_children else 'No'}
-- Wheelchair Accessible: {'Yes' if preferences.wheelchair_accessible else 'No'}
-- Avoid Long Hikes: {'Yes' if preferences.avoid_long_hikes else 'No'}
-
-Available Attractions:
-{self._format_search_results(attractions[:8])}
-
-Available Restaurants:
-{self._format_search_results(restaurants[:8])}
-
-Create a detailed day-by-day itinerary with morning, afternoon, and evening activities.
-Include specific activity names, addresses, estimated durations, and why they match the traveler's preferences.
-IMPORTANT: If cuisine preferences (like Indian, Italian, etc.) are mentioned in interests, prioritize matching restaurants accordingly.
-Format your response as a structured JSON-like output that I can parse."""
+        # Static instructions first, then this trip's details and search results
+        messages = ITINERARY_PROMPT.render(
+            trip_length=trip_length,
+            location=location,
+            booking_location=booking.location,
+            start_date=booking.start_date,
+            end_date=booking.end_date,
+            guests=booking.guests,
+            budget=preferences.budget,
+            interests=', '.join(preferences.interests) if preferences.interests else 'General sightseeing',
+            dietary_restrictions=', '.join(preferences.dietary_restrictions) if preferences.dietary_restrictions else 'None',
+            has_children='Yes' if preferences.has_children else 'No',
+            wheelchair_accessible='Yes' if preferences.wheelchair_accessible else 'No',
+            avoid_long_hikes='Yes' if preferences.avoid_long_hikes else 'No',
+            languages=', '.join(preferences.languages) if preferences.languages else 'Not specified',
+            attractions=self._format_search_results(attractions[:8]),
+            restaurants=self._format_search_results(restaurants[:8])
+        )
 
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content="Please create the itinerary.")
-            ])
+            # An unchanged prompt is answered from the prompt cache
+            content = self._llm_invoke(ITINERARY, messages).content
             
             # Parse LLM response and create day plans
             itinerary = self._parse_llm_itinerary(
-                response.content, 
+                content, 
                 booking, 
                 preferences,
                 attractions,
-                restaurants
+                restaurants,
+                state
             )
             
             return itinerary
         
+        except UpstreamBusy:
+            raise
         except Exception as e:
-            print(f"LLM generation error: {e}")
+            logger.warning("LLM generation error, using fallback itinerary: %s", e)
+            if state is not None:
+                state.degraded = True
             # Return fallback itinerary
-            return self._generate_fallback_itinerary(booking, preferences, attractions, restaurants)
+            return self._generate_fallback_itinerary(booking, preferences, attractions, restaurants, state)
     
     def _format_search_results(self, results: List[Dict]) -> str:
         """Format Tavily search results for LLM prompt"""
         formatted = []
         for i, result in enumerate(results[:8], 1):
             title = result.get('title', 'Unknown')
-            content = result.get('content', '')[:200]  # Truncate long content
+            content = result.get('snippet', '')
             url = result.get('url', '')
             formatted.append(f"{i}. {title}\n   {content}\n   {url}")
         return "\n".join(formatted)
@@ -228,45 +326,61 @@ Format your response as a structured JSON-like output that I can parse."""
         booking,
         preferences: TravelerPreferences,
         attractions: List[Dict],
-        restaurants: List[Dict]
-    ) -> List[DayPlan]:
-        """Parse LLM response into structured DayPlan objects"""
+        restaurants: List[Dict],
+        state: Optional[PlanState] = None
+    ) -> List[DayRecord]:
+        """Parse LLM response into structured DayRecord objects, reusing days whose inputs are unchanged"""
         # This is a simplified parser - in production, you'd want more robust parsing
         # For now, generate structured itinerary from available data
         
         itinerary = []
-        current_date = booking.start_date
-        day_number = 1
-        
-        # Distribute attractions across days
-        attractions_per_day = max(3, len(attractions) // calculate_trip_length(booking.start_date, booking.end_date))
+        attraction_info = restaurant_info = None
         
-        while current_date <= booking.end_date:
+        for date_str, day_number, attraction_slice, restaurant_slice in self._day_slices(booking, attractions):
             # Select activities for this day
-            start_idx = (day_number - 1) * attractions_per_day
-            day_attractions = attractions[start_idx:start_idx + attractions_per_day]
+            day_attractions = attractions[attraction_slice]
+            day_restaurant_results = restaurants[restaurant_slice]
+            
+            fingerprint = None
+            if state is not None:
+                fingerprint = day_fingerprint(day_attractions, day_restaurant_results, preferences)
+                previous_day = self.incremental.day(state, fingerprint, date_str, day_number)
+                if previous_day is not None:
+                    itinerary.append(previous_day)
+                    continue
+            
+            if attraction_info is None:
+                # Enrich every result in one pass, on the first day that is built; days index into these lists
+                attraction_info = enricher.enrich_batch(attractions)
+                restaurant_info = enricher.enrich_batch(restaurants)
+            day_attraction_info = attraction_info[attraction_slice]
+            day_restaurant_info = restaurant_info[restaurant_slice]
             
             morning_activities = self._create_activity_cards(
                 day_attractions[:1], 
-                preferences
+                preferences,
+                day_attraction_info[:1]
             )
             afternoon_activities = self._create_activity_cards(
                 day_attractions[1:2], 
-                preferences
+                preferences,
+                day_attraction_info[1:2]
             )
             evening_activities = self._create_activity_cards(
                 day_attractions[2:3], 
-                preferences
+                preferences,
+                day_attraction_info[2:3]
             )
             
             # Select restaurants for this day
             day_restaurants = self._create_restaurant_cards(
-                restaurants[(day_number-1)*2:(day_number-1)*2+2],
-                preferences
+                day_restaurant_results,
+                preferences,
+                day_restaurant_info
             )
             
-            day_plan = DayPlan(
-                date=current_date.strftime("%Y-%m-%d"),
+            day_plan = DayRecord(
+                date=date_str,
                 day_number=day_number,
                 morning=morning_activities,
                 afternoon=afternoon_activities,
@@ -274,49 +388,86 @@ Format your response as a structured JSON-like output that I can parse."""
                 restaurants=day_restaurants
             )
             
+            if state is not None:
+                state.days[fingerprint] = day_plan
+            
             itinerary.append(day_plan)
-            current_date += timedelta(days=1)
-            day_number += 1
         
         return itinerary
     
-    def _create_activity_cards(self, search_results: List[Dict], preferences: TravelerPreferences) -> List[ActivityCard]:
-        """Convert search results to ActivityCard objects"""
+    @staticmethod
+    def _day_slices(booking, attractions: List[Dict]) -> List[Tuple[str, int, slice, slice]]:
+        """(date, day number, attraction slice, restaurant slice) for each day of the trip"""
+        # Distribute attractions across days; each day shows up to three of its share
+        attractions_per_day = max(3, len(attractions) // calculate_trip_length(booking.start_date, booking.end_date))
+        days = []
+        current_date = booking.start_date
+        day_number = 1
+        while current_date <= booking.end_date:
+            start_idx = (day_number - 1) * attractions_per_day
+            restaurant_idx = (day_number - 1) * 2
+            days.append((
+                current_date.strftime("%Y-%m-%d"),
+                day_number,
+                slice(start_idx, start_idx + 3),
+                slice(restaurant_idx, restaurant_idx + 2)
+            ))
+            current_date += timedelta(days=1)
+            day_number += 1
+        return days
+    
+    def _create_activity_cards(
+        self,
+        search_results: List[Dict],
+        preferences: TravelerPreferences,
+        enrichments: List[Enrichment]
+    ) -> Tuple[ActivityRecord, ...]:
+        """Convert search results and their enrichments to ActivityRecord objects"""
         activities = []
+        budget_tier = self._estimate_price_tier(preferences.budget)
         
-        for result in search_results:
-            activity = ActivityCard(
-                title=result.get('title', 'Activity'),
-                description=result.get('content', '')[:200],
-                address=result.get('url', 'Address not available'),  # Ideally extract from content
-                price_tier=self._estimate_price_tier(preferences.budget),
+        for result, info in zip(search_results, enrichments):
+            activity = ActivityRecord(
+                title=result.get('title') or 'Activity',
+                description=result.get('snippet', ''),
+                address=info.address or 'Address not available',
+                price_tier=info.price_tier or budget_tier,
                 duration="2-3 hours",  # Default estimate
-                tags=self._extract_tags(result.get('content', '')),
-                wheelchair_friendly=preferences.wheelchair_accessible,
-                child_friendly=preferences.has_children,
+                tags=tuple(info.tags),
+                wheelchair_friendly=preferences.wheelchair_accessible or info.wheelchair_friendly,
+                child_friendly=preferences.has_children or info.child_friendly,
                 url=result.get('url')
             )
             activities.append(activity)
         
-        return activities
+        return tuple(activities)
     
-    def _create_restaurant_cards(self, search_results: List[Dict], preferences: TravelerPreferences) -> List[RestaurantCard]:
-        """Convert search results to RestaurantCard objects"""
+    def _create_restaurant_cards(
+        self,
+        search_results: List[Dict],
+        preferences: TravelerPreferences,
+        enrichments: List[Enrichment]
+    ) -> Tuple[RestaurantRecord, ...]:
+        """Convert search results and their enrichments to RestaurantRecord objects"""
         restaurants = []
+        budget_tier = self._estimate_price_tier(preferences.budget)
         
-        for result in search_results:
-            restaurant = RestaurantCard(
-                name=result.get('title', 'Restaurant'),
-                cuisine="Local cuisine",  # Could be extracted from content
-                address=result.get('url', 'Address not available'),
-                price_tier=self._estimate_price_tier(preferences.budget),
-                dietary_options=preferences.dietary_restrictions,
-                wheelchair_accessible=preferences.wheelchair_accessible,
+        for result, info in zip(search_results, enrichments):
+            dietary_options = list(preferences.dietary_restrictions)
+            dietary_options.extend(d for d in info.dietary_options if d not in dietary_options)
+            
+            restaurant = RestaurantRecord(
+                name=result.get('title') or 'Restaurant',
+                cuisine=info.cuisine or "Local cuisine",
+                address=info.address or 'Address not available',
+                price_tier=info.price_tier or budget_tier,
+                dietary_options=tuple(dietary_options),
+                wheelchair_accessible=preferences.wheelchair_accessible or info.wheelchair_friendly,
                 url=result.get('url')
             )
             restaurants.append(restaurant)
         
-        return restaurants
+        return tuple(restaurants)
     
     def _estimate_price_tier(self, budget: str) -> PriceTier:
         """Estimate price tier based on budget"""
@@ -328,33 +479,16 @@ Format your response as a structured JSON-like output that I can parse."""
         }
         return budget_map.get(budget.lower(), PriceTier.MEDIUM)
     
-    def _extract_tags(self, content: str) -> List[str]:
-        """Extract relevant tags from content"""
-        tags = []
-        keywords = {
-            "outdoor": ["park", "hiking", "beach", "nature"],
-            "museum": ["museum", "gallery", "art"],
-            "food": ["restaurant", "food", "dining"],
-            "family": ["family", "kids", "children"],
-            "culture": ["culture", "history", "heritage"]
-        }
-        
-        content_lower = content.lower()
-        for tag, keywords_list in keywords.items():
-            if any(kw in content_lower for kw in keywords_list):
-                tags.append(tag)
-        
-        return tags[:3]  # Limit to 3 tags
-    
     def _generate_fallback_itinerary(
         self, 
         booking, 
         preferences: TravelerPreferences,
         attractions: List[Dict],
-        restaurants: List[Dict]
-    ) -> List[DayPlan]:
+        restaurants: List[Dict],
+        state: Optional[PlanState] = None
+    ) -> List[DayRecord]:
         """Generate basic itinerary when LLM fails"""
-        return self._parse_llm_itinerary("", booking, preferences, attractions, restaurants)
+        return self._parse_llm_itinerary("", booking, preferences, attractions, restaurants, state)
     
     def _generate_tips(self, booking, preferences: TravelerPreferences, weather_forecast) -> List[str]:
         """Generate helpful tips for the trip"""
@@ -387,7 +521,7 @@ Format your response as a structured JSON-like output that I can parse."""
         
         return tips
     
-    def answer_query(self, query: str, booking_context=None, preferences: Dict = None) -> str:
+    def answer_query(self, query: str, booking_context=None, preferences: Dict = None, session=None) -> str:
         """
         Answer a specific travel question using Tavily search and LLM
         
@@ -395,11 +529,21 @@ Format your response as a structured JSON-like output that I can parse."""
             query: The user's question (e.g., "Find Indian restaurants")
             booking_context: Optional booking context for location
             preferences: Optional traveler preferences
+            session: Optional ConversationSession; follow-up questions re-rank its
+                cached results instead of searching again
         
         Returns:
             A formatted answer to the question
         """
         try:
+            # Weather, packing, dates and guests are answered locally in milliseconds
+            local_answer = self.intent_router.route(query, booking_context, preferences)
+            if local_answer is not None:
+                tracer.current().set("answered_by", "local_intent")
+                if session is not None:
+                    session.remember_answer(query, local_answer)
+                return local_answer
+            
             # Determine location from booking context using structured fields
             location = "the area"
             search_location = ""
@@ -414,9 +558,9 @@ Format your response as a structured JSON-like output that I can parse."""
                 else:
                     search_location = location
                 
-                print(f"📍 Search location: {search_location}")
+                logger.debug("Search location: %s", search_location)
             else:
-                print(f"⚠️ No location data available in booking context")
+                logger.warning("No location data available in booking context")
             
             # Enhance query with location context - be very specific
             if search_location and search_location != "the area":
@@ -425,18 +569,45 @@ Format your response as a structured JSON-like output that I can parse."""
             else:
                 enhanced_query = query
             
-            print(f"🔍 Enhanced search query: {enhanced_query}")
-            
-            # Search with Tavily - get exactly 5 results
-            search_results = self.tavily_client.search(
-                query=enhanced_query,
-                max_results=5,
-                search_depth="advanced",
-                include_domains=[],  # No domain restrictions
-                exclude_domains=[]   # No domain exclusions
-            )
-            
-            results = search_results.get('results', [])
+            results = None
+            from_session = session is not None and session.is_follow_up(query)
+            if from_session:
+                # Refinement of the previous question: re-rank what we already found
+                results = session.rerank(query, limit=5)
+                tracer.current().set("answered_by", "session")
+                logger.info("Follow-up answered from session", extra={"session_id": session.session_id})
+            elif booking_context:
+                # Reuse the trip's planned search results when they already cover the question
+                results = self.planner.lookup(
+                    canonical_location(booking_context),
+                    query,
+                    booking_context.city,
+                    self.planner.qualifiers(TravelerPreferences(**(preferences or {})))
+                )
+                if results is not None:
+                    tracer.current().set("answered_by", "planned_results")
+            
+            if results is None:
+                logger.debug("Enhanced search query: %s", enhanced_query)
+                tracer.current().set("answered_by", "search")
+                
+                # Search with Tavily - get exactly 5 results
+                results = self.searcher.search(
+                    enhanced_query,
+                    max_results=5,
+                    location=search_location,
+                    include_domains=[],  # No domain restrictions
+                    exclude_domains=[]   # No domain exclusions
+                )
+            
+            # Session results were processed when first searched, and rerank already ordered them
+            if not from_session:
+                results = result_processor.process(
+                    results,
+                    normalize_term_text(query).split(),
+                    booking_context.city if booking_context else ""
+                )
+            tracer.current().set("results", len(results))
             
             if not results:
                 return f"I couldn't find specific information about that. However, I can create a full trip plan for {location} if you'd like. Just say 'Plan my trip'!"
@@ -444,40 +615,35 @@ Format your response as a structured JSON-like output that I can parse."""
             # Format results for LLM
             formatted_results = self._format_search_results(results)
             
-            # Use LLM to create a natural response
-            system_prompt = f"""You are a helpful travel concierge assistant. The traveler asked: "{query}"
+            trip_details = [f"- Location: {location}"]
+            if booking_context:
+                trip_details.append(f"- Dates: {booking_context.start_date} to {booking_context.end_date}")
+                trip_details.append(f"- Guests: {booking_context.guests}")
+            
+            # Earlier turns sit between the static instructions and this turn's results
+            history = []
+            if session is not None:
+                for previous_query, previous_answer in session.history:
+                    history.append(HumanMessage(content=previous_query))
+                    history.append(AIMessage(content=previous_answer))
+            messages = QUERY_PROMPT.render(
+                history,
+                query=query,
+                trip_details="\n".join(trip_details),
+                search_results=formatted_results
+            )
             
-**CRITICAL REQUIREMENTS:**
-1. ONLY recommend places in {location} - no other cities, states, or countries
-2. Show EXACTLY 5 recommendations (no more, no less)
-3. If a search result is not in {location}, skip it and don't mention it
-
-Trip Details:
-- Location: {location}
-{f"- Dates: {booking_context.start_date} to {booking_context.end_date}" if booking_context else ""}
-{f"- Guests: {booking_context.guests}" if booking_context else ""}
-
-Search Results:
-{formatted_results}
-
-Provide a helpful answer with:
-- Friendly opening line
-- EXACTLY 5 recommendations from results ONLY in {location}
-- For each: Name, brief description (1-2 sentences), and URL link
-- Relevant details (cuisine, price range, rating, dietary options, etc.)
-- Keep it concise (max 300 words total)
-
-Format with emojis and clean bullet points."""
-
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content="Please provide a helpful answer based on the search results.")
-            ])
+            response = self._llm_invoke(QUERY, messages)
+            
+            if session is not None:
+                session.remember(query, response.content, results, formatted_results)
             
             return response.content
         
+        except UpstreamBusy:
+            raise
         except Exception as e:
-            print(f"Query answering error: {e}")
+            logger.error("Query answering error: %s", e)
             return f"I encountered an error searching for that information. Please try asking in a different way, or say 'Plan my trip' for a full itinerary!"
 
 # Global agent instance
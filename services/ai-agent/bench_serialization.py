@@ -0,0 +1,121 @@
+"""
+Serialization benchmark for AI Concierge Agent plan responses
+
+Compares the previous response path (pydantic models, FastAPI response_model
+re-validation, jsonable_encoder, json.dumps) with internal records encoded by
+encoding.dumps. Reports CPU time and peak allocated bytes per response.
+
+Usage: python bench_serialization.py [--days 5] [--iterations 500]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from encoding import dumps, orjson
+from models import AgentResponse, PriceTier
+from records import (
+    ActivityRecord, DayRecord, PackingRecord, PlanRecord, RestaurantRecord, WeatherRecord, to_response
+)
+
+
+def sample_plan(days: int) -> PlanRecord:
+    """A plan shaped like a real response: three activities per slot, three restaurants per day"""
+    start = date(2025, 6, 1)
+
+    def activity(day: int, slot: str, i: int) -> ActivityRecord:
+        return ActivityRecord(
+            title=f"{slot.title()} activity {day}-{i}",
+            description="A popular local spot with guided tours, family areas and great views " * 2,
+            address=f"{100 + i} Ocean Drive, Miami Beach, FL 33139",
+            price_tier=PriceTier.MEDIUM,
+            duration="2-3 hours",
+            tags=("beach", "family", "outdoor"),
+            wheelchair_friendly=True,
+            child_friendly=True,
+            url=f"https://example.com/{day}/{slot}/{i}",
+        )
+
+    itinerary = tuple(
+        DayRecord(
+            date=(start + timedelta(days=day)).isoformat(),
+            day_number=day + 1,
+            morning=tuple(activity(day, "morning", i) for i in range(3)),
+            afternoon=tuple(activity(day, "afternoon", i) for i in range(3)),
+            evening=tuple(activity(day, "evening", i) for i in range(3)),
+            restaurants=tuple(
+                RestaurantRecord(
+                    name=f"Restaurant {day}-{i}",
+                    cuisine="Italian",
+                    address=f"{200 + i} Collins Ave, Miami Beach, FL 33139",
+                    price_tier=PriceTier.MEDIUM,
+                    dietary_options=("vegan", "gluten-free"),
+                    wheelchair_accessible=True,
+                    url=f"https://example.com/r/{day}/{i}",
+                )
+                for i in range(3)
+            ),
+        )
+        for day in range(days)
+    )
+    weather = tuple(
+        WeatherRecord((start + timedelta(days=day)).isoformat(), 31.5, 24.0, "Sunny", 20)
+        for day in range(days)
+    )
+    packing = tuple(PackingRecord(f"Item {i}", "Essentials", "Recommended for the trip") for i in range(15))
+    tips = tuple(f"Tip number {i} for the trip" for i in range(5))
+    return PlanRecord(True, "Itinerary generated successfully", itinerary, packing, weather, tips)
+
+
+def pydantic_path(plan: PlanRecord) -> bytes:
+    """Previous path: build models, re-validate against response_model, encode, dump"""
+    response = to_response(plan)
+    validated = AgentResponse(**jsonable_encoder(response))
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def record_path(plan: PlanRecord) -> bytes:
+    return dumps(plan)
+
+
+def measure(fn, plan: PlanRecord, iterations: int):
+    """CPU microseconds and peak allocated bytes per call"""
+    fn(plan)  # warm up
+    started = time.process_time()
+    for _ in range(iterations):
+        fn(plan)
+    cpu_us = (time.process_time() - started) / iterations * 1e6
+
+    tracemalloc.start()
+    fn(plan)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_us, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    plan = sample_plan(args.days)
+    assert json.loads(pydantic_path(plan)) == json.loads(record_path(plan)), "paths disagree"
+
+    print(f"Plan: {args.days} days, {len(record_path(plan))} bytes, encoder: {'orjson' if orjson else 'json'}")
+    results = {}
+    for name, fn in (("pydantic", pydantic_path), ("records", record_path)):
+        results[name] = measure(fn, plan, args.iterations)
+        cpu_us, peak = results[name]
+        print(f"{name:<10} {cpu_us:>10.1f} us/response  {peak / 1024:>9.1f} KiB peak")
+
+    base_cpu, base_peak = results["pydantic"]
+    cpu_us, peak = results["records"]
+    print(f"speedup    {base_cpu / cpu_us:>10.1f}x cpu       {base_peak / max(peak, 1):>9.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
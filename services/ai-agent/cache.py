@@ -0,0 +1,128 @@
+"""
+In-process caches for AI Concierge Agent
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "hits", "loader")
+
+    def __init__(self, value: Any, stored_at: float, loader: Optional[Callable[[], Any]]):
+        self.value = value
+        self.stored_at = stored_at
+        self.hits = 0
+        self.loader = loader
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry time-to-live
+
+    Entries older than `ttl` seconds are treated as missing; once `max_size`
+    entries are stored, the least recently used entry is evicted. With
+    `sliding=True` every hit restarts the entry's TTL (idle expiry).
+
+    With a `soft_ttl` and a `refresher`, entries stored with a loader are
+    served stale once older than `soft_ttl` while the refresher reloads them
+    in the background (stale-while-revalidate); `ttl` stays the hard limit.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int, sliding: bool = False,
+                 soft_ttl: Optional[float] = None, refresher=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.sliding = sliding
+        self.soft_ttl = soft_ttl if soft_ttl and soft_ttl < ttl else None
+        self.refresher = refresher
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        now = time.monotonic()
+        stale = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            age = now - entry.stored_at
+            if age > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            if self.sliding:
+                entry.stored_at = now
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            value = entry.value
+            if self.soft_ttl is not None and age > self.soft_ttl and entry.loader is not None:
+                self.stale_hits += 1
+                stale = entry
+
+        if stale is not None and self.refresher is not None:
+            self.refresher.schedule(self, key, stale.loader, stale.hits)
+        return value
+
+    def set(self, key: Hashable, value: Any, loader: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if full
+
+        `loader` recomputes the value; entries without one are never refreshed.
+        """
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic(), loader)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refreshed(self, key: Hashable, value: Any) -> None:
+        """Replace an entry with its reloaded value, keeping its loader and access count"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.value = value
+            entry.stored_at = time.monotonic()
+            self.refreshes += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "soft_ttl": self.soft_ttl,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+        }
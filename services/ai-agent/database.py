@@ -4,9 +4,40 @@ Uses microservices APIs instead of direct database access
 """
 import requests
 from typing import Optional, Dict
+from cache import TTLCache
 from config import config
+from logs import get_logger
+from models import BookingContext
+from retry import RetryPolicy, UpstreamUnavailable
+from tracing import traced, tracer
 from datetime import datetime
 
+logger = get_logger("database")
+
+# Formatted booking details by booking ID, warmed by booking-event prefetch
+booking_cache = TTLCache("booking", ttl=config.BOOKING_CACHE_TTL, max_size=config.BOOKING_CACHE_SIZE)
+
+booking_policy = RetryPolicy(
+    "booking",
+    attempts=config.UPSTREAM_RETRY_ATTEMPTS,
+    timeout=config.BOOKING_TIMEOUT,
+    budget=config.UPSTREAM_RETRY_BUDGET,
+    base_delay=config.UPSTREAM_RETRY_BASE_DELAY,
+    max_delay=config.UPSTREAM_RETRY_MAX_DELAY,
+    hedge=config.UPSTREAM_HEDGE,
+    hedge_percentile=config.UPSTREAM_HEDGE_PERCENTILE
+)
+traveler_policy = RetryPolicy(
+    "traveler",
+    attempts=config.UPSTREAM_RETRY_ATTEMPTS,
+    timeout=config.TRAVELER_TIMEOUT,
+    budget=config.UPSTREAM_RETRY_BUDGET,
+    base_delay=config.UPSTREAM_RETRY_BASE_DELAY,
+    max_delay=config.UPSTREAM_RETRY_MAX_DELAY,
+    hedge=config.UPSTREAM_HEDGE,
+    hedge_percentile=config.UPSTREAM_HEDGE_PERCENTILE
+)
+
 class Database:
     """Database/API connection manager"""
     
@@ -16,37 +47,51 @@ class Database:
     TRAVELER_SERVICE_URL = config.TRAVELER_SERVICE_URL
     
     @staticmethod
-    def get_connection():
-        """Check if services are reachable"""
-        try:
-            response = requests.get(f"{Database.BOOKING_SERVICE_URL}/health", timeout=2)
-            return response.status_code == 200
-        except:
-            return False
+    def get_booking_details(booking_id: str, use_cache: bool = True) -> Optional[Dict]:
+        """
+        Booking details, from the booking cache when fresh; `use_cache=False` always refetches
+        
+        Returns None only when the booking does not exist; raises
+        UpstreamUnavailable when the booking service could not answer.
+        """
+        if use_cache:
+            cached = booking_cache.get(booking_id)
+            if cached is not None:
+                return cached
+        result = Database._fetch_booking_details(booking_id)
+        if result is not None:
+            booking_cache.set(booking_id, result)
+        return result
     
     @staticmethod
-    def get_booking_details(booking_id: str) -> Optional[Dict]:
-        """Fetch booking details from booking service API"""
+    @traced("db.get_booking_details")
+    def _fetch_booking_details(booking_id: str) -> Optional[Dict]:
+        """Fetch booking details from booking service API, retrying transient failures"""
+        tracer.current().set("booking_id", booking_id)
         try:
             # Use internal endpoint with API key for service-to-service communication
             internal_api_key = config.INTERNAL_API_KEY
             
             # Fetch booking from booking service internal endpoint
-            response = requests.get(
+            response = booking_policy.get(
                 f"{Database.BOOKING_SERVICE_URL}/bookings/internal/{booking_id}",
                 headers={
                     'x-internal-api-key': internal_api_key
-                },
-                timeout=10
+                }
             )
             
+            tracer.current().set("status", response.status_code)
+            
             if response.status_code == 401:
-                print(f"❌ Unauthorized: Invalid API key for booking {booking_id}")
+                logger.error("Unauthorized: invalid API key for booking", extra={"booking_id": booking_id})
+                raise UpstreamUnavailable("booking", "unauthorized (check INTERNAL_API_KEY)")
+            
+            if response.status_code in (400, 404):
+                logger.warning("Booking not found", extra={"booking_id": booking_id, "status": response.status_code})
                 return None
             
             if response.status_code != 200:
-                print(f"❌ Booking not found: {booking_id} (status: {response.status_code})")
-                return None
+                raise UpstreamUnavailable("booking", f"HTTP {response.status_code}")
             
             booking_data = response.json()
             
@@ -78,7 +123,7 @@ class Database:
             if not location:
                 location = 'Unknown Location'
             
-            print(f"📍 Extracted location: {city}, {state} {zipcode}")
+            logger.debug("Extracted location: %s, %s %s", city, state, zipcode)
             
             result = {
                 'booking_id': booking_data.get('_id') or booking_data.get('id') or booking_id,
@@ -93,47 +138,62 @@ class Database:
                 'zipcode': zipcode,
                 'property_type': property_data.get('type', 'Property'),
                 'amenities': property_data.get('amenities', []),
+                'traveler_id': traveler_data.get('_id'),
                 'traveler_name': traveler_data.get('name', 'Traveler'),
                 'traveler_email': traveler_data.get('email', '')
             }
             
-            print(f"✅ Fetched booking details for booking {booking_id}: {result['property_name']} in {result['location']}")
+            logger.info("Fetched booking details: %s in %s", result['property_name'], result['location'], extra={"booking_id": booking_id})
             return result
             
-        except requests.exceptions.Timeout:
-            print(f"❌ Timeout fetching booking {booking_id}")
-            return None
+        except UpstreamUnavailable as e:
+            logger.error("Booking service unavailable: %s", e.reason, extra={"booking_id": booking_id})
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"❌ API error fetching booking {booking_id}: {e}")
-            return None
+            logger.error("API error fetching booking: %s", e, extra={"booking_id": booking_id})
+            raise UpstreamUnavailable("booking", str(e)) from e
         except Exception as e:
-            print(f"❌ Error processing booking {booking_id}: {e}")
-            return None
+            logger.error("Error processing booking: %s", e, extra={"booking_id": booking_id})
+            raise UpstreamUnavailable("booking", f"invalid response: {e}") from e
     
     @staticmethod
-    def get_user_preferences(user_id: int) -> Optional[Dict]:
-        """Fetch user preferences from traveler service"""
+    @traced("db.get_user_preferences")
+    def get_user_preferences(user_id: str) -> Optional[Dict]:
+        """Fetch the traveler profile and its stored preferences from traveler service"""
         try:
-            response = requests.get(
-                f"{Database.TRAVELER_SERVICE_URL}/traveler/profile/{user_id}",
-                timeout=5
-            )
+            response = traveler_policy.get(f"{Database.TRAVELER_SERVICE_URL}/traveler/profile/{user_id}")
             
             if response.status_code != 200:
                 return None
             
             user_data = response.json()
+            user_data = user_data.get('user', user_data)  # profile responses wrap the user document
             
             result = {
                 'name': user_data.get('name', ''),
                 'email': user_data.get('email', ''),
                 'about_me': user_data.get('aboutMe', ''),
-                'languages': user_data.get('languages', [])
+                'languages': user_data.get('languages') or [],
+                'interests': user_data.get('interests') or [],
+                'dietary_restrictions': user_data.get('dietaryRestrictions') or []
             }
             
             return result
             
         except Exception as e:
-            print(f"Error fetching user preferences: {e}")
+            logger.warning("Error fetching user preferences: %s", e)
             return None
 
+def build_booking_context(booking_data: dict) -> BookingContext:
+    """Create a BookingContext from booking service data"""
+    return BookingContext(
+        booking_id=booking_data['booking_id'],
+        property_name=booking_data['property_name'],
+        city=booking_data['city'],
+        state=booking_data['state'],
+        country=booking_data['country'],
+        zipcode=booking_data.get('zipcode'),  # Optional field
+        start_date=booking_data['start_date'],
+        end_date=booking_data['end_date'],
+        guests=booking_data['guests']
+    )
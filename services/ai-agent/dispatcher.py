@@ -0,0 +1,343 @@
+"""
+City-affinity dispatcher for AI Concierge Agent
+Lightweight proxy in front of several agent workers or replicas that consistently hashes each
+request's canonical booking city to one of them, so per-process caches stay hot for their cities
+
+Run with `python dispatcher.py`: it listens on AI_AGENT_PORT and forwards to DISPATCH_BACKENDS,
+or, when none are configured, to DISPATCH_SPAWN_WORKERS local workers it starts itself.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from config import config
+from database import Database, build_booking_context
+from jobs import job_booking_id
+from logs import get_logger, setup_logging, shutdown_logging
+from retry import UpstreamUnavailable
+from utils import canonical_location
+
+setup_logging()
+logger = get_logger("dispatcher")
+
+ITINERARY_PATH = re.compile(r"^/api/concierge/itinerary/([^/]+)$")
+# Jobs are held by the worker that accepted them; their IDs carry the booking ID to route polls back
+JOB_PATH = re.compile(r"^/api/concierge/jobs/([^/]+)$")
+# Connection-level headers that must not be forwarded by a proxy
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+    "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes
+
+    Adding or removing a member only moves the keys in the arcs it gains or
+    loses (about 1/N of them); every other key keeps its member.
+    """
+
+    def __init__(self, vnodes: int = 100):
+        self.vnodes = vnodes
+        self.members: Set[str] = set()
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+
+    def add(self, member: str) -> None:
+        self.members.add(member)
+        self._rebuild()
+
+    def remove(self, member: str) -> None:
+        self.members.discard(member)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._owners = {
+            _hash(f"{member}#{i}"): member
+            for member in self.members for i in range(self.vnodes)
+        }
+        self._points = sorted(self._owners)
+
+    def lookup(self, key: str, skip: Iterable[str] = ()) -> Optional[str]:
+        """Member owning `key`, walking clockwise past members in `skip`"""
+        if not self._points:
+            return None
+        skip = set(skip)
+        start = bisect.bisect(self._points, _hash(key))
+        for i in range(len(self._points)):
+            member = self._owners[self._points[(start + i) % len(self._points)]]
+            if member not in skip:
+                return member
+        return None
+
+    def shares(self) -> Dict[str, float]:
+        """Fraction of the key space owned by each member"""
+        shares = {member: 0.0 for member in self.members}
+        if not self._points:
+            return shares
+        space = float(1 << 64)
+        previous = self._points[-1] - (1 << 64)
+        for point in self._points:
+            shares[self._owners[point]] += (point - previous) / space
+            previous = point
+        return shares
+
+
+class Shard:
+    """One agent worker or replica and its load"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.requests = 0
+        self.in_flight = 0
+        self.errors = 0
+        self.keys: Set[str] = set()
+        self.last_error: Optional[str] = None
+
+    def stats(self, share: float) -> Dict:
+        return {
+            "healthy": self.healthy,
+            "ring_share": round(share, 4),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "errors": self.errors,
+            "keys": len(self.keys),
+            "last_error": self.last_error,
+        }
+
+
+class Dispatcher:
+    """
+    Routes each request to the shard owning its routing key
+
+    The key is the canonical city of the request's booking (resolved once per
+    booking through the cached booking lookup), else its session ID; requests
+    with neither go to the least busy shard. Shards failing readiness checks or
+    connections leave the ring until they recover, which rebalances their
+    cities onto the remaining shards.
+    """
+
+    MAX_TRACKED_KEYS = 10000
+
+    def __init__(self, backends: List[str], vnodes: int, timeout: float, health_interval: float):
+        self.shards = {url: Shard(url) for url in backends}
+        self.ring = HashRing(vnodes)
+        for url in backends:
+            self.ring.add(url)
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.client: Optional[httpx.AsyncClient] = None
+        self.rebalances = 0
+        self.unrouted = 0
+
+    # Membership
+
+    def add(self, url: str) -> None:
+        shard = self.shards.setdefault(url, Shard(url))
+        shard.healthy = True
+        if url not in self.ring.members:
+            self.ring.add(url)
+            self.rebalances += 1
+            logger.info("Shard joined", extra={"shard": url, "members": len(self.ring.members)})
+
+    def eject(self, url: str, reason: str) -> None:
+        shard = self.shards[url]
+        shard.healthy = False
+        shard.last_error = reason
+        if url in self.ring.members:
+            self.ring.remove(url)
+            self.rebalances += 1
+            logger.warning("Shard left: %s", reason, extra={"shard": url, "members": len(self.ring.members)})
+
+    async def health_loop(self) -> None:
+        """Keep in the ring only shards whose /ready answers 2xx (/health is 200 even when a worker is unready)"""
+        while True:
+            for url in list(self.shards):
+                try:
+                    response = await self.client.get(f"{url}/ready", timeout=config.HEALTH_PROBE_TIMEOUT)
+                except Exception as e:
+                    self.eject(url, f"readiness check failed: {e.__class__.__name__}")
+                    continue
+                if response.is_success:
+                    self.add(url)
+                else:
+                    self.eject(url, f"not ready: HTTP {response.status_code}")
+            await asyncio.sleep(self.health_interval)
+
+    # Routing
+
+    async def routing_key(self, request: Request, body: bytes) -> Optional[str]:
+        match = ITINERARY_PATH.match(request.url.path)
+        job = JOB_PATH.match(request.url.path)
+        if job:
+            return await asyncio.to_thread(self._city_key, job_booking_id(job.group(1)))
+        payload = {}
+        if body and "json" in request.headers.get("content-type", ""):
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+        booking_id = match.group(1) if match else payload.get("booking_id")
+        if booking_id:
+            return await asyncio.to_thread(self._city_key, str(booking_id))
+        if payload.get("session_id"):
+            return f"session:{payload['session_id']}"
+        return None
+
+    @staticmethod
+    def _city_key(booking_id: str) -> str:
+        try:
+            booking_data = Database.get_booking_details(booking_id)
+        except UpstreamUnavailable:
+            booking_data = None
+        if not booking_data:
+            return f"booking:{booking_id}"
+        return canonical_location(build_booking_context(booking_data))
+
+    def choose(self, key: Optional[str], skip: Set[str]) -> Optional[Shard]:
+        if key is not None:
+            url = self.ring.lookup(key, skip)
+            return self.shards[url] if url else None
+        candidates = [s for s in self.shards.values() if s.url in self.ring.members and s.url not in skip]
+        return min(candidates, key=lambda s: s.in_flight) if candidates else None
+
+    async def forward(self, request: Request) -> Response:
+        body = await request.body()
+        key = await self.routing_key(request, body)
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP]
+        tried: Set[str] = set()
+
+        while True:
+            shard = self.choose(key, tried)
+            if shard is None:
+                self.unrouted += 1
+                return JSONResponse(
+                    status_code=503,
+                    content={"success": False, "error": "No healthy agent workers"}
+                )
+            tried.add(shard.url)
+            shard.requests += 1
+            shard.in_flight += 1
+            if key is not None and len(shard.keys) < self.MAX_TRACKED_KEYS:
+                shard.keys.add(key)
+            try:
+                upstream = await self.client.send(
+                    self.client.build_request(
+                        request.method,
+                        f"{shard.url}{request.url.path}",
+                        params=request.query_params,
+                        headers=headers,
+                        content=body,
+                    ),
+                    stream=True,
+                )
+                try:
+                    # Raw bytes: a compressed body is passed through as is
+                    content = b"".join([chunk async for chunk in upstream.aiter_raw()])
+                finally:
+                    await upstream.aclose()
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                # The worker is gone; move its keys to the next shard and retry there
+                shard.errors += 1
+                self.eject(shard.url, f"connection failed: {e.__class__.__name__}")
+                continue
+            except httpx.HTTPError as e:
+                shard.errors += 1
+                shard.last_error = f"{e.__class__.__name__}: {e}"
+                return JSONResponse(status_code=502, content={"success": False, "error": "Agent worker error"})
+            finally:
+                shard.in_flight -= 1
+
+            response_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in HOP_BY_HOP}
+            response_headers["X-Dispatch-Shard"] = shard.url
+            return Response(content=content, status_code=upstream.status_code, headers=response_headers)
+
+    def stats(self) -> Dict:
+        shares = self.ring.shares()
+        return {
+            "members": len(self.ring.members),
+            "rebalances": self.rebalances,
+            "unrouted": self.unrouted,
+            "shards": {url: shard.stats(shares.get(url, 0.0)) for url, shard in self.shards.items()},
+        }
+
+
+def spawn_workers(count: int, base_port: int) -> List[subprocess.Popen]:
+    """Start `count` local agent workers on consecutive ports after `base_port`"""
+    return [
+        subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(base_port + i + 1),
+        ])
+        for i in range(count)
+    ]
+
+
+workers: List[subprocess.Popen] = []
+if config.DISPATCH_BACKENDS:
+    backends = config.DISPATCH_BACKENDS
+else:
+    backends = [f"http://127.0.0.1:{config.DISPATCH_BASE_PORT + i + 1}" for i in range(config.DISPATCH_SPAWN_WORKERS)]
+
+dispatcher = Dispatcher(
+    backends,
+    vnodes=config.DISPATCH_VNODES,
+    timeout=config.DISPATCH_TIMEOUT,
+    health_interval=config.DISPATCH_HEALTH_INTERVAL
+)
+
+app = FastAPI(title="GoTour AI Concierge Dispatcher", docs_url=None, redoc_url=None)
+
+
+@app.on_event("startup")
+async def startup_event():
+    if not config.DISPATCH_BACKENDS:
+        workers.extend(spawn_workers(config.DISPATCH_SPAWN_WORKERS, config.DISPATCH_BASE_PORT))
+    dispatcher.client = httpx.AsyncClient(timeout=dispatcher.timeout)
+    app.state.health_task = asyncio.create_task(dispatcher.health_loop())
+    logger.info("Dispatcher started", extra={"backends": backends})
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.health_task.cancel()
+    await dispatcher.client.aclose()
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.wait(timeout=10)
+    shutdown_logging()
+
+
+@app.get("/dispatcher/stats")
+async def dispatcher_stats():
+    """Ring membership and per-shard load"""
+    return {"success": True, "timestamp": time.time(), **dispatcher.stats()}
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+async def proxy(request: Request):
+    return await dispatcher.forward(request)
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=config.AI_AGENT_HOST, port=config.AI_AGENT_PORT, log_level="info")
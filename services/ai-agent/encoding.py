@@ -0,0 +1,175 @@
+"""
+Fast JSON encoding for AI Concierge Agent responses
+Serializes pipeline records directly with orjson (stdlib json fallback), skipping pydantic validation,
+with optional field projection, compact output and negotiated gzip/brotli compression
+"""
+import gzip
+import json
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from starlette.responses import Response
+
+from config import config
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+
+def _default(obj: Any):
+    """orjson hook for types it does not serialize natively (NamedTuple records)"""
+    if hasattr(obj, "_asdict"):
+        return obj._asdict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def to_primitive(obj: Any) -> Any:
+    """Records and containers as plain dicts/lists, for the stdlib encoder"""
+    if hasattr(obj, "_fields"):
+        return {field: to_primitive(value) for field, value in zip(obj._fields, obj)}
+    if isinstance(obj, (list, tuple)):
+        return [to_primitive(value) for value in obj]
+    if isinstance(obj, dict):
+        return {key: to_primitive(value) for key, value in obj.items()}
+    if isinstance(obj, Enum):
+        return obj.value
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode records, dicts and lists to compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(to_primitive(obj), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# Response shaping
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, Dict]]:
+    """`a.b,c` -> {"a": {"b": {}}, "c": {}}, where an empty dict keeps the whole subtree"""
+    if not fields:
+        return None
+    projection: Dict[str, Dict] = {}
+    for path in fields.split(","):
+        node = projection
+        for part in (p.strip() for p in path.split(".")):
+            if part:
+                node = node.setdefault(part, {})
+    return projection or None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (list, tuple, dict)) and not value)
+
+
+def shape(obj: Any, projection: Optional[Dict[str, Dict]] = None, compact: bool = False) -> Any:
+    """
+    Records and dicts as plain dicts, keeping only projected fields
+
+    Projections apply through lists, so `itinerary.morning.title` keeps the
+    title of every morning activity of every day; `*` matches any field. In
+    compact mode nulls, empty lists and record fields still at their default
+    are dropped.
+    """
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, "_fields"):
+        return [shape(item, projection, compact) for item in obj]
+
+    if hasattr(obj, "_fields"):
+        items = zip(obj._fields, obj)
+        defaults = obj._field_defaults if compact else {}
+    elif isinstance(obj, dict):
+        items = obj.items()
+        defaults = {}
+    else:
+        return obj
+
+    shaped = {}
+    for key, value in items:
+        child = None
+        if projection:
+            child = projection.get(key, projection.get("*"))
+            if child is None:
+                continue
+            if child and not isinstance(value, (list, tuple, dict)):
+                continue  # a sub-path of a scalar selects nothing
+        value = shape(value, child or None, compact)
+        if compact and (_is_empty(value) or (key in defaults and value == defaults[key])):
+            continue
+        shaped[key] = value
+    return shaped
+
+
+def shaped(content: Any, fields: Optional[str] = None, compact: bool = False) -> Any:
+    """Content as requested by the `fields`/`compact` query parameters, unchanged when neither is set"""
+    projection = parse_fields(fields)
+    if projection is None and not compact:
+        return content
+    return shape(content, projection, compact)
+
+
+# Compression
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding from an Accept-Encoding header (brotli preferred on ties)"""
+    if not accept_encoding:
+        return None
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    weights: Dict[str, float] = {}
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for coding in supported:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=config.COMPRESSION_GZIP_LEVEL)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with `dumps` (bytes are sent as already-encoded JSON);
+    returning it bypasses response_model re-validation
+
+    With `accept_encoding` set, bodies of at least COMPRESSION_MIN_BYTES are
+    compressed with the client's preferred supported coding.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None,
+                 accept_encoding: Optional[str] = None):
+        self.coding = negotiate_encoding(accept_encoding)
+        super().__init__(content, status_code=status_code, headers=headers)
+        self.headers["vary"] = "Accept-Encoding"
+        if self.coding is not None:
+            self.headers["content-encoding"] = self.coding
+
+    def render(self, content: Any) -> bytes:
+        body = content if isinstance(content, bytes) else dumps(content)
+        if self.coding is None or len(body) < config.COMPRESSION_MIN_BYTES:
+            self.coding = None
+            return body
+        return compress(body, self.coding)
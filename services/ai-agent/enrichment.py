@@ -0,0 +1,184 @@
+"""
+Content enrichment for Tavily search results
+Extracts tags, cuisine, price hints, accessibility and address spans in a single regex pass
+"""
+import re
+from typing import List, Dict, Optional, Tuple, NamedTuple
+
+from models import PriceTier
+
+# Cuisine keywords recognised in traveler interests and result content
+CUISINE_KEYWORDS = (
+    'indian', 'italian', 'chinese', 'japanese', 'thai', 'mexican',
+    'french', 'greek', 'mediterranean', 'american', 'korean', 'vietnamese',
+    'spanish', 'lebanese', 'turkish', 'brazilian', 'caribbean', 'seafood',
+    'steakhouse', 'pizza', 'sushi', 'bbq', 'barbecue'
+)
+
+# Tag keywords, in the order tags are reported on activity cards
+TAG_KEYWORDS = {
+    "outdoor": ("park", "hiking", "beach", "nature"),
+    "museum": ("museum", "gallery", "art"),
+    "food": ("restaurant", "food", "dining"),
+    "family": ("family", "family-friendly", "kid-friendly", "kids", "children"),
+    "culture": ("culture", "history", "heritage"),
+}
+
+DIETARY_KEYWORDS = {
+    "vegan": "vegan",
+    "vegetarian": "vegetarian",
+    "gluten-free": "gluten-free",
+    "gluten free": "gluten-free",
+    "halal": "halal",
+    "kosher": "kosher",
+    "dairy-free": "dairy-free",
+}
+
+PRICE_KEYWORDS = {
+    "free admission": PriceTier.FREE,
+    "free entry": PriceTier.FREE,
+    "admission is free": PriceTier.FREE,
+    "cheap": PriceTier.LOW,
+    "inexpensive": PriceTier.LOW,
+    "affordable": PriceTier.LOW,
+    "budget-friendly": PriceTier.LOW,
+    "moderately priced": PriceTier.MEDIUM,
+    "mid-range": PriceTier.MEDIUM,
+    "upscale": PriceTier.HIGH,
+    "fine dining": PriceTier.HIGH,
+    "michelin": PriceTier.LUXURY,
+    "luxury": PriceTier.LUXURY,
+}
+
+WHEELCHAIR_KEYWORDS = ("wheelchair", "wheelchair accessible", "ada accessible", "step-free")
+CHILD_KEYWORDS = ("family-friendly", "kid-friendly", "kids", "children", "family")
+
+DOLLAR_TIERS = {1: PriceTier.LOW, 2: PriceTier.MEDIUM, 3: PriceTier.HIGH, 4: PriceTier.LUXURY}
+
+STREET_SUFFIXES = (
+    "Street", "St", "Avenue", "Ave", "Boulevard", "Blvd", "Road", "Rd", "Drive", "Dr",
+    "Lane", "Ln", "Way", "Place", "Pl", "Court", "Ct", "Parkway", "Pkwy", "Highway", "Hwy",
+    "Causeway", "Terrace", "Plaza", "Square", "Trail"
+)
+
+_CUISINE_LABELS = {"bbq": "BBQ", "barbecue": "BBQ"}
+
+
+class Enrichment(NamedTuple):
+    """Attributes extracted from one search result"""
+    tags: Tuple[str, ...]
+    cuisine: Optional[str]
+    price_tier: Optional[PriceTier]
+    dietary_options: Tuple[str, ...]
+    wheelchair_friendly: bool
+    child_friendly: bool
+    address: Optional[str]
+
+
+EMPTY_ENRICHMENT = Enrichment((), None, None, (), False, False, None)
+
+
+class ContentEnricher:
+    """
+    Precompiled multi-pattern matcher over search result content
+
+    All keyword lists are folded into one alternation so each result is scanned once;
+    the compiled pattern and lookup tables are built once and shared by every request.
+    """
+
+    MAX_TAGS = 3
+
+    def __init__(self):
+        # keyword -> list of (kind, value) facts it contributes
+        self._facts: Dict[str, List[Tuple[str, object]]] = {}
+        for tag, keywords in TAG_KEYWORDS.items():
+            for kw in keywords:
+                self._add(kw, "tag", tag)
+        for kw in CUISINE_KEYWORDS:
+            self._add(kw, "cuisine", _CUISINE_LABELS.get(kw, kw.capitalize()))
+        for kw, label in DIETARY_KEYWORDS.items():
+            self._add(kw, "dietary", label)
+        for kw, tier in PRICE_KEYWORDS.items():
+            self._add(kw, "price", tier)
+        for kw in WHEELCHAIR_KEYWORDS:
+            self._add(kw, "wheelchair", True)
+        for kw in CHILD_KEYWORDS:
+            self._add(kw, "child", True)
+
+        self._tag_order = {tag: i for i, tag in enumerate(TAG_KEYWORDS)}
+
+        # Longest keywords first so multi-word phrases win over their prefixes
+        keywords = sorted(self._facts, key=len, reverse=True)
+        keyword_alt = "|".join(re.escape(kw) for kw in keywords)
+        suffix_alt = "|".join(STREET_SUFFIXES)
+        self._pattern = re.compile(
+            # Address spans are matched case-sensitively: a street number, capitalised words
+            # and a street suffix, optionally followed by up to two ", City"-style parts
+            r"(?-i:(?P<address>\b\d{1,5}\s+(?:[A-Z0-9][\w'.-]*\s+){1,4}(?:" + suffix_alt + r")\b\.?"
+            r"(?:,\s*[A-Z][\w'-]*(?:\s[A-Z][\w'-]*)*){0,2}))"
+            r"|(?P<dollars>(?<![\w$])\${1,4}(?![\w$]))"
+            r"|\b(?P<kw>" + keyword_alt + r")(?:e?s)?\b",
+            re.IGNORECASE,
+        )
+
+    def _add(self, keyword: str, kind: str, value) -> None:
+        self._facts.setdefault(keyword, []).append((kind, value))
+
+    def enrich(self, content: str) -> Enrichment:
+        """Extract all attributes from a single piece of content"""
+        if not content:
+            return EMPTY_ENRICHMENT
+
+        tags = set()
+        dietary = []
+        cuisine = None
+        price_tier = None
+        wheelchair = False
+        child = False
+        address = None
+
+        for match in self._pattern.finditer(content):
+            kw = match.group("kw")
+            if kw is not None:
+                for kind, value in self._facts[kw.lower()]:
+                    if kind == "tag":
+                        tags.add(value)
+                    elif kind == "cuisine":
+                        cuisine = cuisine or value
+                    elif kind == "dietary":
+                        if value not in dietary:
+                            dietary.append(value)
+                    elif kind == "price":
+                        price_tier = price_tier or value
+                    elif kind == "wheelchair":
+                        wheelchair = True
+                    elif kind == "child":
+                        child = True
+            elif match.group("dollars") is not None:
+                price_tier = price_tier or DOLLAR_TIERS[len(match.group("dollars"))]
+            elif address is None:
+                address = match.group("address").strip().rstrip(",")
+
+        ordered_tags = tuple(sorted(tags, key=self._tag_order.__getitem__)[:self.MAX_TAGS])
+        return Enrichment(
+            tags=ordered_tags,
+            cuisine=cuisine,
+            price_tier=price_tier,
+            dietary_options=tuple(dietary),
+            wheelchair_friendly=wheelchair,
+            child_friendly=child,
+            address=address,
+        )
+
+    def enrich_batch(self, results: List[Dict]) -> List[Enrichment]:
+        """Enrich a whole list of Tavily results, preserving order"""
+        return [self.enrich(result.get('content', '')) for result in results]
+
+    @staticmethod
+    def cuisine_preferences(interests: List[str]) -> List[str]:
+        """Return the interests that name a cuisine"""
+        return [interest for interest in interests if interest.lower() in CUISINE_KEYWORDS]
+
+
+# Built once at import time and shared across requests
+enricher = ContentEnricher()
@@ -0,0 +1,133 @@
+"""
+Dependency health monitoring for AI Concierge Agent
+Probes upstream dependencies in the background so /health and /ready answer from a snapshot
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from config import config
+from itinerary_store import itinerary_store
+from logs import get_logger
+
+logger = get_logger("health")
+
+
+class HealthMonitor:
+    """
+    Periodically probes registered dependencies and keeps their latest status
+
+    A probe is a callable that returns normally when the dependency is
+    usable and raises otherwise. All probes run in parallel every
+    `interval` seconds on a daemon thread; readers only ever see the last
+    completed snapshot, so health checks never wait on a dependency.
+    """
+
+    def __init__(self, interval: float, timeout: float, ready_dependencies: List[str]):
+        self.interval = interval
+        self.timeout = timeout
+        self.ready_dependencies = ready_dependencies
+        self._probes: Dict[str, Callable[[float], None]] = {}
+        self._status: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rounds = 0
+
+    def register(self, name: str, probe: Callable[[float], None]) -> None:
+        """Add a dependency; `probe(timeout)` must raise when it is unavailable"""
+        self._probes[name] = probe
+
+    def start(self) -> None:
+        """Probe once now, then keep probing in the background"""
+        if self._thread is not None:
+            return
+        unknown = [name for name in self.ready_dependencies if name not in self._probes]
+        if unknown:
+            # A name with no probe would never turn healthy and keep /ready at 503 forever
+            logger.warning("Ignoring unknown READY_DEPENDENCIES: %s", ", ".join(unknown))
+            self.ready_dependencies = [name for name in self.ready_dependencies if name in self._probes]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _run(self) -> None:
+        with ThreadPoolExecutor(max_workers=max(1, len(self._probes)), thread_name_prefix="health-probe") as pool:
+            while not self._stop.is_set():
+                results = pool.map(self._check, list(self._probes.items()))
+                with self._lock:
+                    self._status.update(results)
+                    self.rounds += 1
+                self._stop.wait(self.interval)
+
+    def _check(self, item) -> tuple:
+        name, probe = item
+        started = time.perf_counter()
+        status = {"healthy": True, "error": None}
+        try:
+            probe(self.timeout)
+        except Exception as e:
+            status = {"healthy": False, "error": (str(e) or e.__class__.__name__)[:200]}
+        status["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        status["checked_at"] = time.time()
+        return name, status
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Latest status per dependency (empty until the first probe round completes)"""
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
+
+    def is_healthy(self, name: str) -> bool:
+        with self._lock:
+            status = self._status.get(name)
+        return bool(status and status["healthy"])
+
+    def is_ready(self) -> bool:
+        """True once probed and every dependency needed to serve traffic is healthy"""
+        return self.rounds > 0 and all(self.is_healthy(name) for name in self.ready_dependencies)
+
+    def stats(self) -> Dict:
+        return {
+            "interval_s": self.interval,
+            "rounds": self.rounds,
+            "ready": self.is_ready(),
+        }
+
+
+def _http_probe(url: str, headers: Optional[Dict] = None, any_status: bool = False) -> Callable[[float], None]:
+    """
+    Probe that GETs `url`
+
+    With `any_status` any HTTP response counts as reachable (used for APIs
+    with no free health endpoint); otherwise the status must be 2xx.
+    """
+    def probe(timeout: float) -> None:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        if not any_status and not response.ok:
+            raise RuntimeError(f"HTTP {response.status_code}")
+    return probe
+
+
+health_monitor = HealthMonitor(
+    interval=config.HEALTH_PROBE_INTERVAL,
+    timeout=config.HEALTH_PROBE_TIMEOUT,
+    ready_dependencies=config.READY_DEPENDENCIES
+)
+health_monitor.register("booking", _http_probe(f"{config.BOOKING_SERVICE_URL}/health"))
+health_monitor.register("traveler", _http_probe(f"{config.TRAVELER_SERVICE_URL}/health"))
+# Tavily has no unmetered endpoint; a response from the API host means it is reachable
+health_monitor.register("tavily", _http_probe("https://api.tavily.com", any_status=True))
+# Listing models is free and also verifies the API key
+health_monitor.register("openai", _http_probe(
+    "https://api.openai.com/v1/models",
+    headers={"Authorization": f"Bearer {config.OPENAI_API_KEY}"}
+))
+if itinerary_store.enabled:
+    health_monitor.register("itinerary_store", itinerary_store.ping)
@@ -0,0 +1,126 @@
+"""
+Incremental itinerary recomputation for AI Concierge Agent
+Keeps the inputs and intermediate results of a booking's last plan so small edits only recompute what changed
+"""
+from collections import Counter
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from records import DayRecord, WeatherRecord
+from utils import WeatherService
+
+WEATHER = "weather"
+LLM = "llm"
+DAYS = "days"
+
+
+class PlanState:
+    """
+    Intermediate results of one plan generation
+
+    A new state is created per run with `previous` pointing at the booking's
+    last state; stages look up reusable results there and record their own.
+    """
+
+    def __init__(self, previous: Optional["PlanState"] = None):
+        self.previous = previous
+        self.weather_location: Optional[str] = None
+        self.weather_by_date: Dict[str, WeatherRecord] = {}
+        self.days: Dict[tuple, DayRecord] = {}
+        # Set when a stage fell back (no search results, fallback itinerary); such plans are not cached
+        self.degraded = False
+
+    def finish(self) -> "PlanState":
+        """Drop the link to the previous state so states do not chain in memory"""
+        self.previous = None
+        return self
+
+
+class IncrementalPlanner:
+    """Stage-level reuse between consecutive plans for the same booking"""
+
+    def __init__(self, fetch_weather: Callable = WeatherService.get_weather_forecast):
+        self.fetch_weather = fetch_weather
+        self.computed = Counter()
+        self.reused = Counter()
+
+    def weather(self, state: PlanState, location: str, start_date: date, end_date: date) -> List[WeatherRecord]:
+        """Forecast for the trip, fetching only dates the previous plan did not cover"""
+        previous = state.previous
+        known: Dict[str, WeatherRecord] = {}
+        if previous is not None and previous.weather_location == location:
+            known = previous.weather_by_date
+
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        missing = [d for d in dates if d.strftime("%Y-%m-%d") not in known]
+
+        fetched: Dict[str, WeatherRecord] = {}
+        for range_start, range_end in _contiguous_ranges(missing):
+            for info in self.fetch_weather(location, range_start, range_end):
+                fetched[info.date] = info
+
+        self.computed[WEATHER] += len(missing)
+        self.reused[WEATHER] += len(dates) - len(missing)
+
+        state.weather_location = location
+        forecast = []
+        for d in dates:
+            key = d.strftime("%Y-%m-%d")
+            info = fetched.get(key) or known.get(key)
+            if info is not None:
+                state.weather_by_date[key] = info
+                forecast.append(info)
+        return forecast
+
+    def reuses_all_days(self, state: PlanState, fingerprints: List[tuple]) -> bool:
+        """True when every day of the new plan can be reused, so the LLM stage can be skipped"""
+        previous = state.previous
+        if previous is not None and fingerprints and all(f in previous.days for f in fingerprints):
+            self.reused[LLM] += 1
+            return True
+        self.computed[LLM] += 1
+        return False
+
+    def day(self, state: PlanState, fingerprint: tuple, date_str: str, day_number: int) -> Optional[DayRecord]:
+        """Previously built DayRecord with identical content, moved to this date and day number, or None"""
+        previous = state.previous
+        day_plan = previous.days.get(fingerprint) if previous is not None else None
+        if day_plan is not None:
+            self.reused[DAYS] += 1
+            state.days[fingerprint] = day_plan
+            return day_plan._replace(date=date_str, day_number=day_number)
+        self.computed[DAYS] += 1
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "computed": dict(self.computed),
+            "reused": dict(self.reused),
+        }
+
+
+def day_fingerprint(attractions: List[Dict], restaurants: List[Dict], preferences) -> tuple:
+    """
+    Everything a DayRecord's cards are built from: its results and the card-relevant preferences
+
+    The date is left out so shifting a trip's dates still reuses its days.
+    """
+    return (
+        tuple(r.get('url') or r.get('title') for r in attractions),
+        tuple(r.get('url') or r.get('title') for r in restaurants),
+        str(preferences.budget),
+        tuple(sorted(preferences.dietary_restrictions)),
+        preferences.has_children,
+        preferences.wheelchair_accessible,
+    )
+
+
+def _contiguous_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Group sorted dates into (start, end) runs of consecutive days"""
+    ranges = []
+    for d in days:
+        if ranges and d - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], d)
+        else:
+            ranges.append((d, d))
+    return ranges
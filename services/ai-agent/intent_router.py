@@ -0,0 +1,135 @@
+"""
+Local intent routing for AI Concierge Agent
+Answers simple trip questions (weather, packing, dates, guests) from local data without Tavily or the LLM
+"""
+import re
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from utils import WeatherService, PackingListGenerator, extract_location_city, calculate_trip_length
+
+WEATHER = "weather"
+PACKING = "packing"
+DATES = "dates"
+GUESTS = "guests"
+
+# Checked in order; the first matching intent wins
+INTENT_PATTERNS = (
+    (WEATHER, re.compile(
+        r"\b(?:weather|forecast|temperatures?|will it (?:rain|snow|be (?:hot|cold|warm|sunny|rainy))"
+        r"|how (?:hot|cold|warm) (?:is|will)|chance of rain)\b",
+        re.IGNORECASE
+    )),
+    (PACKING, re.compile(
+        r"\b(?:pack|packing|what (?:should|do) (?:i|we) bring|luggage|suitcase)\b",
+        re.IGNORECASE
+    )),
+    (DATES, re.compile(
+        r"\b(?:check[- ]?in|check[- ]?out|trip dates|what dates|when (?:is|does|do) (?:my|our) (?:trip|stay|booking)"
+        r"|how (?:many (?:days|nights)|long is (?:my|our) (?:trip|stay)))\b",
+        re.IGNORECASE
+    )),
+    (GUESTS, re.compile(
+        r"\b(?:how many (?:guests|people|of us)|number of guests|guest count)\b",
+        re.IGNORECASE
+    )),
+)
+
+# Questions that ask for recommendations stay on the search + LLM path
+OPEN_ENDED_PATTERN = re.compile(
+    r"\b(?:restaurants?|things to do|activit(?:y|ies)|attractions?|recommend\w*|suggest\w*|find|places?|where)\b",
+    re.IGNORECASE
+)
+
+
+class IntentRouter:
+    """
+    Keyword/regex classifier in front of AIConciergeAgent.answer_query
+
+    Returns a templated answer for questions that booking data, the weather
+    forecast and PackingListGenerator can answer locally, or None to fall
+    through to the full search + LLM path. `fetch_weather(location, start, end)`
+    supplies the forecast; the agent passes its cached accessor.
+    """
+
+    def __init__(self, fetch_weather: Callable = WeatherService.get_weather_forecast):
+        self.fetch_weather = fetch_weather
+        self._handlers: Dict[str, Callable] = {
+            WEATHER: self._answer_weather,
+            PACKING: self._answer_packing,
+            DATES: self._answer_dates,
+            GUESTS: self._answer_guests,
+        }
+        self.routed = Counter()
+
+    def classify(self, query: str) -> Optional[str]:
+        """Return the local intent for a query, or None for open-ended questions"""
+        if OPEN_ENDED_PATTERN.search(query):
+            return None
+        for intent, pattern in INTENT_PATTERNS:
+            if pattern.search(query):
+                return intent
+        return None
+
+    def route(self, query: str, booking_context=None, preferences: Dict = None) -> Optional[str]:
+        """Answer the query locally when possible"""
+        if booking_context is None:
+            return None
+        intent = self.classify(query)
+        if intent is None:
+            return None
+        self.routed[intent] += 1
+        return self._handlers[intent](booking_context, preferences or {})
+
+    def _forecast(self, booking_context):
+        return self.fetch_weather(
+            extract_location_city(booking_context.location),
+            booking_context.start_date,
+            booking_context.end_date
+        )
+
+    def _answer_weather(self, booking_context, preferences: Dict) -> str:
+        forecast = self._forecast(booking_context)
+        lines = [f"🌤️ Weather forecast for {booking_context.city} during your stay:"]
+        for day in forecast:
+            lines.append(
+                f"• {day.date}: {day.condition}, high {day.temperature_high:.0f}°F / "
+                f"low {day.temperature_low:.0f}°F, {day.precipitation_chance}% chance of rain"
+            )
+        if any(day.precipitation_chance > PackingListGenerator.RAIN_CHANCE_ABOVE for day in forecast):
+            lines.append("☔ Rain is possible - pack an umbrella or rain jacket.")
+        return "\n".join(lines)
+
+    def _answer_packing(self, booking_context, preferences: Dict) -> str:
+        forecast = self._forecast(booking_context)
+        trip_length = calculate_trip_length(booking_context.start_date, booking_context.end_date)
+        items = PackingListGenerator.generate(forecast, trip_length, preferences)
+
+        by_category: Dict[str, list] = {}
+        for item in items:
+            by_category.setdefault(item.category, []).append(item)
+
+        lines = [f"🧳 Packing list for your {trip_length}-day trip to {booking_context.city}:"]
+        for category, category_items in by_category.items():
+            lines.append(f"\n**{category.capitalize()}**")
+            for item in category_items:
+                lines.append(f"• {item.item}" + (f" - {item.reason}" if item.reason else ""))
+        return "\n".join(lines)
+
+    def _answer_dates(self, booking_context, preferences: Dict) -> str:
+        nights = (booking_context.end_date - booking_context.start_date).days
+        return (
+            f"📅 Your stay at {booking_context.property_name} in {booking_context.city} runs from "
+            f"{booking_context.start_date:%A, %B %d, %Y} (check-in) to "
+            f"{booking_context.end_date:%A, %B %d, %Y} (check-out) - {nights} night{'s' if nights != 1 else ''}."
+        )
+
+    def _answer_guests(self, booking_context, preferences: Dict) -> str:
+        guests = booking_context.guests
+        return (
+            f"👥 Your booking at {booking_context.property_name} is for {guests} "
+            f"guest{'s' if guests != 1 else ''}."
+        )
+
+    def stats(self) -> Dict:
+        return dict(self.routed)
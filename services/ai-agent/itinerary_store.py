@@ -0,0 +1,209 @@
+"""
+Durable itinerary store for AI Concierge Agent
+Keeps the latest generated plan per booking with a version number and input fingerprint,
+in an embedded SQLite file (default) or the platform's MongoDB
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from config import config
+from encoding import dumps
+from logs import get_logger
+from records import PlanRecord
+from utils import canonical_location, preferences_fingerprint
+
+logger = get_logger("itinerary_store")
+
+
+class StoredPlan(NamedTuple):
+    booking_id: str
+    version: int
+    fingerprint: str
+    body: bytes  # the plan as JSON, exactly as served
+    updated_at: float
+
+    def etag(self, variant: str = "") -> str:
+        """
+        Weak validator of this version (it may be served compressed or not);
+        `variant` distinguishes projected/compact representations
+        """
+        suffix = f"-{hashlib.sha1(variant.encode('utf-8')).hexdigest()[:8]}" if variant else ""
+        return f'W/"{self.version}-{self.fingerprint[:16]}{suffix}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+    return any(strip(tag) == strip(etag) for tag in if_none_match.split(","))
+
+
+def plan_fingerprint(booking, preferences) -> str:
+    """Digest of every input the plan depends on; a new fingerprint means a regenerated plan differs"""
+    inputs = (
+        canonical_location(booking),
+        booking.start_date.isoformat(),
+        booking.end_date.isoformat(),
+        booking.guests,
+        preferences_fingerprint(preferences),
+    )
+    return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+
+class SqliteBackend:
+    """Single-file embedded store; one connection shared across threads behind a lock"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS itineraries ("
+            " booking_id TEXT PRIMARY KEY, version INTEGER NOT NULL, fingerprint TEXT NOT NULL,"
+            " body BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, booking_id: str) -> Optional[StoredPlan]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT booking_id, version, fingerprint, body, updated_at FROM itineraries WHERE booking_id = ?",
+                (booking_id,)
+            ).fetchone()
+        return StoredPlan(row[0], row[1], row[2], bytes(row[3]), row[4]) if row else None
+
+    def put(self, booking_id: str, fingerprint: str, body: bytes) -> StoredPlan:
+        """Store a new version unless the stored plan is identical"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT version, fingerprint, body, updated_at FROM itineraries WHERE booking_id = ?",
+                (booking_id,)
+            ).fetchone()
+            if row and row[1] == fingerprint and bytes(row[2]) == body:
+                return StoredPlan(booking_id, row[0], fingerprint, body, row[3])
+            version = row[0] + 1 if row else 1
+            updated_at = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO itineraries (booking_id, version, fingerprint, body, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (booking_id, version, fingerprint, body, updated_at)
+            )
+        return StoredPlan(booking_id, version, fingerprint, body, updated_at)
+
+    def ping(self) -> None:
+        with self._lock:
+            self._conn.execute("SELECT 1").fetchone()
+
+
+class MongoBackend:
+    """Collection in the platform MongoDB (docker-compose `mongodb`); needs pymongo"""
+
+    def __init__(self, uri: str, collection: str, timeout: float):
+        from pymongo import MongoClient  # optional dependency, only for this backend
+
+        self.client = MongoClient(uri, serverSelectionTimeoutMS=int(timeout * 1000))
+        self.collection = self.client.get_default_database(default="gotour_db")[collection]
+
+    def get(self, booking_id: str) -> Optional[StoredPlan]:
+        doc = self.collection.find_one({"_id": booking_id})
+        return self._plan(doc) if doc else None
+
+    def put(self, booking_id: str, fingerprint: str, body: bytes) -> StoredPlan:
+        """Store a new version unless identical; the version bump is atomic on the server"""
+        current = self.collection.find_one({"_id": booking_id})
+        if current and current["fingerprint"] == fingerprint and bytes(current["body"]) == body:
+            return self._plan(current)
+        doc = self.collection.find_one_and_update(
+            {"_id": booking_id},
+            {"$inc": {"version": 1}, "$set": {"fingerprint": fingerprint, "body": body, "updated_at": time.time()}},
+            upsert=True,
+            return_document=True,
+        )
+        return self._plan(doc)
+
+    def ping(self) -> None:
+        self.client.admin.command("ping")
+
+    @staticmethod
+    def _plan(doc: Dict) -> StoredPlan:
+        return StoredPlan(doc["_id"], doc["version"], doc["fingerprint"], bytes(doc["body"]), doc["updated_at"])
+
+
+class ItineraryStore:
+    """
+    Latest successful plan per booking, versioned
+
+    Saving an identical plan keeps the version (and so the ETag); any change
+    in content or inputs stores it as the next version. Store failures are
+    logged and counted but never fail plan generation.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, booking_id: str) -> Optional[StoredPlan]:
+        if self.backend is None:
+            return None
+        self.reads += 1
+        stored = self.backend.get(str(booking_id))
+        if stored is not None:
+            self.hits += 1
+        return stored
+
+    def save(self, booking_id: str, fingerprint: str, plan: PlanRecord) -> Optional[StoredPlan]:
+        """Persist a successful plan; returns the stored version, or None if not stored"""
+        if self.backend is None or not plan.success:
+            return None
+        try:
+            stored = self.backend.put(str(booking_id), fingerprint, dumps(plan))
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Could not store itinerary: %s", e, extra={"booking_id": booking_id})
+            return None
+        self.writes += 1
+        return stored
+
+    def ping(self, timeout: float = None) -> None:
+        if self.backend is not None:
+            self.backend.ping()
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend.__class__.__name__ if self.backend is not None else None,
+            "reads": self.reads,
+            "hits": self.hits,
+            "writes": self.writes,
+            "errors": self.errors,
+        }
+
+
+def build_backend(name: str):
+    """Backend from configuration: `sqlite` (default), `mongodb` or `none`"""
+    if name == "none":
+        return None
+    if name == "mongodb":
+        return MongoBackend(config.MONGODB_URI, config.ITINERARY_STORE_COLLECTION, config.HEALTH_PROBE_TIMEOUT)
+    return SqliteBackend(config.ITINERARY_STORE_PATH)
+
+
+itinerary_store = ItineraryStore(build_backend(config.ITINERARY_STORE))
@@ -0,0 +1,281 @@
+"""
+Asynchronous plan jobs for AI Concierge Agent
+Plans requested with `?async=true` are generated in the background; the client polls the job
+or receives the result at a callback URL, so no connection stays open for the LLM
+"""
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import ipaddress
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import HTTPException
+
+from admission import AdmissionRejected, UpstreamBusy
+from config import config
+from encoding import dumps, shaped
+from logs import get_logger, request_id_var
+from retry import UpstreamUnavailable
+from tracing import tracer
+
+logger = get_logger("jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def job_booking_id(job_id: str) -> str:
+    """Booking a job ID was issued for (job IDs are `<booking_id>.<random>`)"""
+    return job_id.rpartition(".")[0]
+
+
+def validate_callback_url(url: str) -> None:
+    """
+    Raise ValueError unless `url` is an http(s) URL on an allow-listed host
+    that resolves only to public addresses
+
+    Callbacks are off while PLAN_JOB_CALLBACK_HOSTS is empty. Resolving
+    blocks, so async callers run this in a thread.
+    """
+    if not config.PLAN_JOB_CALLBACK_HOSTS:
+        raise ValueError("callbacks are disabled (PLAN_JOB_CALLBACK_HOSTS is not configured)")
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    host = parsed.hostname.lower()
+    if host not in config.PLAN_JOB_CALLBACK_HOSTS:
+        raise ValueError(f"callback host {host} is not allowed")
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"callback host {host} does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"callback host {host} resolves to a non-public address")
+
+
+class PlanJob:
+    """One background plan generation and its outcome"""
+
+    def __init__(self, job_id: str, booking_id: str, callback_url: Optional[str]):
+        self.job_id = job_id
+        self.booking_id = booking_id
+        self.callback_url = callback_url
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None
+        self.callback_status: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def view(self, fields: Optional[str] = None, compact: bool = False) -> Dict:
+        """Job status, with the plan (shaped like a plan-from-booking response) once completed"""
+        view = {
+            "success": self.status != FAILED,
+            "job_id": self.job_id,
+            "booking_id": self.booking_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == FAILED:
+            view["error"] = self.error
+            view["error_status"] = self.error_status
+        if self.callback_url:
+            view["callback_status"] = self.callback_status
+        if self.result is not None:
+            view["result"] = shaped(self.result, fields, compact)
+        return view
+
+
+class PlanJobQueue:
+    """
+    Bounded background executor for plan jobs
+
+    At most `workers` jobs run at once and at most `max_queue` wait; beyond
+    that `submit` raises AdmissionRejected. Finished jobs are kept for
+    `result_ttl` seconds (at most `max_retained` of them) for polling.
+    Jobs live in this process only, so they are lost on restart.
+    """
+
+    POLL_AFTER = 2
+
+    def __init__(self, workers: int, max_queue: int, result_ttl: float, max_retained: int,
+                 callback_attempts: int, callback_timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.max_retained = max_retained
+        self.callback_attempts = max(1, callback_attempts)
+        self.callback_timeout = callback_timeout
+        self._jobs: "OrderedDict[str, PlanJob]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.callbacks_delivered = 0
+        self.callbacks_failed = 0
+
+    def submit(self, booking_id: str, run: Callable[[], Awaitable], callback_url: Optional[str] = None) -> PlanJob:
+        """Queue `run()` (returning a PlanRecord) as a job for `booking_id`"""
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("plan_jobs", config.ADMISSION_RETRY_AFTER)
+        # Created lazily so it binds to the server's running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        self._prune()
+        job = PlanJob(f"{booking_id}.{uuid.uuid4().hex[:16]}", str(booking_id), callback_url)
+        self._jobs[job.job_id] = job
+        self.queued += 1
+        self.submitted += 1
+
+        # Run outside the submitting request's context, so the job is its own trace
+        request_id = request_id_var.get()
+        task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._execute(job, run, request_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[PlanJob]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def _execute(self, job: PlanJob, run: Callable[[], Awaitable], request_id: str) -> None:
+        request_id_var.set(request_id)
+        try:
+            async with self._semaphore:
+                self.queued -= 1
+                self.running += 1
+                job.status = RUNNING
+                job.started_at = time.time()
+                try:
+                    with tracer.span("plan_job", job_id=job.job_id, booking_id=job.booking_id):
+                        job.result = await run()
+                    job.status = COMPLETED
+                    self.completed += 1
+                except HTTPException as e:
+                    self._fail(job, e.status_code, str(e.detail))
+                except UpstreamUnavailable as e:
+                    self._fail(job, 503, str(e))
+                except UpstreamBusy as e:
+                    self._fail(job, 429, str(e))
+                except Exception as e:
+                    self._fail(job, 500, f"Error generating itinerary: {str(e)}")
+                finally:
+                    job.finished_at = time.time()
+                    self.running -= 1
+        except asyncio.CancelledError:
+            # Cancelled by shutdown, either still waiting for a worker or mid-run
+            if job.status == QUEUED:
+                self.queued -= 1
+                job.finished_at = time.time()
+            self._fail(job, 503, "Job cancelled: the server is shutting down")
+            raise
+
+        if job.callback_url:
+            await self._deliver(job)
+
+    def _fail(self, job: PlanJob, status_code: int, error: str) -> None:
+        job.status = FAILED
+        job.error_status = status_code
+        job.error = error
+        self.failed += 1
+        logger.warning("Plan job failed: %s", error, extra={"job_id": job.job_id, "booking_id": job.booking_id})
+
+    async def _deliver(self, job: PlanJob) -> None:
+        """POST the finished job to its callback URL, retrying with backoff"""
+        # Checked again at delivery: the host's DNS may have changed since submission
+        try:
+            await asyncio.to_thread(validate_callback_url, job.callback_url)
+        except ValueError as e:
+            job.callback_status = "rejected"
+            self.callbacks_failed += 1
+            logger.warning("Plan job callback rejected: %s", e, extra={"job_id": job.job_id})
+            return
+
+        body = dumps(job.view())
+        headers = {"Content-Type": "application/json", "X-Job-ID": job.job_id}
+        if config.INTERNAL_API_KEY:
+            signature = hmac.new(config.INTERNAL_API_KEY.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers["X-Signature"] = f"sha256={signature}"
+
+        last_error = None
+        async with httpx.AsyncClient(timeout=self.callback_timeout) as client:
+            for attempt in range(self.callback_attempts):
+                if attempt:
+                    await asyncio.sleep(2 ** (attempt - 1))
+                try:
+                    response = await client.post(job.callback_url, content=body, headers=headers)
+                    if response.is_success:
+                        job.callback_status = "delivered"
+                        self.callbacks_delivered += 1
+                        return
+                    last_error = f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    last_error = e.__class__.__name__
+        job.callback_status = "failed"
+        self.callbacks_failed += 1
+        logger.warning("Plan job callback failed: %s", last_error, extra={"job_id": job.job_id})
+
+    def _prune(self) -> None:
+        """Forget finished jobs past their retention time, or beyond max_retained"""
+        cutoff = time.time() - self.result_ttl
+        finished: List[str] = [job_id for job_id, job in self._jobs.items() if job.done]
+        excess = len(finished) - self.max_retained
+        for job_id in finished:
+            if excess > 0 or self._jobs[job_id].finished_at < cutoff:
+                del self._jobs[job_id]
+                excess -= 1
+
+    def shutdown(self) -> None:
+        """Cancel jobs still queued or running"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "retained": len(self._jobs),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "callbacks_delivered": self.callbacks_delivered,
+            "callbacks_failed": self.callbacks_failed,
+        }
+
+
+plan_jobs = PlanJobQueue(
+    workers=config.PLAN_JOB_WORKERS,
+    max_queue=config.PLAN_JOB_MAX_QUEUE,
+    result_ttl=config.PLAN_JOB_RESULT_TTL,
+    max_retained=config.PLAN_JOB_MAX_RETAINED,
+    callback_attempts=config.PLAN_JOB_CALLBACK_ATTEMPTS,
+    callback_timeout=config.PLAN_JOB_CALLBACK_TIMEOUT
+)
@@ -0,0 +1,159 @@
+"""
+Structured logging for AI Concierge Agent
+Records are queued on the calling thread and formatted/written by a background listener,
+tagged with the current request ID, filtered per module and sampled for high-volume messages
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from config import config
+
+# ID of the request being served; copied into worker threads by asyncio.to_thread
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came from `extra=` and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+def _parse_mapping(spec: str) -> Dict[str, str]:
+    """Parse "agent=DEBUG,database=WARNING" into a dict"""
+    mapping = {}
+    for part in spec.split(","):
+        name, sep, value = part.partition("=")
+        if sep and name.strip():
+            mapping[name.strip()] = value.strip()
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request ID, message and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _RequestContextFilter(logging.Filter):
+    """Stamps the request ID and drops a share of sampled, below-WARNING records"""
+
+    def __init__(self, sample_rates: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.sample_rates.get(record.name)
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and defers formatting to the listener
+
+    When the queue is full the record is dropped and counted rather than
+    stalling the request; time spent on the calling thread is accumulated
+    so logging overhead can be read from /admin/stats.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+        self.emit_seconds = 0.0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message (args may be mutated later) but leave formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        started = time.perf_counter()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+        finally:
+            self.emit_seconds += time.perf_counter() - started
+
+
+_handler: Optional[_NonBlockingQueueHandler] = None
+_filter: Optional[_RequestContextFilter] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Route all service logging through the background queue listener (idempotent)"""
+    global _handler, _filter, _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if config.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(maxsize=config.LOG_QUEUE_SIZE))
+    _filter = _RequestContextFilter({
+        name: float(rate) for name, rate in _parse_mapping(config.LOG_SAMPLING).items()
+    })
+    _handler.addFilter(_filter)
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(config.LOG_LEVEL.upper())
+    for name, level in _parse_mapping(config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module; `name` is what LOG_LEVELS and LOG_SAMPLING refer to"""
+    return logging.getLogger(name)
+
+
+def logging_stats() -> Dict:
+    if _handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "enqueued": _handler.enqueued,
+        "dropped": _handler.dropped,
+        "sampled_out": _filter.sampled_out,
+        "queue_depth": _handler.queue.qsize(),
+        "avg_emit_us": round(_handler.emit_seconds / _handler.enqueued * 1e6, 2) if _handler.enqueued else 0.0,
+    }
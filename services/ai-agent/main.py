@@ -1,15 +1,39 @@
 """
 FastAPI application for AI Concierge Agent
 """
-from fastapi import FastAPI, HTTPException, status
+import asyncio
+import hmac
+import json
+import uuid
+from typing import Optional, Tuple, Union
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import uvicorn
 
 from config import config
-from models import AgentRequest, AgentResponse, ErrorResponse, BookingContext
+from logs import get_logger, setup_logging, shutdown_logging, logging_stats, request_id_var
+from models import AgentRequest, AgentResponse, ErrorResponse, TravelerPreferences
+from records import PlanRecord
+from encoding import FastJSONResponse, shaped
+from itinerary_store import itinerary_store, plan_fingerprint, etag_matches, StoredPlan
 from agent import agent
-from database import Database
+from database import booking_cache, booking_policy, traveler_policy, build_booking_context
+from sessions import session_store
+from ranking import result_processor
+from refresh import refresh_scheduler
+from health import health_monitor
+from tracing import tracer
+from profiling import profiler, ProfileBusy, ProfileNotFound
+from prefetch import prefetcher, BOOKING_EVENTS
+from profiles import InvalidPreferences, load_booking_and_preferences, merge_preferences, profile_cache
+from retry import UpstreamUnavailable
+from jobs import plan_jobs, validate_callback_url
+from prompts import PROMPTS
+from admission import AdmissionRejected, UpstreamBusy, plan_pool, query_pool, tavily_limiter, openai_limiter
+
+setup_logging()
+logger = get_logger("main")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,17 +53,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """
+    Tag all logging for a request with its ID (from X-Request-ID, or generated) and echo it back
+    
+    The request is also the root span of its trace.
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        with tracer.span(f"{request.method} {request.url.path}", request_id=request_id) as span:
+            response = await call_next(request)
+            span.set("status_code", response.status_code)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+def service_unavailable(exc: UpstreamUnavailable) -> HTTPException:
+    """503 when a backing service could not answer (as opposed to a 404 for missing data)"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"The {exc.service} service is temporarily unavailable, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def too_many_requests(exc: Union[AdmissionRejected, UpstreamBusy]) -> HTTPException:
+    """429 response telling the client when to retry (endpoint pool full, or no upstream slot)"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"AI Concierge is busy ({exc.pool} requests), please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.on_event("startup")
 async def startup_event():
     """Validate configuration on startup"""
     try:
         config.validate()
-        print("✅ Configuration validated")
-        print(f"🚀 AI Concierge Agent starting on {config.AI_AGENT_HOST}:{config.AI_AGENT_PORT}")
+        logger.info("Configuration validated")
+        health_monitor.start()
+        logger.info("AI Concierge Agent starting on %s:%s", config.AI_AGENT_HOST, config.AI_AGENT_PORT)
     except Exception as e:
-        print(f"❌ Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background dependency probes and flush logs"""
+    health_monitor.stop()
+    plan_jobs.shutdown()
+    shutdown_logging()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -52,26 +118,54 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    services_status = Database.get_connection()
+    """
+    Health check endpoint
+    
+    Dependency status comes from the background health monitor, so this never
+    waits on (or adds load to) the booking service or upstream APIs. Internal
+    counters are on the admin-only /admin/stats.
+    """
     return {
         "success": True,
         "message": "AI Concierge Agent is healthy",
-        "services_reachable": services_status
+        "services_reachable": health_monitor.is_healthy("booking"),
+        "ready": health_monitor.is_ready()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the dependencies needed to serve requests are healthy, else 503"""
+    ready = health_monitor.is_ready()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "ready": ready,
+            # Healthy flags only; probe errors and latencies are on /admin/stats
+            "dependencies": {name: health_monitor.is_healthy(name) for name in health_monitor.ready_dependencies}
+        }
+    )
+
 @app.post("/api/concierge/plan-from-booking", response_model=AgentResponse)
 async def generate_plan_from_booking_id(
-    request: dict
+    request: dict,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    async_mode: bool = Query(default=False, alias="async"),
+    accept_encoding: Optional[str] = Header(default=None),
+    prefer: Optional[str] = Header(default=None)
 ):
     """
     Generate trip plan from booking ID
     
-    Fetches booking details from database and generates itinerary
+    Fetches booking details from database and generates itinerary.
+    `fields` and `compact` trim the response; see `encoding.shaped`.
+    With `?async=true` (or `Prefer: respond-async`) it answers 202 with a job
+    to poll instead; see `submit_plan_job`.
     """
     try:
         # Extract parameters from request
         booking_id = request.get('booking_id')
+        traveler_id = request.get('traveler_id')
         preferences = request.get('preferences', {})
         
         if not booking_id:
@@ -80,39 +174,26 @@ async def generate_plan_from_booking_id(
                 detail="booking_id is required"
             )
         
-        # Fetch booking from database
-        booking_data = Database.get_booking_details(booking_id)
+        if async_mode or "respond-async" in (prefer or "").lower():
+            return await submit_plan_job(str(booking_id), traveler_id, preferences, request.get('callback_url'))
         
-        if not booking_data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Booking {booking_id} not found"
-            )
-        
-        # Create booking context
-        booking_context = BookingContext(
-            booking_id=booking_data['booking_id'],
-            property_name=booking_data['property_name'],
-            city=booking_data['city'],
-            state=booking_data['state'],
-            country=booking_data['country'],
-            zipcode=booking_data.get('zipcode'),  # Optional field
-            start_date=booking_data['start_date'],
-            end_date=booking_data['end_date'],
-            guests=booking_data['guests']
+        async with plan_pool.admit():
+            # Booking and traveler profile are fetched concurrently
+            booking_data, merged = await load_booking_and_preferences(booking_id, traveler_id, preferences)
+            plan, stored = await asyncio.to_thread(_plan_from_booking, booking_id, booking_data, merged)
+        # Records serialize straight to JSON; response_model only documents the schema
+        return FastJSONResponse(
+            shaped(plan, fields, compact),
+            headers=itinerary_headers(stored, fields, compact) if stored else None,
+            accept_encoding=accept_encoding
         )
-        
-        # Create agent request
-        agent_request = AgentRequest(
-            booking_context=booking_context,
-            preferences=preferences or {}
-        )
-        
-        # Generate itinerary
-        response = agent.generate_itinerary(agent_request)
-        
-        return response
     
+    except (AdmissionRejected, UpstreamBusy) as e:
+        raise too_many_requests(e)
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
+    except InvalidPreferences as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -121,8 +202,127 @@ async def generate_plan_from_booking_id(
             detail=f"Error generating itinerary: {str(e)}"
         )
 
+async def submit_plan_job(booking_id: str, traveler_id, preferences: dict, callback_url: Optional[str]) -> JSONResponse:
+    """Queue the plan as a background job and answer 202 with where to poll for it"""
+    # Reject malformed preferences now rather than in the job
+    merge_preferences({}, preferences)
+    if callback_url:
+        try:
+            await asyncio.to_thread(validate_callback_url, callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    async def run() -> PlanRecord:
+        # Jobs take the same plan_pool slots as synchronous plans, so PLAN_MAX_CONCURRENT caps both
+        async with plan_pool.admit(wait=True):
+            booking_data, merged = await load_booking_and_preferences(booking_id, traveler_id, preferences)
+            plan, _ = await asyncio.to_thread(_plan_from_booking, booking_id, booking_data, merged)
+        return plan
+    
+    job = plan_jobs.submit(booking_id, run, callback_url)
+    status_url = f"/api/concierge/jobs/{job.job_id}"
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"success": True, "job_id": job.job_id, "status": job.status, "status_url": status_url},
+        headers={"Location": status_url, "Retry-After": str(plan_jobs.POLL_AFTER)}
+    )
+
+def _plan_from_booking(
+    booking_id: str,
+    booking_data: Optional[dict],
+    preferences: TravelerPreferences
+) -> Tuple[PlanRecord, Optional[StoredPlan]]:
+    """Generate the booking's itinerary and store it (blocking, runs in a worker thread)"""
+    if not booking_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Booking {booking_id} not found"
+        )
+    
+    # Create booking context
+    booking_context = build_booking_context(booking_data)
+    
+    # Create agent request
+    agent_request = AgentRequest(
+        booking_context=booking_context,
+        preferences=preferences
+    )
+    
+    # Generate itinerary
+    plan = agent.plan_itinerary(agent_request)
+    fingerprint = plan_fingerprint(booking_context, agent_request.preferences)
+    return plan, itinerary_store.save(booking_id, fingerprint, plan)
+
+def itinerary_headers(stored: StoredPlan, fields: Optional[str], compact: bool) -> dict:
+    """Validator headers for a stored itinerary in the requested representation"""
+    return {
+        "ETag": stored.etag(f"{fields or ''}|{compact}" if fields or compact else ""),
+        "Cache-Control": "private, no-cache",
+        "X-Itinerary-Version": str(stored.version),
+    }
+
+@app.get("/api/concierge/itinerary/{booking_id}", response_model=AgentResponse)
+async def get_itinerary(
+    booking_id: str,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    accept_encoding: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Latest stored itinerary for a booking, without regenerating it
+    
+    Answers 304 Not Modified when If-None-Match carries the current ETag.
+    """
+    try:
+        stored = await asyncio.to_thread(itinerary_store.get, booking_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Itinerary store unavailable: {str(e)}"
+        )
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No itinerary stored for booking {booking_id}"
+        )
+    
+    headers = itinerary_headers(stored, fields, compact)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # The stored body is already encoded; only parse it when it has to be reshaped
+    content = stored.body if not (fields or compact) else shaped(json.loads(stored.body), fields, compact)
+    return FastJSONResponse(content, headers=headers, accept_encoding=accept_encoding)
+
+@app.get("/api/concierge/jobs/{job_id}")
+async def get_plan_job(
+    job_id: str,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    accept_encoding: Optional[str] = Header(default=None)
+):
+    """
+    Status of an async plan job, with the plan under `result` once completed
+    
+    `fields` and `compact` shape the plan as for plan-from-booking.
+    """
+    job = plan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found or expired"
+        )
+    headers = None if job.done else {"Retry-After": str(plan_jobs.POLL_AFTER)}
+    return FastJSONResponse(job.view(fields, compact), headers=headers, accept_encoding=accept_encoding)
+
 @app.post("/api/concierge/query")
-async def answer_query(request: dict):
+async def answer_query(
+    request: dict,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    accept_encoding: Optional[str] = Header(default=None)
+):
     """
     Answer specific travel questions without generating full itinerary
     
@@ -130,8 +330,10 @@ async def answer_query(request: dict):
     """
     try:
         booking_id = request.get('booking_id')
+        traveler_id = request.get('traveler_id')
         query = request.get('query')
         preferences = request.get('preferences', {})
+        session_id = request.get('session_id')
         
         if not query:
             raise HTTPException(
@@ -139,31 +341,23 @@ async def answer_query(request: dict):
                 detail="query is required"
             )
         
-        # Fetch booking context if booking_id provided
-        booking_context = None
-        if booking_id:
-            booking_data = Database.get_booking_details(booking_id)
-            if booking_data:
-                booking_context = BookingContext(
-                    booking_id=booking_data['booking_id'],
-                    property_name=booking_data['property_name'],
-                    city=booking_data['city'],
-                    state=booking_data['state'],
-                    country=booking_data['country'],
-                    zipcode=booking_data.get('zipcode'),  # Optional field
-                    start_date=booking_data['start_date'],
-                    end_date=booking_data['end_date'],
-                    guests=booking_data['guests']
-                )
-        
-        # Answer the specific query
-        answer = agent.answer_query(query, booking_context, preferences)
+        async with query_pool.admit():
+            booking_data, merged = await _query_context(booking_id, traveler_id, preferences)
+            answer, session_id = await asyncio.to_thread(
+                _answer_query, booking_id, booking_data, query, merged.dict(), session_id
+            )
         
-        return {
-            "success": True,
-            "answer": answer
-        }
+        return FastJSONResponse(
+            shaped({"success": True, "answer": answer, "session_id": session_id}, fields, compact),
+            accept_encoding=accept_encoding
+        )
     
+    except (AdmissionRejected, UpstreamBusy) as e:
+        raise too_many_requests(e)
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
+    except InvalidPreferences as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -172,6 +366,178 @@ async def answer_query(request: dict):
             detail=f"Error answering query: {str(e)}"
         )
 
+async def _query_context(booking_id, traveler_id, preferences: dict):
+    """Booking (if any) and merged preferences for a query; a booking service outage only drops the booking"""
+    if booking_id:
+        try:
+            return await load_booking_and_preferences(booking_id, traveler_id, preferences)
+        except UpstreamUnavailable as e:
+            # Answer without trip context; the next question in the session tries again
+            logger.warning("Answering without booking context: %s", e, extra={"booking_id": booking_id})
+    # Without a booking the caller's traveler_id cannot be checked, so no stored profile is used
+    return None, merge_preferences({}, preferences)
+
+def _answer_query(booking_id, booking_data: Optional[dict], query: str, preferences: dict, session_id: str = None):
+    """Answer the query within its conversation session (blocking, runs in a worker thread)"""
+    session = session_store.get_or_create(booking_id, session_id)
+    
+    # Set the booking context once per session if booking_id provided
+    if booking_data and session.booking_context is None:
+        session.booking_context = build_booking_context(booking_data)
+    
+    # Answer the specific query
+    answer = agent.answer_query(query, session.booking_context, preferences, session=session)
+    return answer, session.session_id
+
+def require_internal_key(x_internal_api_key: Optional[str] = Header(default=None)):
+    """Service-to-service endpoints require INTERNAL_API_KEY in X-Internal-API-Key"""
+    if not x_internal_api_key or not hmac.compare_digest(x_internal_api_key, config.INTERNAL_API_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal API key")
+
+@app.post("/internal/booking-events", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_internal_key)])
+async def booking_event(request: dict):
+    """
+    Booking created or rescheduled (called by the booking service)
+    
+    Queues a low-priority prefetch of the booking's details, weather and
+    search results, so the traveler's first concierge request finds them warm.
+    """
+    booking_id = request.get('booking_id')
+    event = request.get('event')
+    if not booking_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="booking_id is required")
+    if event not in BOOKING_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"event must be one of: {', '.join(BOOKING_EVENTS)}"
+        )
+    
+    queued = prefetcher.enqueue(str(booking_id), request.get('preferences'))
+    return {"success": True, "booking_id": booking_id, "queued": queued}
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Admin endpoints exist only when ADMIN_API_KEY is set and require it in X-Admin-Key"""
+    if not config.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, config.ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
+
+def report_response(report, filename: str, download: bool, media_type: str = "application/json"):
+    """Profiling report as JSON, or as a file attachment when `download` is set"""
+    if not download:
+        return report if media_type == "application/json" else PlainTextResponse(report)
+    body = json.dumps(report, indent=2) if media_type == "application/json" else report
+    return PlainTextResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/admin/stats", dependencies=[Depends(require_admin)])
+async def service_stats():
+    """Dependency probe details and internal pool, cache, routing and pipeline counters"""
+    return {
+        "dependencies": health_monitor.snapshot(),
+        "health_monitor": health_monitor.stats(),
+        "admission": {
+            "plan": plan_pool.stats(),
+            "query": query_pool.stats(),
+            "plan_jobs": plan_jobs.stats(),
+            "tavily": tavily_limiter.stats(),
+            "openai": openai_limiter.stats()
+        },
+        "search": agent.searcher.stats(),
+        "search_planner": agent.planner.stats(),
+        "sessions": session_store.stats(),
+        "local_intents": agent.intent_router.stats(),
+        "models": agent.models.stats(),
+        "prompts": {prompt.name: prompt.stats() for prompt in PROMPTS},
+        "result_processing": result_processor.stats(),
+        "incremental": agent.incremental.stats(),
+        "prefetch": prefetcher.stats(),
+        "upstream": {
+            "booking": booking_policy.stats(),
+            "traveler": traveler_policy.stats()
+        },
+        "itinerary_store": itinerary_store.stats(),
+        "caches": {
+            "itinerary": agent.itinerary_cache.stats(),
+            "weather": agent.weather_cache.stats(),
+            "booking": booking_cache.stats(),
+            "traveler_profile": profile_cache.stats(),
+            "search": agent.planner.cache.stats(),
+            "prompt": agent.prompt_cache.stats()
+        },
+        "refresh": refresh_scheduler.stats(),
+        "logging": logging_stats(),
+        "tracing": tracer.stats(),
+        "profiling": profiler.stats()
+    }
+
+@app.post("/admin/profile/cpu", dependencies=[Depends(require_admin)])
+async def start_cpu_profile(request: dict):
+    """
+    Start a sampling CPU profile
+    
+    Runs for `seconds`, or until the next `requests` requests complete
+    (default: PROFILE_DEFAULT_SECONDS). One profile runs at a time.
+    """
+    try:
+        profile = profiler.start_cpu(seconds=request.get('seconds'), requests=request.get('requests'))
+    except ProfileBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return {"success": True, "profile_id": profile.profile_id, "seconds": profile.seconds, "requests": profile.requests}
+
+@app.post("/admin/profile/cpu/stop", dependencies=[Depends(require_admin)])
+async def stop_cpu_profile():
+    """Stop the running CPU profile early"""
+    profile = profiler.stop_cpu()
+    return {"success": True, "profile_id": profile.profile_id if profile else None}
+
+@app.get("/admin/profile/cpu/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_cpu_profile(profile_id: str, format: str = "json", limit: int = 30, download: bool = False):
+    """CPU profile report by endpoint/stage and function, or folded stacks with format=collapsed"""
+    try:
+        profile = profiler.cpu_profile(profile_id)
+    except ProfileNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile {profile_id} not found")
+    if format == "collapsed":
+        return report_response(profile.collapsed(), f"{profile_id}.folded", download, "text/plain")
+    return report_response(profile.report(limit), f"{profile_id}.json", download)
+
+@app.post("/admin/profile/memory/snapshot", dependencies=[Depends(require_admin)])
+async def take_memory_snapshot():
+    """Take a tracemalloc snapshot (tracemalloc starts on the first call)"""
+    return {"success": True, **(await asyncio.to_thread(profiler.take_snapshot))}
+
+@app.get("/admin/profile/memory", dependencies=[Depends(require_admin)])
+async def list_memory_snapshots():
+    return {"success": True, "snapshots": profiler.list_snapshots()}
+
+@app.get("/admin/profile/memory/diff", dependencies=[Depends(require_admin)])
+async def diff_memory_snapshots(base: str, target: str, limit: int = 25, download: bool = False):
+    """Allocation growth from snapshot `base` to snapshot `target`"""
+    try:
+        report = await asyncio.to_thread(profiler.diff_report, base, target, limit)
+    except ProfileNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Snapshot {e} not found")
+    return report_response(report, f"{base}-{target}.json", download)
+
+@app.get("/admin/profile/memory/{snapshot_id}", dependencies=[Depends(require_admin)])
+async def get_memory_snapshot(snapshot_id: str, limit: int = 25, download: bool = False):
+    """Top allocation sites and totals per service module for one snapshot"""
+    try:
+        report = await asyncio.to_thread(profiler.snapshot_report, snapshot_id, limit)
+    except ProfileNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Snapshot {snapshot_id} not found")
+    return report_response(report, f"{snapshot_id}.json", download)
+
+@app.delete("/admin/profile/memory", dependencies=[Depends(require_admin)])
+async def stop_memory_profiling():
+    """Stop tracemalloc and drop stored snapshots"""
+    profiler.stop_memory()
+    return {"success": True}
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -0,0 +1,55 @@
+"""
+Lightweight in-process metrics for AI Concierge Agent
+"""
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class RollingLatency:
+    """
+    Latency and error-rate statistics over the most recent `window` calls
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self.count += 1
+            if error:
+                self.errors += 1
+            else:
+                self._samples.append(seconds)
+            self._outcomes.append(error)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile (0-100) of recent successful calls, or None without samples"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def error_rate(self) -> float:
+        """Fraction of recent calls that failed"""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def stats(self) -> Dict:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
@@ -0,0 +1,188 @@
+"""
+Model routing for AI Concierge Agent
+Maps each LLM call site to a configured model and token limit, with latency-aware fallback
+"""
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from langchain_openai import ChatOpenAI
+
+from admission import UpstreamBusy, openai_limiter
+from config import config
+from logs import get_logger
+from metrics import RollingLatency
+from tracing import tracer
+
+logger = get_logger("model_router")
+
+# LLM call sites
+ITINERARY = "itinerary"
+QUERY = "query"
+
+
+class ModelTier(NamedTuple):
+    """A model and the token limit to use it with"""
+    model: str
+    max_tokens: int
+
+
+class ModelRoute(NamedTuple):
+    """Tiers for one call site, primary first, and the latency budget of that call site"""
+    tiers: List[ModelTier]
+    latency_budget: float
+
+
+def _default_client_factory(tier: ModelTier, timeout: float):
+    return ChatOpenAI(
+        model=tier.model,
+        temperature=config.MODEL_TEMPERATURE,
+        max_tokens=tier.max_tokens,
+        timeout=timeout,
+        max_retries=1,
+        api_key=config.OPENAI_API_KEY
+    )
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Prompt/completion token counts reported with an LLM response, when available"""
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return {
+        key: usage[key]
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+        if isinstance(usage.get(key), int)
+    }
+
+
+class ModelRouter:
+    """
+    Routes LLM calls per call site and fails over between model tiers
+
+    Rolling p95 latency and error rate are tracked per call site and model,
+    since call sites differ in prompt and output size. A model whose p95 at a
+    call site exceeds that call site's latency budget, or whose error rate exceeds
+    MODEL_MAX_ERROR_RATE, is demoted behind the next tier; every
+    `probe_every`-th call still tries it first so it can recover.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, ModelRoute],
+        client_factory: Callable = _default_client_factory,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        probe_every: int = 10
+    ):
+        self.routes = routes
+        self.client_factory = client_factory
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.probe_every = probe_every
+        self.latency: Dict[Tuple[str, str], RollingLatency] = {}
+        self.failovers = 0
+        self._clients: Dict[tuple, object] = {}
+        self._calls = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _stats_for(self, call_site: str, model: str) -> RollingLatency:
+        key = (call_site, model)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = RollingLatency()
+            return self.latency[key]
+
+    def _client(self, tier: ModelTier, timeout: float):
+        key = (tier, timeout)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self.client_factory(tier, timeout)
+                self._clients[key] = client
+            return client
+
+    def is_healthy(self, call_site: str, model: str, latency_budget: float) -> bool:
+        """False when the model's recent latency or error rate at this call site is out of budget"""
+        stats = self.latency.get((call_site, model))
+        if stats is None or stats.count < self.min_samples:
+            return True
+        if stats.error_rate() > self.max_error_rate:
+            return False
+        p95 = stats.percentile(95)
+        return p95 is None or p95 <= latency_budget
+
+    def tiers_for(self, call_site: str) -> List[ModelTier]:
+        """Tiers in the order they should be tried for this call"""
+        route = self.routes[call_site]
+        if len(route.tiers) < 2 or next(self._calls) % self.probe_every == 0:
+            return list(route.tiers)
+        healthy = [t for t in route.tiers if self.is_healthy(call_site, t.model, route.latency_budget)]
+        degraded = [t for t in route.tiers if t not in healthy]
+        return healthy + degraded
+
+    def invoke(self, call_site: str, messages):
+        """Invoke the routed model, failing over to the next tier on error"""
+        route = self.routes[call_site]
+        timeout = route.latency_budget * 2
+        tiers = self.tiers_for(call_site)
+
+        last_error: Optional[Exception] = None
+        for index, tier in enumerate(tiers):
+            stats = self._stats_for(call_site, tier.model)
+            started = time.perf_counter()
+            with tracer.span("llm.invoke", call_site=call_site, model=tier.model, attempt=index + 1) as span:
+                try:
+                    with openai_limiter.slot():
+                        response = self._client(tier, timeout).invoke(messages)
+                except UpstreamBusy:
+                    raise  # local capacity, not a model failure; another tier would wait on the same limiter
+                except Exception as e:
+                    stats.record(time.perf_counter() - started, error=True)
+                    span.set("error", str(e))
+                    last_error = e
+                    if index + 1 < len(tiers):
+                        logger.warning("Model %s failed for %s, falling back: %s", tier.model, call_site, e)
+                    continue
+                stats.record(time.perf_counter() - started)
+                span.update(**_token_usage(response))
+                # One failover per call served by a tier other than the primary, whether demoted or after errors
+                if tier != route.tiers[0]:
+                    self.failovers += 1
+                return response
+        raise last_error
+
+    def stats(self) -> Dict:
+        return {
+            "routes": {
+                site: {
+                    "tiers": [t.model for t in route.tiers],
+                    "max_tokens": [t.max_tokens for t in route.tiers],
+                    "latency_budget_s": route.latency_budget,
+                }
+                for site, route in self.routes.items()
+            },
+            "failovers": self.failovers,
+            "models": {
+                f"{site}:{model}": stats.stats() for (site, model), stats in self.latency.items()
+            },
+        }
+
+
+def _route(model: str, max_tokens: int, latency_budget: float) -> ModelRoute:
+    tiers = [ModelTier(model, max_tokens)]
+    fallback = config.MODEL_FALLBACK
+    if fallback and fallback != model:
+        tiers.append(ModelTier(fallback, max_tokens))
+    return ModelRoute(tiers, latency_budget)
+
+
+def build_model_router() -> ModelRouter:
+    """Create the ModelRouter from configuration"""
+    return ModelRouter(
+        {
+            ITINERARY: _route(config.ITINERARY_MODEL, config.ITINERARY_MAX_TOKENS, config.ITINERARY_LATENCY_BUDGET),
+            QUERY: _route(config.QUERY_MODEL, config.QUERY_MAX_TOKENS, config.QUERY_LATENCY_BUDGET),
+        },
+        max_error_rate=config.MODEL_MAX_ERROR_RATE,
+        min_samples=config.MODEL_MIN_SAMPLES
+    )
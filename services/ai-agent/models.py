@@ -36,6 +36,7 @@ class TravelerPreferences(BaseModel):
     wheelchair_accessible: bool = Field(default=False, description="Requires wheelchair accessibility")
     mobility_needs: Optional[str] = Field(default=None, description="Specific mobility requirements")
     avoid_long_hikes: bool = Field(default=False, description="Avoid activities requiring long walks/hikes")
+    languages: List[str] = Field(default=[], description="Languages the traveler speaks")
     
 class BookingContext(BaseModel):
     """Booking context information"""
@@ -48,6 +49,11 @@ class BookingContext(BaseModel):
     start_date: date = Field(..., description="Check-in date")
     end_date: date = Field(..., description="Check-out date")
     guests: int = Field(..., description="Number of guests")
+    
+    @property
+    def location(self) -> str:
+        """Full location string built from the structured fields"""
+        return ", ".join(part for part in (self.city, self.state, self.country) if part)
 
 class AgentRequest(BaseModel):
     """Request to AI Concierge Agent"""
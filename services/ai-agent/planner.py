@@ -0,0 +1,336 @@
+"""
+Search planning for AI Concierge Agent
+Derives the search intents for a booking, deduplicates them and issues the fewest Tavily searches
+that cover attraction, restaurant and follow-up query needs
+"""
+import re
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from admission import UpstreamBusy
+from cache import TTLCache
+from config import config
+from logs import get_logger
+from enrichment import enricher, CUISINE_KEYWORDS, DIETARY_KEYWORDS
+from refresh import refresh_scheduler
+from search import AdaptiveSearch
+
+logger = get_logger("planner")
+
+ATTRACTION = "attraction"
+RESTAURANT = "restaurant"
+QUALIFIER = "qualifier"
+
+# Interests that are really a request for restaurants, not an attraction search
+FOOD_INTERESTS = {"food", "restaurant", "dining", "eating", "foodie", "cuisine", "eat"}
+
+# Words that carry no intent of their own in a follow-up question
+QUERY_STOPWORDS = {
+    "a", "an", "the", "any", "some", "best", "good", "great", "top", "nice", "find", "show", "me",
+    "us", "we", "i", "recommend", "recommendation", "suggest", "suggestion", "what", "where", "which",
+    "are", "is", "there", "in", "near", "nearby", "around", "to", "for", "of", "and", "or", "with",
+    "place", "spot", "option", "please", "can", "you", "could", "do", "things", "thing", "local",
+    "restaurant", "food", "eat", "dining", "attraction", "activity", "see", "visit", "area",
+}
+
+_WORD = re.compile(r"[a-z][a-z'-]*")
+
+# Title words that mark a result as a restaurant; whole words only ("Great", "Theater" are not food)
+_FOOD_TITLE = re.compile(r"\b(?:restaurants?|dining|eat(?:s|ery|eries)?)\b")
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase, collapse whitespace and strip simple plurals ("museums" -> "museum")"""
+    term = " ".join(term.lower().split())
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 4 and term.endswith("es") and term[:-2].endswith(("s", "x", "ch", "sh")):
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+_CUISINES = {normalize_term(c) for c in CUISINE_KEYWORDS}
+_DIETS = {normalize_term(d): label for d, label in DIETARY_KEYWORDS.items()}
+
+
+class SearchIntent(NamedTuple):
+    """One thing the traveler wants searched: (kind, normalized topic)"""
+    kind: str
+    topic: str
+
+
+class PlannedResults(NamedTuple):
+    """Search results fanned out to the attraction and restaurant consumers"""
+    intents: FrozenSet[SearchIntent]
+    attractions: List[Dict]
+    restaurants: List[Dict]
+    searches: int
+
+
+class SearchPlanner:
+    """
+    Plans the Tavily searches for a booking session
+
+    All intents for a booking (attractions per interest, cuisines, dietary
+    needs, accessibility qualifiers) are folded into one combined query and
+    the results are split into attraction and restaurant buckets. A targeted
+    search is only issued for a bucket the combined query left short. Plans
+    are cached per destination and qualifier set (family-friendly,
+    wheelchair accessible), so follow-up questions about the same trip can be
+    answered from the same results and an unqualified search never serves a
+    qualified booking.
+    """
+
+    COMBINED_MAX_RESULTS = 20  # Tavily's per-request maximum
+    TARGETED_MAX_RESULTS = 10
+    MIN_BUCKET_RESULTS = 3
+
+    def __init__(self, searcher: AdaptiveSearch, cache: TTLCache):
+        self.searcher = searcher
+        self.cache = cache
+        self.plans = 0
+        self.upstream_searches = 0
+
+    def derive_intents(self, preferences) -> FrozenSet[SearchIntent]:
+        """Deduplicated set of intents for a traveler's preferences"""
+        intents = set()
+        for interest in preferences.interests:
+            topic = normalize_term(interest)
+            if not topic:
+                continue
+            if topic in _CUISINES:
+                intents.add(SearchIntent(RESTAURANT, topic))
+            elif topic in FOOD_INTERESTS:
+                intents.add(SearchIntent(RESTAURANT, ""))
+            else:
+                intents.add(SearchIntent(ATTRACTION, topic))
+
+        for restriction in preferences.dietary_restrictions:
+            topic = normalize_term(restriction)
+            if topic:
+                intents.add(SearchIntent(RESTAURANT, _DIETS.get(topic, topic)))
+
+        if not any(i.kind == ATTRACTION for i in intents):
+            intents.add(SearchIntent(ATTRACTION, ""))
+        if not any(i.kind == RESTAURANT for i in intents):
+            intents.add(SearchIntent(RESTAURANT, ""))
+
+        return frozenset(intents) | self.qualifiers(preferences)
+
+    @staticmethod
+    def qualifiers(preferences) -> FrozenSet[SearchIntent]:
+        """Qualifier intents, which change every result rather than adding a topic"""
+        qualifiers = set()
+        if preferences.has_children:
+            qualifiers.add(SearchIntent(QUALIFIER, "family-friendly"))
+        if preferences.wheelchair_accessible:
+            qualifiers.add(SearchIntent(QUALIFIER, "wheelchair accessible"))
+        return frozenset(qualifiers)
+
+    @staticmethod
+    def _cache_key(location_key: str, intents: FrozenSet[SearchIntent]) -> tuple:
+        return (location_key, frozenset(i for i in intents if i.kind == QUALIFIER))
+
+    def plan(self, location_key: str, location: str, preferences) -> PlannedResults:
+        """Return attraction and restaurant results for a booking, searching only what is not cached"""
+        intents = self.derive_intents(preferences)
+        key = self._cache_key(location_key, intents)
+        self.plans += 1
+
+        cached: Optional[PlannedResults] = self.cache.get(key)
+        if cached is not None and intents <= cached.intents:
+            return cached._replace(searches=0)
+
+        # Only search for this request's intents that the cached results do not cover yet
+        search_intents = intents
+        if cached is not None:
+            search_intents = self._delta(intents, cached.intents)
+        attractions, restaurants, searches = self._search(search_intents, location)
+
+        planned = PlannedResults(intents, attractions, restaurants, searches)
+        if attractions or restaurants:
+            if cached is not None:
+                # Keep the union so earlier sessions for this destination stay covered
+                planned = PlannedResults(
+                    intents | cached.intents,
+                    self._merge(attractions, cached.attractions),
+                    self._merge(restaurants, cached.restaurants),
+                    searches
+                )
+            self.cache.set(key, planned, loader=self._reloader(planned.intents, location))
+        elif cached is not None:
+            # The delta search failed or found nothing: serve the results already on hand, and leave
+            # the cache entry as it was so the new intents are searched again on the next request
+            planned = PlannedResults(intents, cached.attractions, cached.restaurants, searches)
+        return planned
+
+    def _search(self, intents: FrozenSet[SearchIntent], location: str) -> Tuple[List[Dict], List[Dict], int]:
+        """Search for the given intents: one combined query, topped up per bucket when thin"""
+        kinds = {i.kind for i in intents}
+        searches = 0
+        attractions: List[Dict] = []
+        restaurants: List[Dict] = []
+        if ATTRACTION in kinds and RESTAURANT in kinds:
+            searches += 1
+            try:
+                combined = self.searcher.search(
+                    self._combined_query(intents, location),
+                    max_results=self.COMBINED_MAX_RESULTS,
+                    location=location
+                )
+                attractions, restaurants = self._split(combined)
+            except UpstreamBusy:
+                raise
+            except Exception as e:
+                logger.warning("Tavily combined search error: %s", e)
+
+        if ATTRACTION in kinds and len(attractions) < self.MIN_BUCKET_RESULTS:
+            attractions = self._merge(attractions, self._targeted(self._attraction_query(intents, location), location))
+            searches += 1
+        if RESTAURANT in kinds and len(restaurants) < self.MIN_BUCKET_RESULTS:
+            restaurants = self._merge(restaurants, self._targeted(self._restaurant_query(intents, location), location))
+            searches += 1
+
+        self.upstream_searches += searches
+        return attractions, restaurants, searches
+
+    def _reloader(self, intents: FrozenSet[SearchIntent], location: str):
+        """Background refresh of a destination's results, covering all of its cached intents"""
+        def reload() -> Optional[PlannedResults]:
+            attractions, restaurants, searches = self._search(intents, location)
+            if not (attractions or restaurants):
+                return None
+            return PlannedResults(intents, attractions, restaurants, searches)
+        return reload
+
+    @staticmethod
+    def _delta(intents: FrozenSet[SearchIntent], covered: FrozenSet[SearchIntent]) -> FrozenSet[SearchIntent]:
+        """
+        Topics of `intents` still to search, given those already covered
+
+        Both sets share their qualifiers (they come from the same cache
+        entry), which are kept so the top-up search is qualified the same way.
+        """
+        missing = frozenset(i for i in intents - covered if i.kind in (ATTRACTION, RESTAURANT))
+        if not missing:
+            return frozenset()
+        return missing | frozenset(i for i in intents if i.kind == QUALIFIER)
+
+    def lookup(self, location_key: str, query: str, city: str = "",
+               qualifiers: FrozenSet[SearchIntent] = frozenset()) -> Optional[List[Dict]]:
+        """
+        Serve a follow-up question from the destination's planned results
+
+        Only answers when every content word of the question is a topic the plan
+        already covers; otherwise returns None and the caller searches as usual.
+        """
+        planned: Optional[PlannedResults] = self.cache.get((location_key, qualifiers))
+        if planned is None:
+            return None
+
+        city_words = set(_WORD.findall(city.lower()))
+        words = [normalize_term(w) for w in _WORD.findall(query.lower())]
+        content = [w for w in words if w not in QUERY_STOPWORDS and w not in city_words]
+
+        topics = {i.topic: i.kind for i in planned.intents if i.topic}
+        if any(w not in topics for w in content):
+            return None
+
+        wants_food = any(w in ("restaurant", "food", "eat", "dining") for w in words)
+        kinds = {topics[w] for w in content}
+        if wants_food or RESTAURANT in kinds:
+            pool = planned.restaurants
+        elif kinds == {ATTRACTION} or any(w in ("things", "thing", "attraction", "activity", "see", "visit") for w in words):
+            pool = planned.attractions
+        else:
+            return None
+
+        if content:
+            pool = [
+                r for r in pool
+                if all(w in normalize_term_text(f"{r.get('title', '')} {r.get('content', '')}") for w in content)
+            ]
+        return pool if len(pool) >= self.MIN_BUCKET_RESULTS else None
+
+    def _targeted(self, query: str, location: str) -> List[Dict]:
+        """Single-bucket search used when the combined query left a bucket short"""
+        try:
+            return self.searcher.search(query, max_results=self.TARGETED_MAX_RESULTS, location=location)
+        except UpstreamBusy:
+            raise
+        except Exception as e:
+            logger.warning("Tavily search error: %s", e)
+            return []
+
+    @staticmethod
+    def _split(results: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split combined results into attractions and restaurants"""
+        attractions, restaurants = [], []
+        for result, info in zip(results, enricher.enrich_batch(results)):
+            title = result.get('title', '').lower()
+            sightseeing = {"museum", "outdoor", "culture"} & set(info.tags)
+            if _FOOD_TITLE.search(title) or (
+                (info.cuisine or "food" in info.tags) and not sightseeing
+            ):
+                restaurants.append(result)
+            else:
+                attractions.append(result)
+        return attractions, restaurants
+
+    @staticmethod
+    def _merge(primary: List[Dict], extra: List[Dict]) -> List[Dict]:
+        """Append results from `extra` whose URL is not already present"""
+        seen = {r.get('url') for r in primary}
+        return primary + [r for r in extra if r.get('url') not in seen]
+
+    @staticmethod
+    def _topics(intents: FrozenSet[SearchIntent], kind: str) -> List[str]:
+        return sorted(i.topic for i in intents if i.kind == kind and i.topic)
+
+    def _qualifiers(self, intents: FrozenSet[SearchIntent]) -> str:
+        qualifiers = self._topics(intents, QUALIFIER)
+        return (" " + " ".join(qualifiers)) if qualifiers else ""
+
+    def _combined_query(self, intents: FrozenSet[SearchIntent], location: str) -> str:
+        attraction_topics = ", ".join(self._topics(intents, ATTRACTION)) or "popular attractions"
+        restaurant_topics = " ".join(self._topics(intents, RESTAURANT))
+        restaurants = f"{restaurant_topics} restaurants" if restaurant_topics else "restaurants"
+        return f"best {attraction_topics} things to do and {restaurants} in {location}{self._qualifiers(intents)}"
+
+    def _attraction_query(self, intents: FrozenSet[SearchIntent], location: str) -> str:
+        attraction_topics = ", ".join(self._topics(intents, ATTRACTION)) or "popular attractions"
+        return f"best {attraction_topics} things to do in {location}{self._qualifiers(intents)}"
+
+    def _restaurant_query(self, intents: FrozenSet[SearchIntent], location: str) -> str:
+        restaurant_topics = " ".join(self._topics(intents, RESTAURANT))
+        if restaurant_topics:
+            return f"best {restaurant_topics} restaurants in {location}"
+        return f"best restaurants in {location}"
+
+    def stats(self) -> Dict:
+        return {
+            "plans": self.plans,
+            "upstream_searches": self.upstream_searches,
+            "searches_per_plan": round(self.upstream_searches / self.plans, 2) if self.plans else 0.0,
+            "cache": self.cache.stats(),
+        }
+
+
+def normalize_term_text(text: str) -> str:
+    """Normalize every word of a text the same way intents are normalized"""
+    return " ".join(normalize_term(w) for w in _WORD.findall(text.lower()))
+
+
+def build_planner(searcher: AdaptiveSearch) -> SearchPlanner:
+    """Create a SearchPlanner with its destination cache from configuration"""
+    return SearchPlanner(
+        searcher,
+        TTLCache(
+            "search",
+            ttl=config.SEARCH_CACHE_TTL,
+            max_size=config.SEARCH_CACHE_SIZE,
+            soft_ttl=config.SEARCH_CACHE_SOFT_TTL,
+            refresher=refresh_scheduler
+        )
+    )
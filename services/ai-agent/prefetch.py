@@ -0,0 +1,115 @@
+"""
+Speculative prefetch for AI Concierge Agent
+Warms booking details, traveler profile, weather and search results when the booking service reports a booking event,
+so the traveler's first concierge request finds them cached
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from admission import PRIORITY_BACKGROUND, current_priority
+from agent import agent
+from config import config
+from database import Database, build_booking_context
+from logs import get_logger
+from profiles import get_profile_preferences, merge_preferences
+from tracing import tracer
+from utils import canonical_location, extract_location_city
+
+logger = get_logger("prefetch")
+
+BOOKING_EVENTS = ("booking.created", "booking.dates_changed")
+
+
+class Prefetcher:
+    """
+    Low-priority queue of bookings to warm, one job per booking
+
+    A booking already waiting is not queued twice; its latest preferences
+    are kept. When more than `max_pending` bookings wait, the oldest is
+    dropped. Workers run at background priority, so prefetch yields
+    upstream slots to interactive requests.
+    """
+
+    def __init__(self, agent, workers: int = 1, max_pending: int = 500):
+        self.agent = agent
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+
+    def enqueue(self, booking_id: str, preferences: Optional[Dict] = None) -> bool:
+        """Queue a booking for prefetch; returns False if it was already waiting"""
+        if self.workers <= 0:
+            return False
+        with self._condition:
+            queued = booking_id not in self._pending
+            if queued:
+                self.enqueued += 1
+            else:
+                self.coalesced += 1
+            self._pending[booking_id] = preferences
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._start()
+            self._condition.notify()
+        return queued
+
+    def _start(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"prefetch-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _run(self) -> None:
+        current_priority.set(PRIORITY_BACKGROUND)
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                booking_id, preferences = self._pending.popitem(last=False)
+            try:
+                with tracer.span("prefetch", booking_id=booking_id):
+                    self.prefetch(booking_id, preferences)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Prefetch failed: %s", e, extra={"booking_id": booking_id})
+
+    def prefetch(self, booking_id: str, preferences: Optional[Dict] = None) -> None:
+        """Fetch the booking and warm the caches its first plan or query will read"""
+        # Always refetch: the event may mean the cached dates are out of date
+        booking_data = Database.get_booking_details(booking_id, use_cache=False)
+        if not booking_data:
+            raise LookupError(f"booking {booking_id} not found")
+        booking = build_booking_context(booking_data)
+        location_city = extract_location_city(booking.location)
+
+        self.agent.warm_weather(booking)
+        profile = get_profile_preferences(booking_data.get('traveler_id'))
+        self.agent.planner.plan(
+            canonical_location(booking),
+            location_city,
+            merge_preferences(profile, preferences)
+        )
+        logger.info("Prefetched booking", extra={"booking_id": booking_id, "city": location_city})
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+prefetcher = Prefetcher(agent, workers=config.PREFETCH_WORKERS, max_pending=config.PREFETCH_MAX_PENDING)
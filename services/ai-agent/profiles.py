@@ -0,0 +1,116 @@
+"""
+Traveler profile preferences for AI Concierge Agent
+Fetches the traveler profile alongside the booking and merges its stored preferences
+with the per-request overrides
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from cache import TTLCache
+from config import config
+from database import Database
+from logs import get_logger
+from models import TravelerPreferences
+
+logger = get_logger("profiles")
+
+# Preferences a traveler profile can store; merged with the request's values
+PROFILE_FIELDS = ("interests", "dietary_restrictions", "languages")
+
+
+
+class InvalidPreferences(ValueError):
+    """Request preferences of the wrong shape (answered with 400)"""
+
+
+profile_cache = TTLCache(
+    "traveler_profile",
+    ttl=config.TRAVELER_PROFILE_TTL,
+    max_size=config.TRAVELER_PROFILE_CACHE_SIZE
+)
+
+
+def get_profile_preferences(traveler_id: Optional[str]) -> Dict:
+    """Stored preferences of a traveler, cached per traveler; empty when unknown or unavailable"""
+    if not traveler_id:
+        return {}
+    cached = profile_cache.get(str(traveler_id))
+    if cached is not None:
+        return cached
+    profile = Database.get_user_preferences(str(traveler_id))
+    if profile is None:
+        return {}  # not cached, so the next request tries again
+    stored = {field: list(profile.get(field) or []) for field in PROFILE_FIELDS}
+    profile_cache.set(str(traveler_id), stored)
+    return stored
+
+
+def _string_list(field: str, value) -> List[str]:
+    """A request's list field as a list of strings; a single string counts as a one-item list"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+        return list(value)
+    raise InvalidPreferences(f"preferences.{field} must be a list of strings")
+
+
+def merge_preferences(profile: Dict, overrides: Optional[Dict]) -> TravelerPreferences:
+    """
+    Request preferences on top of the profile's
+
+    Single-valued fields come from the request. List fields are the union of
+    both, request values first, so a request adding an interest does not
+    drop a stored dietary restriction. Raises InvalidPreferences when the
+    request's values have the wrong types.
+    """
+    if overrides is not None and not isinstance(overrides, dict):
+        raise InvalidPreferences("preferences must be an object")
+    merged = dict(overrides or {})
+    for field in PROFILE_FIELDS:
+        values = _string_list(field, merged.get(field))
+        seen = {v.strip().lower() for v in values}
+        for value in profile.get(field, ()):
+            if value.strip().lower() not in seen:
+                seen.add(value.strip().lower())
+                values.append(value)
+        if values:
+            merged[field] = values
+    try:
+        return TravelerPreferences(**merged)
+    except ValueError as e:  # pydantic's ValidationError
+        raise InvalidPreferences(f"invalid preferences: {e}") from e
+
+
+async def load_booking_and_preferences(
+    booking_id: str,
+    traveler_id: Optional[str],
+    overrides: Optional[Dict]
+) -> Tuple[Optional[Dict], TravelerPreferences]:
+    """
+    Booking details and merged preferences for a request
+
+    With the traveler ID known up front both lookups run concurrently; else
+    the traveler is resolved from the booking record (often cached) and their
+    profile fetched then. Only the booking's own traveler's profile is used:
+    one fetched for anyone else, or for a booking that was not found, is discarded.
+    """
+    if traveler_id:
+        booking_data, profile = await asyncio.gather(
+            asyncio.to_thread(Database.get_booking_details, booking_id),
+            asyncio.to_thread(get_profile_preferences, traveler_id)
+        )
+    else:
+        booking_data = await asyncio.to_thread(Database.get_booking_details, booking_id)
+        profile = None
+
+    owner = booking_data.get('traveler_id') if booking_data else None
+    if not owner:
+        profile = None
+    elif str(owner) != str(traveler_id):
+        if traveler_id:
+            logger.warning("Traveler does not own booking; using the booking's traveler profile",
+                           extra={"booking_id": booking_id})
+        profile = await asyncio.to_thread(get_profile_preferences, owner)
+    return booking_data, merge_preferences(profile or {}, overrides)
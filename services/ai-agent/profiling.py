@@ -0,0 +1,339 @@
+"""
+On-demand profiling for AI Concierge Agent
+Sampling stack profiler tagged by endpoint and pipeline stage, and tracemalloc snapshots with diffs
+"""
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from logs import get_logger
+from tracing import tracer
+
+logger = get_logger("profiling")
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_PATH = " /admin/"
+
+
+class ProfileBusy(Exception):
+    """Raised when a CPU profile is requested while another one is running"""
+
+
+class ProfileNotFound(Exception):
+    """Raised for an unknown profile or snapshot ID"""
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class CpuProfile:
+    """
+    Stack samples of request-serving threads over a time window or a number of requests
+
+    Only threads inside a span (a request or an agent pipeline stage) are
+    sampled, so idle pool and background threads do not dilute the profile.
+    Samples are wall-clock: a stage waiting on Tavily or OpenAI shows up
+    under the call it waits in. On the event loop thread a sample is tagged
+    with the span of the task running at that moment; while the loop waits
+    for I/O no task is running and nothing is sampled, so awaited time only
+    shows up for stages that block a worker thread.
+    """
+
+    def __init__(self, profile_id: str, seconds: Optional[float], requests: Optional[int], interval: float):
+        self.profile_id = profile_id
+        self.seconds = seconds
+        self.requests = requests
+        self.interval = interval
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.requests_seen = 0
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.cumulative_counts: Counter = Counter()
+        self.tag_counts: Counter = Counter()
+        self.stacks: Counter = Counter()
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    def add_sample(self, tag: Tuple[str, str], frame) -> None:
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        self.samples += 1
+        self.tag_counts[tag] += 1
+        self.self_counts[labels[-1]] += 1
+        self.cumulative_counts.update(set(labels))
+        self.stacks[";".join((tag[0], tag[1], *labels))] += 1
+
+    def report(self, limit: int = 30) -> Dict:
+        def share(count: int) -> float:
+            return round(100.0 * count / self.samples, 2) if self.samples else 0.0
+
+        return {
+            "profile_id": self.profile_id,
+            "running": self.running,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": self.seconds,
+            "requests": self.requests,
+            "requests_seen": self.requests_seen,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "by_stage": [
+                {"endpoint": endpoint, "stage": stage, "samples": count, "percent": share(count)}
+                for (endpoint, stage), count in self.tag_counts.most_common(limit)
+            ],
+            "top_self": [
+                {"function": label, "samples": count, "percent": share(count)}
+                for label, count in self.self_counts.most_common(limit)
+            ],
+            "top_cumulative": [
+                {"function": label, "samples": count, "percent": share(count)}
+                for label, count in self.cumulative_counts.most_common(limit)
+            ],
+        }
+
+    def collapsed(self) -> str:
+        """Folded stacks (endpoint;stage;frames... count), the input format of flamegraph tools"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+class Profiler:
+    """
+    Runs one sampling CPU profile at a time and keeps tracemalloc snapshots
+
+    While a profile runs, the tracer's stage hook records which endpoint and
+    span each thread, and on an event loop thread each asyncio task, is in,
+    and a sampler thread walks those threads' stacks every `interval`
+    seconds. Finished profiles and snapshots are kept in
+    memory (the most recent `keep` of each) for download.
+    """
+
+    def __init__(self, interval: float, keep: int, memory_frames: int):
+        self.interval = interval
+        self.keep = keep
+        self.memory_frames = memory_frames
+        self.profiles: "OrderedDict[str, CpuProfile]" = OrderedDict()
+        self.snapshots: "OrderedDict[str, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+        self._active: Optional[CpuProfile] = None
+        # Span stacks by (thread ID, ID of the asyncio task or 0 outside one)
+        self._tags: Dict[Tuple[int, int], List[Tuple[str, str]]] = {}
+        self._thread_loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # CPU profiling
+
+    def start_cpu(self, seconds: Optional[float] = None, requests: Optional[int] = None) -> CpuProfile:
+        """Start sampling for `seconds`, or until `requests` requests complete"""
+        with self._lock:
+            if self._active is not None:
+                raise ProfileBusy(f"profile {self._active.profile_id} is still running")
+            if not seconds and not requests:
+                seconds = config.PROFILE_DEFAULT_SECONDS
+            seconds = min(seconds, config.PROFILE_MAX_SECONDS) if seconds else None
+            profile = CpuProfile(f"cpu-{next(self._ids)}", seconds, requests, self.interval)
+            self._active = profile
+            self._remember(self.profiles, profile.profile_id, profile)
+            self._tags.clear()
+            self._thread_loops.clear()
+            tracer.stage_hook = self._on_stage
+
+        threading.Thread(target=self._sample, args=(profile,), name="profiler", daemon=True).start()
+        logger.info("CPU profile started", extra={"profile_id": profile.profile_id, "seconds": seconds, "requests": requests})
+        return profile
+
+    def stop_cpu(self) -> Optional[CpuProfile]:
+        """Stop the running profile early"""
+        with self._lock:
+            profile = self._active
+        if profile is not None:
+            self._finish(profile)
+        return profile
+
+    def _finish(self, profile: CpuProfile) -> None:
+        with self._lock:
+            if self._active is not profile:
+                return
+            self._active = None
+            tracer.stage_hook = None
+            self._tags.clear()
+            self._thread_loops.clear()
+            profile.finished_at = time.time()
+        logger.info("CPU profile finished", extra={"profile_id": profile.profile_id, "samples": profile.samples})
+
+    def _on_stage(self, endpoint: str, stage: str, entering: bool) -> None:
+        if ADMIN_PATH in endpoint:
+            return  # polling the profiler should neither be sampled nor count as a request
+        tid = threading.get_ident()
+        task = self._running_task()
+        if task is not None:
+            self._thread_loops[tid] = task.get_loop()
+        # Concurrent requests interleave on the event loop thread, so each task keeps its own stack
+        key = (tid, id(task) if task is not None else 0)
+        tags = self._tags.setdefault(key, [])
+        tag = (endpoint, stage)
+        if entering:
+            tags.append(tag)
+            return
+        for i in range(len(tags) - 1, -1, -1):
+            if tags[i] == tag:
+                del tags[i]
+                break
+        if not tags:
+            self._tags.pop(key, None)
+        profile = self._active
+        if profile is not None and endpoint == stage:
+            profile.requests_seen += 1
+            if profile.requests and profile.requests_seen >= profile.requests:
+                self._finish(profile)
+
+    def _sample(self, profile: CpuProfile) -> None:
+        own = threading.get_ident()
+        deadline = profile.started_at + profile.seconds if profile.seconds else None
+        while profile.running:
+            if deadline is not None and time.time() >= deadline:
+                self._finish(profile)
+                break
+            frames = sys._current_frames()
+            running: Dict[int, int] = {}
+            for tid, loop in list(self._thread_loops.items()):
+                task = asyncio.current_task(loop)
+                running[tid] = id(task) if task is not None else 0
+            for (tid, task_id), tags in list(self._tags.items()):
+                if tid == own or tid not in frames:
+                    continue
+                if running.get(tid, 0) != task_id:
+                    continue  # another task (or none, while the loop polls) holds the thread
+                try:
+                    tag = tags[-1]
+                except IndexError:  # the thread left its span since the copy
+                    continue
+                profile.add_sample(tag, frames[tid])
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _running_task() -> Optional["asyncio.Task"]:
+        try:
+            return asyncio.current_task()
+        except RuntimeError:  # no event loop running in this thread
+            return None
+
+    def cpu_profile(self, profile_id: str) -> CpuProfile:
+        profile = self.profiles.get(profile_id)
+        if profile is None:
+            raise ProfileNotFound(profile_id)
+        return profile
+
+    # Memory snapshots
+
+    def take_snapshot(self) -> Dict:
+        """Snapshot current allocations, starting tracemalloc on first use"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        snapshot_id = f"mem-{next(self._ids)}"
+        with self._lock:
+            self._remember(self.snapshots, snapshot_id, (time.time(), snapshot))
+        current, peak = tracemalloc.get_traced_memory()
+        return {"snapshot_id": snapshot_id, "traced_bytes": current, "peak_bytes": peak}
+
+    def list_snapshots(self) -> List[Dict]:
+        return [
+            {"snapshot_id": snapshot_id, "taken_at": taken_at}
+            for snapshot_id, (taken_at, _) in self.snapshots.items()
+        ]
+
+    def snapshot_report(self, snapshot_id: str, limit: int = 25) -> Dict:
+        """Top allocation sites, plus totals per service module (i.e. pipeline stage)"""
+        taken_at, snapshot = self._snapshot(snapshot_id)
+        return {
+            "snapshot_id": snapshot_id,
+            "taken_at": taken_at,
+            "total_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+            "by_module": self._by_module(snapshot.statistics("traceback")),
+            "top_sites": [
+                {"site": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ],
+        }
+
+    def diff_report(self, base_id: str, target_id: str, limit: int = 25) -> Dict:
+        """Allocation growth between two snapshots, largest first"""
+        _, base = self._snapshot(base_id)
+        _, target = self._snapshot(target_id)
+        stats = target.compare_to(base, "lineno")
+        return {
+            "base": base_id,
+            "target": target_id,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top_growth": [
+                {
+                    "site": str(stat.traceback[0]),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def stop_memory(self) -> None:
+        """Stop tracemalloc (it slows allocation) and drop stored snapshots"""
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+
+    @staticmethod
+    def _by_module(stats) -> List[Dict]:
+        # Attribute each allocation to the innermost service module on its traceback
+        totals: Counter = Counter()
+        for stat in stats:
+            module = next(
+                (os.path.basename(frame.filename) for frame in reversed(stat.traceback)
+                 if frame.filename.startswith(SERVICE_DIR)),
+                "(libraries)"
+            )
+            totals[module] += stat.size
+        return [{"module": module, "size_bytes": size} for module, size in totals.most_common()]
+
+    def _snapshot(self, snapshot_id: str):
+        entry = self.snapshots.get(snapshot_id)
+        if entry is None:
+            raise ProfileNotFound(snapshot_id)
+        return entry
+
+    def _remember(self, store: OrderedDict, key: str, value) -> None:
+        store[key] = value
+        while len(store) > self.keep:
+            store.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {
+            "cpu_running": self._active.profile_id if self._active is not None else None,
+            "cpu_profiles": len(self.profiles),
+            "memory_tracing": tracemalloc.is_tracing(),
+            "memory_snapshots": len(self.snapshots),
+        }
+
+
+profiler = Profiler(
+    interval=config.PROFILE_SAMPLE_INTERVAL,
+    keep=config.PROFILE_KEEP,
+    memory_frames=config.PROFILE_MEMORY_FRAMES
+)
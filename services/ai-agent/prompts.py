@@ -0,0 +1,129 @@
+"""
+Prompt templates for AI Concierge Agent
+Each prompt is a static system message (byte-identical on every call, so provider-side prefix
+caching applies) followed by one human message carrying the booking, preferences and search results
+"""
+import hashlib
+import string
+import time
+from typing import Dict, Iterable, List
+
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
+
+from metrics import RollingLatency
+
+
+def prompt_hash(messages: Iterable[BaseMessage]) -> str:
+    """Stable hash of a rendered prompt, for local response caching"""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(message.type.encode())
+        digest.update(b"\0")
+        digest.update(message.content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PromptTemplate:
+    """
+    Chat prompt compiled once: a fixed system message, then optional
+    conversation history, then the rendered variable context
+
+    Keeping every per-request value out of the system message means all
+    calls share the same leading tokens.
+    """
+
+    def __init__(self, name: str, instructions: str, context: str):
+        self.name = name
+        self.system = SystemMessage(content=instructions)
+        self.context = context
+        self.fields = frozenset(
+            field for _, field, _, _ in string.Formatter().parse(context) if field
+        )
+        self.prefix_hash = hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:12]
+        self.render_latency = RollingLatency()
+
+    def render(self, history: Iterable[BaseMessage] = (), **values) -> List[BaseMessage]:
+        """Messages for one call; `values` must provide every context field"""
+        started = time.perf_counter()
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"{self.name} prompt is missing {', '.join(sorted(missing))}")
+        messages = [self.system, *history, HumanMessage(content=self.context.format_map(values))]
+        self.render_latency.record(time.perf_counter() - started)
+        return messages
+
+    def stats(self) -> Dict:
+        p50 = self.render_latency.percentile(50)
+        p95 = self.render_latency.percentile(95)
+        return {
+            "renders": self.render_latency.count,
+            "prefix_hash": self.prefix_hash,
+            "prefix_chars": len(self.system.content),
+            "render_p50_us": round(p50 * 1e6, 1) if p50 is not None else None,
+            "render_p95_us": round(p95 * 1e6, 1) if p95 is not None else None,
+        }
+
+
+ITINERARY_PROMPT = PromptTemplate(
+    "itinerary",
+    instructions="""You are an expert travel concierge creating day-by-day trip itineraries.
+
+The user message gives the trip length and location, the booking details, the traveler's preferences, and the attractions and restaurants available.
+
+Create a detailed day-by-day itinerary with morning, afternoon, and evening activities.
+Include specific activity names, addresses, estimated durations, and why they match the traveler's preferences.
+IMPORTANT: If cuisine preferences (like Indian, Italian, etc.) are mentioned in interests, prioritize matching restaurants accordingly.
+Format your response as a structured JSON-like output that I can parse.""",
+    context="""Please create a {trip_length}-day itinerary for {location}.
+
+Booking Details:
+- Location: {booking_location}
+- Dates: {start_date} to {end_date}
+- Guests: {guests}
+
+Traveler Preferences:
+- Budget: {budget}
+- Interests: {interests}
+- Dietary Restrictions: {dietary_restrictions}
+- Has Children: {has_children}
+- Wheelchair Accessible: {wheelchair_accessible}
+- Avoid Long Hikes: {avoid_long_hikes}
+- Languages Spoken: {languages}
+
+Available Attractions:
+{attractions}
+
+Available Restaurants:
+{restaurants}"""
+)
+
+QUERY_PROMPT = PromptTemplate(
+    "query",
+    instructions="""You are a helpful travel concierge assistant answering a traveler's question from web search results.
+
+**CRITICAL REQUIREMENTS:**
+1. ONLY recommend places in the trip location given with the question - no other cities, states, or countries
+2. Show EXACTLY 5 recommendations (no more, no less)
+3. If a search result is not in the trip location, skip it and don't mention it
+
+Provide a helpful answer with:
+- Friendly opening line
+- EXACTLY 5 recommendations from results ONLY in the trip location
+- For each: Name, brief description (1-2 sentences), and URL link
+- Relevant details (cuisine, price range, rating, dietary options, etc.)
+- Keep it concise (max 300 words total)
+
+Format with emojis and clean bullet points.""",
+    context="""The traveler asked: "{query}"
+
+Trip Details:
+{trip_details}
+
+Search Results:
+{search_results}
+
+Please provide a helpful answer based on the search results."""
+)
+
+PROMPTS = (ITINERARY_PROMPT, QUERY_PROMPT)
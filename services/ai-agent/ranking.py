@@ -0,0 +1,159 @@
+"""
+Search result processing for AI Concierge Agent
+Canonicalizes URLs, removes near-duplicate results (SimHash over word shingles) and ranks by relevance
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from planner import QUERY_STOPWORDS, normalize_term, normalize_term_text
+from search import CONTENT_CHARS
+
+# Query parameters dropped from URLs: exact names, plus any name starting with a tracking prefix
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "ref", "ref_src", "mc_cid", "mc_eid"})
+TRACKING_PREFIXES = ("utm_",)
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+# simhash bit counters: 16 bits per bit position (texts are cut to CONTENT_CHARS, far below 65535 shingles)
+_LANE_BITS = 16
+_LANE_MASK = (1 << _LANE_BITS) - 1
+# _SPREAD[i][b]: the counters for byte `b` at digest offset `i` (big-endian, so offset 0 holds bits 56-63)
+_SPREAD = [
+    [sum(1 << (_LANE_BITS * (8 * (7 - offset) + bit)) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+    for offset in range(8)
+]
+
+
+def canonical_url(url: str) -> str:
+    """Lowercase scheme/host, drop www., tracking params, fragment and trailing slash"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the word shingles of a text"""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    if not shingles:
+        return 0
+    # Per-bit vote without a per-bit loop: each hash is spread into 64 16-bit counters
+    # packed in one integer, so summing the integers counts every bit position at once
+    s0, s1, s2, s3, s4, s5, s6, s7 = _SPREAD
+    total = 0
+    for shingle in shingles:
+        d = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+        total += s0[d[0]] + s1[d[1]] + s2[d[2]] + s3[d[3]] + s4[d[4]] + s5[d[5]] + s6[d[6]] + s7[d[7]]
+    half = len(shingles) / 2
+    fingerprint = 0
+    for bit in range(64):
+        if (total >> (_LANE_BITS * bit)) & _LANE_MASK > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResultProcessor:
+    """
+    Deduplicates and ranks Tavily results before they reach prompts and cards
+
+    Results with the same canonical URL, or whose SimHash fingerprints are
+    within `max_distance` bits, are collapsed to the first (best-scored) one.
+    Scores combine preference-term coverage, a mention of the destination
+    city and Tavily's own relevance score.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.processed = 0
+        self.duplicates_removed = 0
+
+    def process(
+        self,
+        results: List[Dict],
+        terms: Iterable[str] = (),
+        city: str = "",
+        exclude: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """Return results ranked by relevance with duplicates (and anything in `exclude`) removed"""
+        term_set = {normalize_term(t) for t in terms if t and t.lower() not in QUERY_STOPWORDS}
+        city = city.split(",")[0].strip().lower()
+
+        scored = sorted(
+            enumerate(results),
+            key=lambda indexed: (-self.score(indexed[1], term_set, city), indexed[0])
+        )
+
+        seen_urls = set()
+        fingerprints: List[int] = []
+        for result in exclude or []:
+            seen_urls.add(canonical_url(result.get('url', '')))
+            fingerprints.append(self._fingerprint(result))
+
+        kept = []
+        for _, result in scored:
+            url = canonical_url(result.get('url', ''))
+            if url and url in seen_urls:
+                continue
+            fingerprint = self._fingerprint(result)
+            if any(hamming_distance(fingerprint, f) <= self.max_distance for f in fingerprints):
+                continue
+            seen_urls.add(url)
+            fingerprints.append(fingerprint)
+            # A copy: the input dicts are shared with the search cache and sessions
+            kept.append({**result, 'simhash': fingerprint})
+
+        self.processed += len(results)
+        self.duplicates_removed += len(results) - len(kept)
+        return kept
+
+    @staticmethod
+    def _fingerprint(result: Dict) -> int:
+        """SimHash of a result; results returned by `process` already carry theirs"""
+        fingerprint = result.get('simhash')
+        if fingerprint is None:
+            fingerprint = simhash(f"{result.get('title', '')} {result.get('content', '')[:CONTENT_CHARS]}")
+        return fingerprint
+
+    @staticmethod
+    def score(result: Dict, terms: set, city: str) -> float:
+        """Relevance of a result to the preference terms and destination"""
+        text = normalize_term_text(f"{result.get('title', '')} {result.get('content', '')}")
+        score = 0.0
+        if terms:
+            words = set(text.split())
+            score += 2.0 * sum(1 for t in terms if t in words or (" " in t and t in text)) / len(terms)
+        if city and city in text:
+            score += 1.0
+        try:
+            score += float(result.get('score') or 0)
+        except (TypeError, ValueError):
+            pass
+        return score
+
+    def stats(self) -> Dict:
+        return {
+            "processed": self.processed,
+            "duplicates_removed": self.duplicates_removed,
+        }
+
+
+result_processor = ResultProcessor()
@@ -0,0 +1,87 @@
+"""
+Internal pipeline records for AI Concierge Agent
+Immutable tuples holding only the fields the pipeline needs; converted to the public pydantic
+models (or straight to JSON) once at the API boundary
+"""
+from typing import NamedTuple, Optional, Tuple
+
+from models import (
+    ActivityCard, AgentResponse, DayPlan, PackingItem, PriceTier, RestaurantCard, WeatherInfo
+)
+
+
+class WeatherRecord(NamedTuple):
+    date: str
+    temperature_high: float
+    temperature_low: float
+    condition: str
+    precipitation_chance: int
+
+
+class PackingRecord(NamedTuple):
+    item: str
+    category: str
+    reason: Optional[str] = None
+
+
+class ActivityRecord(NamedTuple):
+    title: str
+    description: str
+    address: str
+    price_tier: PriceTier
+    duration: str
+    tags: Tuple[str, ...] = ()
+    wheelchair_friendly: bool = False
+    child_friendly: bool = False
+    url: Optional[str] = None
+
+
+class RestaurantRecord(NamedTuple):
+    name: str
+    cuisine: str
+    address: str
+    price_tier: PriceTier
+    dietary_options: Tuple[str, ...] = ()
+    wheelchair_accessible: bool = False
+    url: Optional[str] = None
+
+
+class DayRecord(NamedTuple):
+    date: str
+    day_number: int
+    morning: Tuple[ActivityRecord, ...] = ()
+    afternoon: Tuple[ActivityRecord, ...] = ()
+    evening: Tuple[ActivityRecord, ...] = ()
+    restaurants: Tuple[RestaurantRecord, ...] = ()
+
+
+class PlanRecord(NamedTuple):
+    """Field-for-field counterpart of AgentResponse"""
+    success: bool
+    message: Optional[str]
+    itinerary: Tuple[DayRecord, ...] = ()
+    packing_list: Tuple[PackingRecord, ...] = ()
+    weather_forecast: Tuple[WeatherRecord, ...] = ()
+    tips: Tuple[str, ...] = ()
+
+
+def to_response(plan: PlanRecord) -> AgentResponse:
+    """Build the public AgentResponse model from a plan record"""
+    return AgentResponse(
+        success=plan.success,
+        message=plan.message,
+        itinerary=[
+            DayPlan(
+                date=day.date,
+                day_number=day.day_number,
+                morning=[ActivityCard(**a._asdict()) for a in day.morning],
+                afternoon=[ActivityCard(**a._asdict()) for a in day.afternoon],
+                evening=[ActivityCard(**a._asdict()) for a in day.evening],
+                restaurants=[RestaurantCard(**r._asdict()) for r in day.restaurants],
+            )
+            for day in plan.itinerary
+        ],
+        packing_list=[PackingItem(**p._asdict()) for p in plan.packing_list],
+        weather_forecast=[WeatherInfo(**w._asdict()) for w in plan.weather_forecast],
+        tips=list(plan.tips),
+    )
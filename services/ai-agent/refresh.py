@@ -0,0 +1,140 @@
+"""
+Background cache refresh for AI Concierge Agent
+Reloads soft-expired cache entries off the request path so hot destinations never pay a cold miss
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from admission import PRIORITY_BACKGROUND, current_priority
+from config import config
+from logs import get_logger
+
+logger = get_logger("refresh")
+
+
+class RefreshScheduler:
+    """
+    Prioritized, rate-limited refresh queue shared by the agent's caches
+
+    A stale cache hit schedules one refresh per (cache, key); further stale
+    hits while it is pending only raise its priority. Entries accessed more
+    often are refreshed first, entries with fewer than `min_hits` accesses
+    are left to expire, and at most `rate_per_minute` refreshes start per
+    minute. When more than `max_pending` refreshes wait, the least accessed
+    one is dropped.
+    """
+
+    def __init__(self, rate_per_minute: float, workers: int = 2, max_pending: int = 256, min_hits: int = 2):
+        self.rate_per_minute = rate_per_minute
+        self.workers = workers
+        self.max_pending = max_pending
+        self.min_hits = min_hits
+        self._heap: List[Tuple[int, int, Tuple[str, Hashable]]] = []
+        self._pending: Dict[Tuple[str, Hashable], Tuple[Any, Callable[[], Any], int]] = {}
+        self._running = set()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._tokens = float(max(1, rate_per_minute))
+        self._refilled_at = time.monotonic()
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def schedule(self, cache, key: Hashable, loader: Callable[[], Any], hits: int) -> None:
+        """Queue a background reload of `key` in `cache`, prioritized by its access count"""
+        if self.rate_per_minute <= 0 or hits < self.min_hits:
+            return
+        task = (cache.name, key)
+        with self._condition:
+            if task in self._running:
+                return
+            if task not in self._pending:
+                self.scheduled += 1
+            self._pending[task] = (cache, loader, hits)
+            heapq.heappush(self._heap, (-hits, next(self._counter), task))
+            while len(self._pending) > self.max_pending:
+                self._drop_least_accessed()
+            self._start()
+            self._condition.notify()
+
+    def _drop_least_accessed(self) -> None:
+        task = min(self._pending, key=lambda t: self._pending[t][2])
+        del self._pending[task]
+        self.dropped += 1
+
+    def _start(self) -> None:
+        # Worker threads start with the first refresh so idle processes (and imports) spawn none
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"cache-refresh-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _take_token(self) -> float:
+        """Consume one unit of refresh budget; returns seconds to wait when none is left"""
+        now = time.monotonic()
+        capacity = max(1.0, self.rate_per_minute)
+        self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * self.rate_per_minute / 60)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) * 60 / self.rate_per_minute
+
+    def _next(self) -> Optional[Tuple[Tuple[str, Hashable], Any, Callable[[], Any]]]:
+        with self._condition:
+            while True:
+                while self._heap and self._heap[0][2] not in self._pending:
+                    heapq.heappop(self._heap)  # superseded by a higher-priority push, or dropped
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                wait = self._take_token()
+                if wait:
+                    self._condition.wait(wait)
+                    continue
+                _, _, task = heapq.heappop(self._heap)
+                cache, loader, _ = self._pending.pop(task)
+                self._running.add(task)
+                return task, cache, loader
+
+    def _run(self) -> None:
+        # Background reloads yield upstream slots to live requests
+        current_priority.set(PRIORITY_BACKGROUND)
+        while True:
+            task, cache, loader = self._next()
+            try:
+                value = loader()
+                if value is not None:
+                    cache.refreshed(task[1], value)
+                self.completed += 1
+            except Exception as e:
+                # The stale value keeps being served until the hard TTL; a later hit retries
+                self.failed += 1
+                logger.warning("Cache refresh failed for %s: %s", task[0], e)
+            finally:
+                with self._condition:
+                    self._running.discard(task)
+
+    def stats(self) -> Dict:
+        return {
+            "rate_per_minute": self.rate_per_minute,
+            "pending": len(self._pending),
+            "running": len(self._running),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+refresh_scheduler = RefreshScheduler(
+    rate_per_minute=config.REFRESH_RATE_PER_MINUTE,
+    workers=config.REFRESH_WORKERS,
+    max_pending=config.REFRESH_MAX_PENDING,
+    min_hits=config.REFRESH_MIN_HITS
+)
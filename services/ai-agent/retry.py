@@ -0,0 +1,158 @@
+"""
+Retries and hedged reads for AI Concierge Agent service calls
+Exponential backoff with full jitter inside a total time budget, plus an optional second request
+once the first has been slower than the recent latency percentile
+"""
+import contextvars
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Optional
+
+import requests
+
+from logs import get_logger
+from metrics import RollingLatency
+from tracing import tracer
+
+logger = get_logger("retry")
+
+# Statuses worth retrying: overload, gateway and temporary unavailability
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when a service gave no usable answer within the retry budget (not a not-found)"""
+
+    def __init__(self, service: str, reason: str, retry_after: int = 5):
+        super().__init__(f"{service} service unavailable: {reason}")
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _TransientStatus(Exception):
+    def __init__(self, response: requests.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+_TRANSIENT_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError, _TransientStatus)
+
+
+class RetryPolicy:
+    """
+    Retry/hedging policy for idempotent HTTP reads from one service
+
+    Each attempt gets `timeout` seconds, cut short by what is left of
+    `budget`. Timeouts, connection errors and 429/5xx responses are retried
+    after a random delay up to `base_delay * 2**attempt` (capped at
+    `max_delay`); any other response is returned to the caller. With
+    `hedge`, an attempt still running after the p`hedge_percentile` latency
+    of recent calls gets a second identical request, and whichever answers
+    first wins.
+    """
+
+    def __init__(self, name: str, attempts: int, timeout: float, budget: float, base_delay: float,
+                 max_delay: float, hedge: bool = False, hedge_percentile: float = 95, hedge_min_samples: int = 20):
+        self.name = name
+        self.attempts = max(1, attempts)
+        self.timeout = timeout
+        self.budget = budget
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = RollingLatency()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix=f"{name}-hedge") if hedge else None
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.exhausted = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET with retries; raises UpstreamUnavailable once attempts or budget run out"""
+        self.calls += 1
+        deadline = time.monotonic() + self.budget
+        last_error = "no attempt made"
+        for attempt in range(self.attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = self._attempt(url, min(self.timeout, remaining), **kwargs)
+                tracer.current().update(attempts=attempt + 1)
+                return response
+            except _TRANSIENT_ERRORS as e:
+                last_error = str(e) or e.__class__.__name__
+                logger.warning("%s call failed (attempt %d/%d): %s", self.name, attempt + 1, self.attempts, last_error)
+            if attempt + 1 < self.attempts:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    break
+                self.retries += 1
+                time.sleep(delay)
+
+        self.exhausted += 1
+        tracer.current().set("upstream_error", last_error)
+        raise UpstreamUnavailable(self.name, last_error)
+
+    def _attempt(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        delay = self._hedge_delay()
+        if delay is None or delay >= timeout:
+            return self._send(url, timeout, **kwargs)
+
+        first = self._executor.submit(contextvars.copy_context().run, self._send, url, timeout, **kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        second = self._executor.submit(
+            contextvars.copy_context().run, self._send, url, max(timeout - delay, 0.001), **kwargs
+        )
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except _TRANSIENT_ERRORS as e:
+                    error = e
+                    continue
+                if future is second:
+                    self.hedge_wins += 1
+                return response
+        raise error
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while hedging is off or latency is unknown"""
+        if not self.hedge or self.latency.count < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _send(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            self.latency.record(time.perf_counter() - started, error=True)
+            raise
+        transient = response.status_code in TRANSIENT_STATUSES
+        self.latency.record(time.perf_counter() - started, error=transient)
+        if transient:
+            raise _TransientStatus(response)
+        return response
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "exhausted": self.exhausted,
+            "latency": self.latency.stats(),
+        }
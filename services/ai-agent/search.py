@@ -0,0 +1,200 @@
+"""
+Adaptive Tavily search for AI Concierge Agent
+Starts with a basic-depth search and escalates to advanced only when the results are insufficient
+"""
+import math
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+from admission import UpstreamBusy
+from config import config
+from logs import get_logger
+from metrics import RollingLatency
+
+logger = get_logger("search")
+
+SEARCH_MODES = ("adaptive", "hedged", "advanced")
+
+# Result text kept for ranking/enrichment, and the prompt/card snippet cut from it once
+CONTENT_CHARS = 1500
+SNIPPET_CHARS = 200
+
+
+def compact_result(result: Dict) -> Dict:
+    """Keep only the fields the pipeline reads from a Tavily result"""
+    content = (result.get('content') or '')[:CONTENT_CHARS]
+    return {
+        'title': result.get('title', ''),
+        'url': result.get('url', ''),
+        'content': content,
+        'snippet': content[:SNIPPET_CHARS],
+        'score': result.get('score'),
+        'published_date': result.get('published_date'),
+    }
+
+
+def _parse_published_date(value: str) -> Optional[datetime]:
+    """Parse Tavily's published_date (RFC 2822 or ISO 8601), or None"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class AdaptiveSearch:
+    """
+    Search strategy wrapper around a Tavily search callable
+
+    Modes:
+        adaptive - basic search first, advanced only if the basic results fail the sufficiency check
+        hedged   - basic and advanced in parallel, first sufficient answer wins
+        advanced - always advanced (previous behaviour)
+    """
+
+    def __init__(
+        self,
+        search_fn: Callable[..., Dict],
+        mode: str = "adaptive",
+        sufficient_ratio: float = 0.5,
+        min_location_match: float = 0.5,
+        freshness_days: int = 730
+    ):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        self.search_fn = search_fn
+        self.mode = mode
+        self.sufficient_ratio = sufficient_ratio
+        self.min_location_match = min_location_match
+        self.freshness_days = freshness_days
+        self.latency = {"basic": RollingLatency(), "advanced": RollingLatency()}
+        self.searches = 0
+        self.escalations = 0
+        self.hedge_wins = {"basic": 0, "advanced": 0}
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search-hedge")
+
+    def search(self, query: str, max_results: int, location: Optional[str] = None, **kwargs) -> List[Dict]:
+        """Run a search in the configured mode and return the result list"""
+        self.searches += 1
+        if self.mode == "advanced":
+            return self._run("advanced", query, max_results, **kwargs)
+        if self.mode == "hedged":
+            return self._hedged(query, max_results, location, **kwargs)
+
+        try:
+            basic = self._run("basic", query, max_results, **kwargs)
+        except UpstreamBusy:
+            raise  # no Tavily slot: escalating would only wait again
+        except Exception as e:
+            logger.warning("Basic search failed, escalating: %s", e)
+            basic = []
+
+        if self.is_sufficient(basic, max_results, location):
+            return basic
+
+        self.escalations += 1
+        try:
+            advanced = self._run("advanced", query, max_results, **kwargs)
+        except Exception:
+            if basic:
+                return basic
+            raise
+        return advanced if len(advanced) >= len(basic) else basic
+
+    def _hedged(self, query: str, max_results: int, location: Optional[str], **kwargs) -> List[Dict]:
+        """Fire basic and advanced together and take the first sufficient answer"""
+        futures = {
+            self._executor.submit(contextvars.copy_context().run, self._run, depth, query, max_results, **kwargs): depth
+            for depth in ("basic", "advanced")
+        }
+        best: List[Dict] = []
+        busy: Optional[UpstreamBusy] = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results = future.result()
+                except UpstreamBusy as e:
+                    busy = e
+                    continue
+                except Exception as e:
+                    logger.warning("Hedged %s search failed: %s", futures[future], e)
+                    continue
+                if self.is_sufficient(results, max_results, location):
+                    self.hedge_wins[futures[future]] += 1
+                    if futures[future] == "advanced":
+                        self.escalations += 1
+                    return results
+                if len(results) > len(best):
+                    best = results
+        if busy is not None and not best:
+            raise busy
+        self.escalations += 1
+        return best
+
+    def _run(self, depth: str, query: str, max_results: int, **kwargs) -> List[Dict]:
+        """Call Tavily at the given depth, recording latency"""
+        started = time.perf_counter()
+        try:
+            response = self.search_fn(query=query, max_results=max_results, search_depth=depth, **kwargs)
+        except Exception:
+            self.latency[depth].record(time.perf_counter() - started, error=True)
+            raise
+        self.latency[depth].record(time.perf_counter() - started)
+        return [compact_result(r) for r in response.get('results', [])]
+
+    def is_sufficient(self, results: List[Dict], max_results: int, location: Optional[str] = None) -> bool:
+        """Check result count, location match and freshness"""
+        if len(results) < max(1, math.ceil(max_results * self.sufficient_ratio)):
+            return False
+
+        if location:
+            city = location.split(",")[0].strip().lower()
+            if city:
+                matches = sum(
+                    1 for r in results
+                    if city in f"{r.get('title', '')} {r.get('content', '')} {r.get('url', '')}".lower()
+                )
+                if matches / len(results) < self.min_location_match:
+                    return False
+
+        dates = [d for d in (_parse_published_date(r.get('published_date')) for r in results) if d]
+        if dates:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=self.freshness_days)
+            if max(dates) < cutoff:
+                return False
+
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "searches": self.searches,
+            "escalations": self.escalations,
+            "escalation_rate": round(self.escalations / self.searches, 3) if self.searches else 0.0,
+            "hedge_wins": dict(self.hedge_wins),
+            "latency": {depth: stats.stats() for depth, stats in self.latency.items()},
+        }
+
+
+def build_searcher(search_fn: Callable[..., Dict]) -> AdaptiveSearch:
+    """Create an AdaptiveSearch from configuration"""
+    return AdaptiveSearch(
+        search_fn,
+        mode=config.SEARCH_MODE,
+        sufficient_ratio=config.SEARCH_SUFFICIENT_RATIO,
+        min_location_match=config.SEARCH_MIN_LOCATION_MATCH,
+        freshness_days=config.SEARCH_FRESHNESS_DAYS
+    )
@@ -0,0 +1,134 @@
+"""
+Conversation sessions for AI Concierge Agent
+Keeps recent search results and message history so follow-up questions skip the search
+"""
+import re
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from cache import TTLCache
+from config import config
+from planner import QUERY_STOPWORDS, normalize_term, normalize_term_text
+
+# Markers of a question that refines the previous answer rather than asking something new
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:only|just|what about|how about)\b"
+    r"|\b(?:those|these|them|ones|one of|closer|cheaper|nearer|instead|more like|fewer|others?)\b",
+    re.IGNORECASE
+)
+
+_WORD = re.compile(r"[a-z][a-z'-]*")
+
+# The refinement markers themselves, which say nothing about the topic
+_REFINEMENT_WORDS = {
+    normalize_term(w) for w in (
+        "only", "just", "what", "how", "about", "those", "these", "them", "ones", "one",
+        "closer", "cheaper", "nearer", "instead", "more", "like", "fewer", "others",
+    )
+}
+
+
+def content_terms(text: str) -> Set[str]:
+    """Normalized topic words of a question"""
+    return {
+        normalize_term(w) for w in _WORD.findall(text.lower())
+        if w not in QUERY_STOPWORDS and normalize_term(w) not in _REFINEMENT_WORDS
+    }
+
+
+class ConversationSession:
+    """State kept for one traveler conversation about one booking"""
+
+    def __init__(self, booking_id: str, session_id: str, history_turns: int):
+        self.booking_id = booking_id
+        self.session_id = session_id
+        self.booking_context = None
+        self.results: List[Dict] = []
+        self.formatted_context = ""
+        self.history: Deque[Tuple[str, str]] = deque(maxlen=history_turns)
+        self.created_at = time.time()
+
+    @property
+    def last_query(self) -> Optional[str]:
+        return self.history[-1][0] if self.history else None
+
+    def is_follow_up(self, query: str) -> bool:
+        """
+        True when the query refines the previous one and cached results can be reused
+
+        Besides a refinement marker, every topic word of the query must appear
+        in the previous question or the cached results ("only vegan ones"
+        after "best tacos" qualifies when the results mention vegan options);
+        a new topic ("what about museums?") is searched.
+        """
+        if not (self.results and self.history and FOLLOW_UP_PATTERN.search(query)):
+            return False
+        terms = content_terms(query)
+        if not terms:
+            return True
+        related = content_terms(self.last_query or "")
+        related.update(normalize_term_text(
+            " ".join(f"{r.get('title', '')} {r.get('content', '')}" for r in self.results)
+        ).split())
+        return terms <= related
+
+    def remember(self, query: str, answer: str, results: List[Dict], formatted_context: str) -> None:
+        """Record a question/answer turn and the search context it used"""
+        self.results = results
+        self.formatted_context = formatted_context
+        self.history.append((query, answer))
+
+    def remember_answer(self, query: str, answer: str) -> None:
+        """Record a turn answered without search, keeping the previous search context"""
+        self.history.append((query, answer))
+
+    def rerank(self, query: str, limit: int) -> List[Dict]:
+        """Order cached results by overlap with the follow-up question (and the question it refines)"""
+        terms = set()
+        for text in (query, self.last_query or ""):
+            terms.update(
+                normalize_term(w) for w in _WORD.findall(text.lower())
+                if w not in QUERY_STOPWORDS
+            )
+        if not terms:
+            return self.results[:limit]
+
+        def score(indexed):
+            index, result = indexed
+            words = set(normalize_term_text(f"{result.get('title', '')} {result.get('content', '')}").split())
+            # Current question terms weigh more than carried-over terms
+            current = sum(2 for w in _WORD.findall(query.lower()) if normalize_term(w) in words)
+            return (-(current + len(terms & words)), index)
+
+        ranked = sorted(enumerate(self.results), key=score)
+        return [result for _, result in ranked[:limit]]
+
+
+class SessionStore:
+    """Bounded session store with idle eviction, keyed by (booking_id, session_id)"""
+
+    def __init__(self, idle_ttl: float, max_sessions: int, history_turns: int):
+        self.history_turns = history_turns
+        self._sessions = TTLCache("sessions", ttl=idle_ttl, max_size=max_sessions, sliding=True)
+
+    def get_or_create(self, booking_id: Optional[str], session_id: Optional[str]) -> ConversationSession:
+        """Return the live session, or start a new one (with a fresh ID if none was given)"""
+        session_id = session_id or uuid.uuid4().hex
+        key = (str(booking_id or ""), session_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = ConversationSession(key[0], session_id, self.history_turns)
+            self._sessions.set(key, session)
+        return session
+
+    def stats(self) -> Dict:
+        return self._sessions.stats()
+
+
+session_store = SessionStore(
+    idle_ttl=config.SESSION_IDLE_TTL,
+    max_sessions=config.SESSION_MAX,
+    history_turns=config.SESSION_HISTORY_TURNS
+)
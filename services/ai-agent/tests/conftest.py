@@ -0,0 +1,74 @@
+"""
+Shared setup for the AI Concierge Agent unit tests
+Modules read their configuration at import, so placeholder API keys are set before any import
+"""
+import os
+import sys
+
+os.environ.setdefault("OPENAI_API_KEY", "test-openai-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-tavily-key")
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+import pytest
+
+from agent import AIConciergeAgent
+from models import BookingContext
+
+PLACES = ("Harbor", "Garden", "Gallery", "Market", "Lighthouse", "Theater", "Pier", "Bistro", "Plaza", "Museum")
+
+
+class FakeTavily:
+    """Tavily stand-in returning distinct results in the searched city, recording every query"""
+
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, max_results=5, **kwargs):
+        self.queries.append(query)
+        topic = query.split(" in ")[0]
+        return {"results": [
+            {
+                "title": f"{PLACES[i % len(PLACES)]} {i}: {topic}",
+                "content": f"{PLACES[i % len(PLACES)]} number {i} for {topic} in Miami. " * 3,
+                "url": f"https://example.com/{abs(hash(query)) % 10000}/{i}",
+                "score": 0.9 - i * 0.05,
+            }
+            for i in range(max_results)
+        ]}
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """Chat model stand-in answering every prompt, recording the calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        return FakeResponse(f"answer {len(self.calls)}")
+
+
+@pytest.fixture
+def agent():
+    """A fresh agent with Tavily and the chat model replaced by fakes"""
+    fresh = AIConciergeAgent()
+    fresh.tavily_client = FakeTavily()
+    fresh.llm = FakeLLM()
+    fresh.models.client_factory = lambda tier, timeout: fresh.llm
+    return fresh
+
+
+def make_booking(booking_id="b1", city="Miami", start=date(2025, 1, 1), end=date(2025, 1, 3)):
+    return BookingContext(
+        booking_id=booking_id, property_name="Beach House", city=city, state="FL", country="USA",
+        start_date=start, end_date=end, guests=2
+    )
@@ -0,0 +1,95 @@
+"""Tests for endpoint admission pools, upstream limiters and their 429 responses"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission import (
+    PRIORITY_PLAN, PRIORITY_QUERY, AdmissionPool, AdmissionRejected, UpstreamBusy, UpstreamLimiter, current_priority
+)
+
+
+def pool(max_concurrent=1, max_queue=0, queue_timeout=1.0):
+    return AdmissionPool("plan", PRIORITY_PLAN, max_concurrent, max_queue, queue_timeout, retry_after=7)
+
+
+def test_full_pool_rejects_instead_of_queueing():
+    plans = pool()
+
+    async def run():
+        async with plans.admit():
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with plans.admit():
+                    pass
+        return rejected.value
+
+    rejected = asyncio.run(run())
+
+    assert rejected.retry_after == 7
+    assert plans.stats()["rejected"] == 1
+    assert plans.stats()["active"] == 0
+
+
+def test_queued_request_times_out():
+    plans = pool(max_queue=1, queue_timeout=0.05)
+
+    async def run():
+        async with plans.admit():
+            with pytest.raises(AdmissionRejected):
+                async with plans.admit():
+                    pass
+
+    asyncio.run(run())
+
+    stats = plans.stats()
+    assert (stats["waiting"], stats["admitted"], stats["rejected"]) == (0, 1, 1)
+
+
+def test_admitted_request_runs_at_the_pool_priority():
+    queries = AdmissionPool("query", PRIORITY_QUERY, 1, 0, 1.0, retry_after=5)
+    seen = []
+
+    async def run():
+        async with queries.admit():
+            seen.append(current_priority.get())
+
+    asyncio.run(run())
+
+    assert seen == [PRIORITY_QUERY]
+
+
+def test_upstream_limiter_gives_up_after_its_timeout():
+    limiter = UpstreamLimiter("tavily", max_concurrent=1, timeout=0.05)
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with limiter.slot():
+            holding.set()
+            release.wait(1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait(1)
+    try:
+        with pytest.raises(UpstreamBusy) as busy:
+            with limiter.slot():
+                pass
+    finally:
+        release.set()
+        holder.join()
+
+    assert busy.value.pool == "tavily"
+    assert limiter.stats() == {"active": 0, "waiting": 0, "max_concurrent": 1}
+
+
+def test_rejected_query_is_answered_with_429_and_retry_after(monkeypatch):
+    monkeypatch.setattr(main, "query_pool", AdmissionPool("query", PRIORITY_QUERY, 0, 0, 1.0, retry_after=9))
+
+    response = TestClient(main.app).post("/api/concierge/query", json={"query": "Find Indian restaurants"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "9"
+    assert "query" in response.json()["detail"]
@@ -0,0 +1,49 @@
+"""Tests for the dispatcher's consistent hash ring"""
+from dispatcher import HashRing
+
+MEMBERS = ["http://worker-1", "http://worker-2", "http://worker-3"]
+KEYS = [f"city-{i}" for i in range(500)]
+
+
+def ring(members=MEMBERS, vnodes=100):
+    ring = HashRing(vnodes)
+    for member in members:
+        ring.add(member)
+    return ring
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing().lookup("miami") is None
+
+
+def test_lookup_is_stable():
+    assert [ring().lookup(key) for key in KEYS] == [ring().lookup(key) for key in KEYS]
+
+
+def test_every_member_owns_keys():
+    owners = {ring().lookup(key) for key in KEYS}
+    assert owners == set(MEMBERS)
+
+
+def test_removing_a_member_only_moves_its_keys():
+    before = ring()
+    after = ring(MEMBERS[:2])
+    for key in KEYS:
+        if before.lookup(key) != MEMBERS[2]:
+            assert after.lookup(key) == before.lookup(key)
+        else:
+            assert after.lookup(key) in MEMBERS[:2]
+
+
+def test_lookup_skips_members():
+    r = ring()
+    for key in KEYS[:50]:
+        owner = r.lookup(key)
+        assert r.lookup(key, skip=[owner]) != owner
+    assert r.lookup("miami", skip=MEMBERS) is None
+
+
+def test_shares_cover_the_key_space():
+    shares = ring().shares()
+    assert set(shares) == set(MEMBERS)
+    assert abs(sum(shares.values()) - 1.0) < 1e-9
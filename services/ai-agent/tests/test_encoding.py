@@ -0,0 +1,106 @@
+"""Tests for response projection, compact output and compression"""
+import gzip
+import json
+
+import pytest
+
+import encoding
+from encoding import FastJSONResponse, dumps, negotiate_encoding, parse_fields, shaped
+from models import PriceTier
+from records import ActivityRecord, DayRecord, PlanRecord
+
+PLAN = PlanRecord(
+    success=True,
+    message=None,
+    itinerary=(
+        DayRecord("2025-01-01", 1, morning=(
+            ActivityRecord("Pier", "Walk the pier", "1 Ocean Dr", PriceTier.FREE, "1h", tags=("outdoor",)),
+        )),
+        DayRecord("2025-01-02", 2),
+    ),
+    tips=("Bring water",),
+)
+
+
+def test_parse_fields():
+    assert parse_fields("itinerary.morning.title, tips,") == {"itinerary": {"morning": {"title": {}}}, "tips": {}}
+    assert parse_fields("") is None
+    assert parse_fields(" , ") is None
+
+
+def test_projection_applies_through_lists():
+    assert shaped(PLAN, "success,itinerary.morning.title") == {
+        "success": True,
+        "itinerary": [{"morning": [{"title": "Pier"}]}, {"morning": []}],
+    }
+
+
+def test_wildcard_and_scalar_sub_paths():
+    assert shaped(PLAN, "itinerary.*.title,success.value") == {
+        "itinerary": [
+            {"morning": [{"title": "Pier"}], "afternoon": [], "evening": [], "restaurants": []},
+            {"morning": [], "afternoon": [], "evening": [], "restaurants": []},
+        ],
+    }
+
+
+def test_compact_drops_nulls_empties_and_defaults():
+    assert shaped(PLAN, compact=True) == {
+        "success": True,
+        "itinerary": [
+            {"date": "2025-01-01", "day_number": 1, "morning": [{
+                "title": "Pier", "description": "Walk the pier", "address": "1 Ocean Dr",
+                "price_tier": PriceTier.FREE, "duration": "1h", "tags": ["outdoor"],
+            }]},
+            {"date": "2025-01-02", "day_number": 2},
+        ],
+        "tips": ["Bring water"],
+    }
+
+
+def test_unshaped_content_is_returned_as_is():
+    assert shaped(PLAN) is PLAN
+
+
+def test_records_encode_like_their_dicts():
+    decoded = json.loads(dumps(PLAN))
+
+    assert decoded["itinerary"][0]["morning"][0]["price_tier"] == PriceTier.FREE.value
+    assert decoded["tips"] == ["Bring water"]
+
+
+def test_stdlib_encoder_fallback(monkeypatch):
+    monkeypatch.setattr(encoding, "orjson", None)
+
+    assert json.loads(dumps(PLAN)) == json.loads(json.dumps(encoding.to_primitive(PLAN)))
+
+
+@pytest.mark.parametrize("header,coding", [
+    (None, None),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("identity", None),
+])
+def test_negotiate_encoding_without_brotli(monkeypatch, header, coding):
+    monkeypatch.setattr(encoding, "brotli", None)
+
+    assert negotiate_encoding(header) == coding
+
+
+def test_large_bodies_are_compressed(monkeypatch):
+    monkeypatch.setattr(encoding, "brotli", None)
+    content = {"tips": ["Bring water"] * 500}
+
+    response = FastJSONResponse(content, accept_encoding="gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.body)) == content
+
+
+def test_small_bodies_are_sent_uncompressed():
+    response = FastJSONResponse({"success": True}, accept_encoding="gzip")
+
+    assert json.loads(response.body) == {"success": True}
+    assert "content-encoding" not in response.headers
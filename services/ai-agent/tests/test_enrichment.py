@@ -0,0 +1,48 @@
+"""Tests for the single-pass content enricher"""
+from enrichment import EMPTY_ENRICHMENT, enricher
+from models import PriceTier
+
+
+def test_extracts_all_attributes_in_one_pass():
+    result = enricher.enrich(
+        "Family-friendly Italian restaurant with vegan and gluten free dishes. "
+        "Wheelchair accessible, moderately priced. Visit us at 123 Ocean Drive, Miami Beach."
+    )
+
+    assert result.tags == ("food", "family")
+    assert result.cuisine == "Italian"
+    assert result.price_tier == PriceTier.MEDIUM
+    assert result.dietary_options == ("vegan", "gluten-free")
+    assert result.wheelchair_friendly
+    assert result.child_friendly
+    assert result.address == "123 Ocean Drive, Miami Beach"
+
+
+def test_multi_word_phrases_win_over_their_prefixes():
+    assert enricher.enrich("An evening of fine dining by the bay").price_tier == PriceTier.HIGH
+    assert enricher.enrich("Free admission to the gallery on Sundays").price_tier == PriceTier.FREE
+
+
+def test_dollar_signs_and_plurals():
+    result = enricher.enrich("Sushi bars and parks nearby, $$$ but worth it")
+
+    assert result.price_tier == PriceTier.HIGH
+    assert result.cuisine == "Sushi"
+    assert result.tags == ("outdoor",)
+
+
+def test_tags_are_capped_and_ordered():
+    result = enricher.enrich("museum history beach restaurant kids")
+
+    assert result.tags == ("outdoor", "museum", "food")
+
+
+def test_empty_content_and_batches():
+    assert enricher.enrich("") is EMPTY_ENRICHMENT
+    batch = enricher.enrich_batch([{"content": "Thai food"}, {"title": "no content"}])
+    assert [e.cuisine for e in batch] == ["Thai", None]
+    assert batch[1] == EMPTY_ENRICHMENT
+
+
+def test_cuisine_preferences():
+    assert enricher.cuisine_preferences(["Beaches", "Thai", "sushi"]) == ["Thai", "sushi"]
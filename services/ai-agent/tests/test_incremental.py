@@ -0,0 +1,67 @@
+"""Tests for incremental recomputation of a booking's plan"""
+from datetime import date
+
+import pytest
+
+from config import config
+from conftest import make_booking
+from incremental import DAYS, LLM, WEATHER, IncrementalPlanner, PlanState, day_fingerprint
+from models import AgentRequest, TravelerPreferences
+from records import WeatherRecord
+
+
+@pytest.fixture(autouse=True)
+def incremental_planning(monkeypatch):
+    monkeypatch.setattr(config, "INCREMENTAL_PLANNING", True)
+
+
+def plan(agent, start, end, **preferences):
+    booking = make_booking("b1", start=start, end=end)
+    return agent.plan_itinerary(AgentRequest(booking_context=booking, preferences=TravelerPreferences(**preferences)))
+
+
+def test_date_shift_reuses_days_and_skips_the_llm(agent):
+    first = plan(agent, date(2025, 1, 1), date(2025, 1, 3), dietary_restrictions=["vegan", "halal"])
+    shifted = plan(agent, date(2025, 1, 2), date(2025, 1, 4), dietary_restrictions=["halal", "vegan"])
+
+    assert len(agent.llm.calls) == 1
+    assert [day.date for day in shifted.itinerary] == ["2025-01-02", "2025-01-03", "2025-01-04"]
+    assert [day.morning for day in shifted.itinerary] == [day.morning for day in first.itinerary]
+    stats = agent.incremental.stats()
+    assert stats["reused"] == {WEATHER: 2, LLM: 1, DAYS: 3}
+    assert stats["computed"][WEATHER] == 4
+
+
+def test_changed_preferences_recompute_the_days(agent):
+    plan(agent, date(2025, 1, 1), date(2025, 1, 3), dietary_restrictions=["vegan"])
+    plan(agent, date(2025, 1, 1), date(2025, 1, 3), dietary_restrictions=["vegan", "kosher"])
+
+    assert len(agent.llm.calls) == 2
+    assert agent.incremental.stats()["reused"].get(DAYS, 0) == 0
+
+
+def test_day_fingerprint_ignores_restriction_order():
+    results = [{"url": "https://example.com/1"}]
+    first = day_fingerprint(results, results, TravelerPreferences(dietary_restrictions=["vegan", "halal"]))
+    second = day_fingerprint(results, results, TravelerPreferences(dietary_restrictions=["halal", "vegan"]))
+
+    assert first == second
+
+
+def test_weather_fetches_only_new_dates():
+    fetched = []
+
+    def fetch(location, start, end):
+        fetched.append((start, end))
+        days = (end - start).days + 1
+        return [WeatherRecord(f"{date.fromordinal(start.toordinal() + i)}", 75.0, 60.0, "Sunny", 10) for i in range(days)]
+
+    planner = IncrementalPlanner(fetch)
+    previous = PlanState()
+    planner.weather(previous, "Miami", date(2025, 1, 1), date(2025, 1, 3))
+    fetched.clear()
+
+    forecast = planner.weather(PlanState(previous), "Miami", date(2024, 12, 31), date(2025, 1, 5))
+
+    assert fetched == [(date(2024, 12, 31), date(2024, 12, 31)), (date(2025, 1, 4), date(2025, 1, 5))]
+    assert len(forecast) == 6
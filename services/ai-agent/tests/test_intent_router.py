@@ -0,0 +1,70 @@
+"""Tests for local intent answers"""
+import pytest
+
+from conftest import make_booking
+from intent_router import DATES, GUESTS, PACKING, WEATHER, IntentRouter
+from records import WeatherRecord
+
+
+class StubWeather:
+    def __init__(self, rain=10):
+        self.rain = rain
+        self.calls = []
+
+    def __call__(self, location, start, end):
+        self.calls.append((location, start, end))
+        return [WeatherRecord("2025-01-01", 80.0, 65.0, "Sunny", self.rain)]
+
+
+@pytest.mark.parametrize("query,intent", [
+    ("What's the weather like?", WEATHER),
+    ("Will it rain on Saturday?", WEATHER),
+    ("What should I bring?", PACKING),
+    ("When is check-out?", DATES),
+    ("How many nights is our stay?", DATES),
+    ("How long is our trip?", DATES),
+    ("How many guests are on the booking?", GUESTS),
+    ("Find restaurants with good weather views", None),
+    ("Recommend things to do", None),
+])
+def test_classify(query, intent):
+    assert IntentRouter(StubWeather()).classify(query) == intent
+
+
+def test_weather_answer_uses_the_supplied_forecast():
+    weather = StubWeather(rain=60)
+    booking = make_booking()
+
+    answer = IntentRouter(weather).route("Will it rain?", booking)
+
+    assert weather.calls == [("Miami, FL", booking.start_date, booking.end_date)]
+    assert "high 80°F / low 65°F, 60% chance of rain" in answer
+    assert "umbrella" in answer
+
+
+def test_packing_answer_follows_preferences():
+    answer = IntentRouter(StubWeather()).route("What should we pack?", make_booking(), {"has_children": True})
+
+    assert "3-day trip to Miami" in answer
+    assert "Sunscreen" in answer
+    assert "Snacks for kids" in answer
+
+
+def test_dates_and_guests_come_from_the_booking():
+    router = IntentRouter(StubWeather())
+
+    assert "2 nights" in router.route("When is check-in?", make_booking())
+    assert "for 2 guests" in router.route("How many people are coming?", make_booking())
+    assert router.stats() == {DATES: 1, GUESTS: 1}
+
+
+def test_questions_without_a_booking_are_not_answered_locally():
+    assert IntentRouter(StubWeather()).route("What's the weather?") is None
+
+
+def test_agent_answers_locally_without_search_or_llm(agent):
+    answer = agent.answer_query("What's the forecast?", make_booking())
+
+    assert answer.startswith("🌤️ Weather forecast for Miami")
+    assert agent.tavily_client.queries == []
+    assert agent.llm.calls == []
@@ -0,0 +1,39 @@
+"""Tests for the finished-itinerary cache"""
+from datetime import date
+
+from conftest import make_booking
+from models import AgentRequest, TravelerPreferences
+
+
+def plan(agent, booking, **preferences):
+    return agent.plan_itinerary(AgentRequest(booking_context=booking, preferences=TravelerPreferences(**preferences)))
+
+
+def test_identical_trip_is_served_from_cache(agent):
+    first = plan(agent, make_booking("b1"), interests=["beaches"])
+    searches, llm_calls = len(agent.tavily_client.queries), len(agent.llm.calls)
+
+    second = plan(agent, make_booking("b2"), interests=["beaches"])
+
+    assert first.success and second.success
+    assert second.itinerary == first.itinerary
+    assert (len(agent.tavily_client.queries), len(agent.llm.calls)) == (searches, llm_calls)
+    assert agent.itinerary_cache.stats()["hits"] == 1
+
+
+def test_other_preferences_or_dates_miss_the_cache(agent):
+    plan(agent, make_booking("b1"), interests=["beaches"])
+    plan(agent, make_booking("b1"), interests=["museums"])
+    plan(agent, make_booking("b1", end=date(2025, 1, 4)), interests=["beaches"])
+
+    assert agent.itinerary_cache.stats()["hits"] == 0
+    assert agent.itinerary_cache.stats()["size"] == 3
+
+
+def test_degraded_plan_is_not_cached(agent):
+    agent.tavily_client.search = lambda query, **kwargs: {"results": []}
+
+    degraded = plan(agent, make_booking("b1"), interests=["beaches"])
+
+    assert degraded.success
+    assert agent.itinerary_cache.stats()["size"] == 0
@@ -0,0 +1,22 @@
+"""Tests for If-None-Match handling of stored itineraries"""
+import pytest
+
+from itinerary_store import etag_matches
+
+ETAG = 'W/"3-abcdef0123456789"'
+
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    '"3-abcdef0123456789"',
+    '"other", W/"3-abcdef0123456789"',
+    f"  {ETAG}  ",
+    "*",
+])
+def test_matches(header):
+    assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [None, "", '"2-abcdef0123456789"', 'W/"3-abcdef0123456789-1a2b3c4d"'])
+def test_does_not_match(header):
+    assert not etag_matches(header, ETAG)
@@ -0,0 +1,130 @@
+"""Tests for the plan job queue and callback URL validation"""
+import asyncio
+import socket
+
+import pytest
+
+import jobs
+from admission import AdmissionRejected
+from config import config
+
+
+@pytest.fixture
+def allow_hosts(monkeypatch):
+    monkeypatch.setattr(config, "PLAN_JOB_CALLBACK_HOSTS", ["hooks.example.com"])
+
+
+def resolve_to(monkeypatch, *addresses):
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port or 0)) for address in addresses]
+    monkeypatch.setattr(jobs.socket, "getaddrinfo", getaddrinfo)
+
+
+def test_callbacks_disabled_without_allow_list(monkeypatch):
+    monkeypatch.setattr(config, "PLAN_JOB_CALLBACK_HOSTS", [])
+    with pytest.raises(ValueError, match="disabled"):
+        jobs.validate_callback_url("https://hooks.example.com/done")
+
+
+@pytest.mark.parametrize("url", ["ftp://hooks.example.com/done", "hooks.example.com/done", "https:///done"])
+def test_rejects_non_http_urls(allow_hosts, url):
+    with pytest.raises(ValueError, match="http"):
+        jobs.validate_callback_url(url)
+
+
+def test_rejects_hosts_not_allowed(allow_hosts, monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34")
+    with pytest.raises(ValueError, match="not allowed"):
+        jobs.validate_callback_url("https://evil.example.net/done")
+
+
+@pytest.mark.parametrize("address", [
+    "127.0.0.1",        # loopback
+    "10.1.2.3",         # private
+    "192.168.0.10",     # private
+    "169.254.169.254",  # link-local (cloud metadata)
+    "::1",
+    "fe80::1%eth0",
+    "224.0.0.1",        # multicast
+])
+def test_rejects_non_public_addresses(allow_hosts, monkeypatch, address):
+    resolve_to(monkeypatch, address)
+    with pytest.raises(ValueError, match="non-public"):
+        jobs.validate_callback_url("https://hooks.example.com/done")
+
+
+def test_rejects_when_any_address_is_private(allow_hosts, monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34", "10.0.0.5")
+    with pytest.raises(ValueError, match="non-public"):
+        jobs.validate_callback_url("https://hooks.example.com/done")
+
+
+def test_rejects_unresolvable_host(allow_hosts, monkeypatch):
+    def getaddrinfo(*args, **kwargs):
+        raise socket.gaierror("Name or service not known")
+    monkeypatch.setattr(jobs.socket, "getaddrinfo", getaddrinfo)
+    with pytest.raises(ValueError, match="does not resolve"):
+        jobs.validate_callback_url("https://hooks.example.com/done")
+
+
+def test_accepts_allowed_public_host(allow_hosts, monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34")
+    jobs.validate_callback_url("https://HOOKS.example.com:8443/done")
+
+
+def test_job_runs_and_completes():
+    async def scenario():
+        queue = jobs.PlanJobQueue(workers=1, max_queue=5, result_ttl=60, max_retained=10,
+                                  callback_attempts=1, callback_timeout=1)
+
+        async def run():
+            return {"success": True}
+
+        job = queue.submit("1", run)
+        assert job.status == jobs.QUEUED
+        await asyncio.sleep(0.05)
+        return queue, job
+
+    queue, job = asyncio.run(scenario())
+    assert job.status == jobs.COMPLETED
+    assert job.result == {"success": True}
+    assert (queue.queued, queue.running, queue.completed) == (0, 0, 1)
+
+
+def test_shutdown_fails_queued_and_running_jobs():
+    async def scenario():
+        queue = jobs.PlanJobQueue(workers=1, max_queue=5, result_ttl=60, max_retained=10,
+                                  callback_attempts=1, callback_timeout=1)
+
+        async def run():
+            await asyncio.sleep(60)
+
+        running = queue.submit("1", run)
+        waiting = queue.submit("2", run)
+        await asyncio.sleep(0.05)
+        tasks = list(queue._tasks)
+        queue.shutdown()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return queue, running, waiting
+
+    queue, running, waiting = asyncio.run(scenario())
+    assert running.status == waiting.status == jobs.FAILED
+    assert running.error_status == waiting.error_status == 503
+    assert running.finished_at is not None and waiting.finished_at is not None
+    assert (queue.queued, queue.running, queue.failed) == (0, 0, 2)
+
+
+def test_full_queue_rejects_submissions():
+    async def scenario():
+        queue = jobs.PlanJobQueue(workers=1, max_queue=1, result_ttl=60, max_retained=10,
+                                  callback_attempts=1, callback_timeout=1)
+
+        async def run():
+            return None
+
+        queue.submit("1", run)
+        with pytest.raises(AdmissionRejected):
+            queue.submit("2", run)
+        queue.shutdown()
+
+    asyncio.run(scenario())
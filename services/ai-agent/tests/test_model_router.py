@@ -0,0 +1,80 @@
+"""Tests for per-call-site model routing and failover"""
+import pytest
+
+from admission import UpstreamBusy
+from model_router import QUERY, ModelRoute, ModelRouter, ModelTier
+
+PRIMARY = ModelTier("primary", 100)
+FALLBACK = ModelTier("fallback", 100)
+
+
+class Model:
+    """Chat model stand-in that fails with `error` when set"""
+
+    def __init__(self, name):
+        self.name = name
+        self.error = None
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return f"{self.name}: {messages}"
+
+
+@pytest.fixture
+def models():
+    return {tier.model: Model(tier.model) for tier in (PRIMARY, FALLBACK)}
+
+
+def router(models, **kwargs):
+    return ModelRouter(
+        {QUERY: ModelRoute([PRIMARY, FALLBACK], latency_budget=1.0)},
+        client_factory=lambda tier, timeout: models[tier.model],
+        **kwargs
+    )
+
+
+def test_primary_serves_while_healthy(models):
+    routed = router(models)
+
+    assert routed.invoke(QUERY, "hi") == "primary: hi"
+    assert routed.failovers == 0
+    assert models["fallback"].calls == 0
+
+
+def test_failed_primary_fails_over_to_the_next_tier(models):
+    models["primary"].error = RuntimeError("rate limited")
+    routed = router(models)
+
+    assert routed.invoke(QUERY, "hi") == "fallback: hi"
+    assert routed.failovers == 1
+    assert routed.stats()["models"]["query:primary"]["error_rate"] == 1.0
+
+
+def test_erroring_primary_is_demoted_and_probed(models):
+    models["primary"].error = RuntimeError("timeout")
+    routed = router(models, min_samples=2, probe_every=5)
+    routed.invoke(QUERY, "a")
+    routed.invoke(QUERY, "b")
+
+    assert routed.tiers_for(QUERY) == [FALLBACK, PRIMARY]  # third call: demoted
+    assert routed.tiers_for(QUERY) == [FALLBACK, PRIMARY]
+    assert routed.tiers_for(QUERY) == [PRIMARY, FALLBACK]  # fifth call: probe the primary
+
+
+def test_last_error_is_raised_when_every_tier_fails(models):
+    for model in models.values():
+        model.error = RuntimeError(f"{model.name} down")
+
+    with pytest.raises(RuntimeError, match="fallback down"):
+        router(models).invoke(QUERY, "hi")
+
+
+def test_busy_limiter_does_not_fail_over(models):
+    models["primary"].error = UpstreamBusy("openai", 1.0, 5)
+
+    with pytest.raises(UpstreamBusy):
+        router(models).invoke(QUERY, "hi")
+    assert models["fallback"].calls == 0
@@ -0,0 +1,68 @@
+"""Tests for the compiled packing list rule table"""
+import json
+from datetime import date
+
+from records import WeatherRecord
+from utils import PACKING_RULES, PackingListGenerator, WeatherService, load_packing_rules
+
+
+def forecast(high, rain=0, days=3):
+    return [WeatherRecord(f"2026-06-0{d + 1}", high, high - 15, "Sunny", rain) for d in range(days)]
+
+
+def items(records):
+    return [record.item for record in records]
+
+
+def test_hot_rainy_family_trip():
+    packing = PackingListGenerator.generate(forecast(85, rain=60, days=5), 5, {"has_children": True})
+
+    assert items(packing) == [
+        "Lightweight shorts", "T-shirts", "Sunglasses", "Sunscreen",
+        "Rain jacket", "Umbrella",
+        "Comfortable walking shoes", "Toiletries kit", "Phone charger", "Travel documents",
+        "Snacks for kids", "Entertainment (books/toys)",
+        "Laundry detergent",
+    ]
+
+
+def test_temperature_bands_and_thresholds():
+    assert PackingListGenerator.condition_mask(forecast(75), 3, {}) == PackingListGenerator.MILD
+    assert PackingListGenerator.condition_mask(forecast(60, rain=30), 3, {}) == PackingListGenerator.COLD
+    assert PackingListGenerator.condition_mask(forecast(60, rain=31), 4, {}) == (
+        PackingListGenerator.COLD | PackingListGenerator.RAIN | PackingListGenerator.LONG_TRIP
+    )
+
+
+def test_missing_forecast_uses_mild_defaults():
+    packing = PackingListGenerator.generate([], 2, {})
+
+    assert "Light jacket" in items(packing)
+    assert "Umbrella" not in items(packing)
+
+
+def test_same_conditions_share_one_precomputed_list():
+    first = PackingListGenerator.generate(WeatherService._generate_mock_weather(date(2026, 6, 1), date(2026, 6, 3)), 3, {})
+    second = PackingListGenerator.generate(forecast(70), 2, {})
+
+    assert first is second
+
+
+def test_extra_rules_from_file(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([
+        {"when": ["rain", "children"], "item": "Kids rain boots", "category": "footwear", "reason": "Puddles"},
+    ]))
+    monkeypatch.setattr(PackingListGenerator, "_table", PackingListGenerator._table)
+    PackingListGenerator.compile(PACKING_RULES + load_packing_rules(str(path)))
+
+    assert "Kids rain boots" in items(PackingListGenerator.generate(forecast(70, rain=80), 2, {"has_children": True}))
+    assert "Kids rain boots" not in items(PackingListGenerator.generate(forecast(70, rain=80), 2, {}))
+
+
+def test_rules_with_unknown_conditions_are_ignored(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"when": ["snow"], "item": "Skis", "category": "gear"}]))
+
+    assert load_packing_rules(str(path)) == ()
+    assert load_packing_rules(None) == ()
@@ -0,0 +1,97 @@
+"""Tests for combined search planning and splitting results into attractions and restaurants"""
+import pytest
+
+from cache import TTLCache
+from models import TravelerPreferences
+from planner import SearchPlanner
+
+
+def split(*results):
+    attractions, restaurants = SearchPlanner._split([
+        {"title": title, "content": content, "url": f"https://example.com/{i}"}
+        for i, (title, content) in enumerate(results)
+    ])
+    return [r["title"] for r in attractions], [r["title"] for r in restaurants]
+
+
+@pytest.mark.parametrize("title", [
+    "Great Barrier Reef Tours",
+    "Theater District Walking Guide",
+    "Beaches of the Great Lakes",
+    "Repeat Visitors Guide",
+])
+def test_food_words_inside_other_words_are_attractions(title):
+    attractions, restaurants = split((title, "A guided tour of the museum and park"))
+    assert attractions == [title]
+    assert restaurants == []
+
+
+@pytest.mark.parametrize("title", [
+    "Best Restaurants in Miami",
+    "Fine Dining Downtown",
+    "Where to Eat in Austin",
+    "The Corner Eatery",
+])
+def test_food_titles_are_restaurants(title):
+    attractions, restaurants = split((title, "Open daily"))
+    assert attractions == []
+    assert restaurants == [title]
+
+
+def test_split_keeps_order_within_buckets():
+    attractions, restaurants = split(
+        ("Top Museums", "Art museum with a sculpture park"),
+        ("Best Restaurants", "Seafood and steak"),
+        ("City Park", "Outdoor trails and a lake"),
+        ("Dining Guide", "Where locals eat"),
+    )
+    assert attractions == ["Top Museums", "City Park"]
+    assert restaurants == ["Best Restaurants", "Dining Guide"]
+
+
+class FlakySearcher:
+    """Searcher returning one attraction and one restaurant per query, or failing when told to"""
+
+    def __init__(self):
+        self.queries = []
+        self.fail = False
+
+    def search(self, query, max_results=5, location=""):
+        self.queries.append(query)
+        if self.fail:
+            raise RuntimeError("Tavily unavailable")
+        n = len(self.queries)
+        return [
+            {"title": f"City Museum {n}", "content": "Art museum with a sculpture park", "url": f"https://example.com/m{n}"},
+            {"title": f"Best Restaurants {n}", "content": "Seafood and steak", "url": f"https://example.com/r{n}"},
+        ]
+
+
+@pytest.fixture
+def planner():
+    return SearchPlanner(FlakySearcher(), TTLCache("test_search", ttl=60, max_size=10))
+
+
+def test_cached_plan_is_served_without_searching(planner):
+    first = planner.plan("miami", "Miami", TravelerPreferences(interests=["museums"]))
+    again = planner.plan("miami", "Miami", TravelerPreferences(interests=["museums"]))
+    assert first.searches > 0
+    assert again.searches == 0
+    assert again.attractions == first.attractions
+
+
+def test_failed_delta_search_keeps_cached_results(planner):
+    first = planner.plan("miami", "Miami", TravelerPreferences(interests=["museums"]))
+    planner.searcher.fail = True
+    queries = len(planner.searcher.queries)
+    planned = planner.plan("miami", "Miami", TravelerPreferences(interests=["museums", "beaches"]))
+    assert planned.attractions == first.attractions
+    assert planned.restaurants == first.restaurants
+    assert planned.searches == len(planner.searcher.queries) - queries > 0
+
+    # The new intent was not recorded as covered, so it is searched again once Tavily recovers
+    planner.searcher.fail = False
+    queries = len(planner.searcher.queries)
+    planned = planner.plan("miami", "Miami", TravelerPreferences(interests=["museums", "beaches"]))
+    assert len(planner.searcher.queries) > queries
+    assert len(planned.attractions) > len(first.attractions)
@@ -0,0 +1,36 @@
+"""Tests for booking-event prefetch"""
+from datetime import date
+
+import prefetch
+from prefetch import Prefetcher
+
+
+class RecordingAgent:
+    """Agent stand-in recording which caches the prefetcher warms"""
+
+    def __init__(self):
+        self.warmed = []
+        self.planned = []
+        self.planner = self
+
+    def warm_weather(self, booking):
+        self.warmed.append((booking.city, booking.start_date, booking.end_date))
+
+    def plan(self, location_key, location, preferences):
+        self.planned.append((location, preferences.interests))
+
+
+def test_prefetch_warms_weather_and_search(monkeypatch):
+    booking = {
+        "booking_id": "1", "property_name": "Beach House", "location": "Miami, FL, USA",
+        "city": "Miami", "state": "FL", "country": "USA",
+        "start_date": date(2025, 1, 1), "end_date": date(2025, 1, 3), "guests": 2, "traveler_id": "t1",
+    }
+    monkeypatch.setattr(prefetch.Database, "get_booking_details", lambda booking_id, use_cache=True: booking)
+    monkeypatch.setattr(prefetch, "get_profile_preferences", lambda traveler_id: {"interests": ["museums"]})
+
+    agent = RecordingAgent()
+    Prefetcher(agent).prefetch("1", {"interests": ["beaches"]})
+
+    assert agent.warmed == [("Miami", date(2025, 1, 1), date(2025, 1, 3))]
+    assert agent.planned == [("Miami, FL", ["beaches", "museums"])]
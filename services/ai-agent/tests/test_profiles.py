@@ -0,0 +1,71 @@
+"""Tests for traveler profile lookup and preference merging"""
+import asyncio
+
+import pytest
+
+import profiles
+from models import BudgetTier
+from profiles import InvalidPreferences, load_booking_and_preferences, merge_preferences
+
+PROFILES = {
+    "owner": {"interests": ["museums"], "dietary_restrictions": ["vegan"], "languages": ["English"]},
+    "stranger": {"interests": ["nightlife"], "dietary_restrictions": [], "languages": ["French"]},
+}
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Booking 1 belongs to `owner`; records which profiles were fetched"""
+    fetched = []
+
+    def get_booking_details(booking_id):
+        return {"booking_id": booking_id, "traveler_id": "owner"} if booking_id == "1" else None
+
+    def get_profile_preferences(traveler_id):
+        fetched.append(traveler_id)
+        return PROFILES.get(traveler_id, {})
+
+    monkeypatch.setattr(profiles.Database, "get_booking_details", get_booking_details)
+    monkeypatch.setattr(profiles, "get_profile_preferences", get_profile_preferences)
+    return fetched
+
+
+def test_merge_combines_lists_with_request_values_first():
+    merged = merge_preferences(PROFILES["owner"], {"interests": ["Beaches", "MUSEUMS"], "budget": "high"})
+    assert merged.interests == ["Beaches", "MUSEUMS"]
+    assert merged.dietary_restrictions == ["vegan"]
+    assert merged.budget == BudgetTier.HIGH
+
+
+def test_merge_accepts_a_single_string_for_a_list_field():
+    assert merge_preferences({}, {"interests": "beaches"}).interests == ["beaches"]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"interests": [5]},
+    {"interests": {"museums": True}},
+    {"budget": 5},
+    ["museums"],
+])
+def test_merge_rejects_wrong_types(overrides):
+    with pytest.raises(InvalidPreferences):
+        merge_preferences(PROFILES["owner"], overrides)
+
+
+def test_profile_is_resolved_from_the_booking(services):
+    booking, preferences = asyncio.run(load_booking_and_preferences("1", None, {}))
+    assert booking["traveler_id"] == "owner"
+    assert services == ["owner"]
+    assert preferences.dietary_restrictions == ["vegan"]
+
+
+def test_profile_of_another_traveler_is_not_used(services):
+    _, preferences = asyncio.run(load_booking_and_preferences("1", "stranger", {}))
+    assert preferences.interests == ["museums"]
+    assert "nightlife" not in preferences.interests
+
+
+def test_no_profile_without_a_booking(services):
+    booking, preferences = asyncio.run(load_booking_and_preferences("404", "stranger", {}))
+    assert booking is None
+    assert preferences.interests == []
@@ -0,0 +1,51 @@
+"""Tests for the sampling CPU profiler's stage attribution"""
+import asyncio
+import time
+
+from profiling import Profiler
+from tracing import tracer
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_are_tagged_with_the_running_task():
+    profiler = Profiler(interval=0.001, keep=2, memory_frames=1)
+
+    async def busy():
+        with tracer.span("/busy"):
+            await asyncio.sleep(0)  # let the idle request enter its span on the same thread
+            spin(0.2)
+
+    async def idle():
+        with tracer.span("/idle"):
+            await asyncio.sleep(0.3)
+
+    async def main():
+        await asyncio.gather(busy(), idle())
+
+    profile = profiler.start_cpu(seconds=5)
+    try:
+        asyncio.run(main())
+    finally:
+        profiler.stop_cpu()
+
+    assert profile.tag_counts[("/busy", "/busy")] > 0
+    assert profile.tag_counts[("/idle", "/idle")] == 0
+    assert profile.requests_seen == 2
+
+
+def test_stage_stacks_are_dropped_once_spans_close():
+    profiler = Profiler(interval=0.001, keep=2, memory_frames=1)
+    profile = profiler.start_cpu(seconds=5)
+    try:
+        with tracer.span("/plan"):
+            with tracer.span("agent.search"):
+                assert list(profiler._tags.values()) == [[("/plan", "/plan"), ("/plan", "agent.search")]]
+        assert profiler._tags == {}
+    finally:
+        profiler.stop_cpu()
+    assert not profile.running
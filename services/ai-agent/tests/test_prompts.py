@@ -0,0 +1,48 @@
+"""Tests for prompt template rendering"""
+import pytest
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from prompts import QUERY_PROMPT, PromptTemplate, prompt_hash
+
+
+@pytest.fixture
+def template():
+    return PromptTemplate("test", instructions="You are a concierge.", context="Trip to {city} for {days} days")
+
+
+def test_render_puts_static_instructions_first(template):
+    messages = template.render(city="Miami", days=3)
+    assert isinstance(messages[0], SystemMessage)
+    assert messages[0].content == "You are a concierge."
+    assert isinstance(messages[-1], HumanMessage)
+    assert messages[-1].content == "Trip to Miami for 3 days"
+
+
+def test_render_shares_the_system_message_between_calls(template):
+    assert template.render(city="Miami", days=3)[0] is template.render(city="Austin", days=5)[0]
+
+
+def test_render_places_history_between_system_and_context(template):
+    history = [HumanMessage(content="Any beaches?"), AIMessage(content="South Beach")]
+    messages = template.render(history, city="Miami", days=3)
+    assert messages[1:3] == history
+    assert len(messages) == 4
+
+
+def test_render_requires_every_field(template):
+    with pytest.raises(KeyError, match="days"):
+        template.render(city="Miami")
+
+
+def test_render_counts_renders(template):
+    template.render(city="Miami", days=3)
+    template.render(city="Miami", days=3)
+    assert template.stats()["renders"] == 2
+
+
+def test_prompt_hash_depends_on_rendered_content():
+    first = QUERY_PROMPT.render(query="tacos", trip_details="Miami", search_results="1. Taco Bar")
+    same = QUERY_PROMPT.render(query="tacos", trip_details="Miami", search_results="1. Taco Bar")
+    other = QUERY_PROMPT.render(query="sushi", trip_details="Miami", search_results="1. Taco Bar")
+    assert prompt_hash(first) == prompt_hash(same)
+    assert prompt_hash(first) != prompt_hash(other)
@@ -0,0 +1,66 @@
+"""Tests for URL canonicalization and SimHash near-duplicate detection"""
+import pytest
+
+from ranking import ResultProcessor, canonical_url, hamming_distance, simhash
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://WWW.Example.com/guide/", "https://example.com/guide"),
+    ("https://example.com/guide#top", "https://example.com/guide"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com/a?utm_source=x&utm_campaign=y&id=3", "https://example.com/a?id=3"),
+    ("https://example.com/a?fbclid=1&gclid=2&ref=home&ref_src=tw", "https://example.com/a"),
+    ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("", ""),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_canonical_url_keeps_params_that_only_contain_tracking_names():
+    assert canonical_url("https://example.com/a?refinement=1&region_ref=2") == \
+        "https://example.com/a?refinement=1&region_ref=2"
+
+
+def test_simhash_is_deterministic_and_64_bit():
+    text = "The ten best beaches in Miami for families with young children"
+    assert simhash(text) == simhash(text)
+    assert 0 < simhash(text) < 1 << 64
+
+
+def test_simhash_of_empty_text_is_zero():
+    assert simhash("") == 0
+    assert simhash("!!!") == 0
+
+
+def test_simhash_near_duplicates_are_close():
+    base = ("Miami Beach is known for its art deco architecture, white sand and turquoise water. "
+            "South Pointe Park offers views of the cruise ships leaving the port every evening.")
+    edited = base.replace("every evening", "each evening")
+    unrelated = "A guide to hiking trails, waterfalls and campgrounds in the Great Smoky Mountains."
+    assert hamming_distance(simhash(base), simhash(edited)) <= 16
+    assert hamming_distance(simhash(base), simhash(unrelated)) > hamming_distance(simhash(base), simhash(edited))
+
+
+def test_process_collapses_duplicate_urls_and_near_duplicate_content():
+    content = "Top rated museums and galleries in downtown Miami with free entry on Sundays and guided tours"
+    results = [
+        {"title": "Museums", "url": "https://example.com/museums?utm_source=a", "content": content, "score": 0.9},
+        {"title": "Museums copy", "url": "https://www.example.com/museums/", "content": "different", "score": 0.8},
+        {"title": "Museums", "url": "https://mirror.example.org/m", "content": content, "score": 0.7},
+        {"title": "Parks", "url": "https://example.com/parks", "content": "Outdoor parks and beaches", "score": 0.6},
+    ]
+    processed = ResultProcessor().process(results, city="Miami")
+    assert [r["title"] for r in processed] == ["Museums", "Parks"]
+    assert processed[0]["url"].endswith("utm_source=a")
+
+
+def test_process_does_not_modify_its_input():
+    results = [
+        {"title": "Museums", "url": "https://example.com/museums", "content": "Art and history museums", "score": 0.9},
+        {"title": "Parks", "url": "https://example.com/parks", "content": "Outdoor parks and beaches", "score": 0.6},
+    ]
+    originals = [dict(r) for r in results]
+    processed = ResultProcessor().process(results, city="Miami")
+    assert results == originals
+    assert all("simhash" in r for r in processed)
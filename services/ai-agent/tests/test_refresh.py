@@ -0,0 +1,101 @@
+"""Tests for stale-while-revalidate caching and the background refresh scheduler"""
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import TTLCache
+from refresh import RefreshScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+class RecordingRefresher:
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, cache, key, loader, hits):
+        self.scheduled.append((key, hits))
+
+
+def test_soft_expired_entry_is_served_stale_and_scheduled(clock):
+    refresher = RecordingRefresher()
+    entries = TTLCache("t", ttl=100, max_size=10, soft_ttl=50, refresher=refresher)
+    entries.set("miami", "plan", loader=lambda: "new plan")
+
+    clock.now += 60
+    assert entries.get("miami") == "plan"
+    assert refresher.scheduled == [("miami", 1)]
+    assert entries.stats()["stale_hits"] == 1
+
+    entries.refreshed("miami", "new plan")
+    clock.now += 60
+    assert entries.get("miami") == "new plan"  # refreshing restarted the TTL
+    assert entries.stats()["refreshes"] == 1
+
+
+def test_entries_without_loader_are_not_refreshed_and_hard_ttl_still_applies(clock):
+    refresher = RecordingRefresher()
+    entries = TTLCache("t", ttl=100, max_size=10, soft_ttl=50, refresher=refresher)
+    entries.set("miami", "plan")
+
+    clock.now += 60
+    assert entries.get("miami") == "plan"
+    clock.now += 60
+    assert entries.get("miami") is None
+    assert refresher.scheduled == []
+
+
+def test_scheduler_reloads_in_the_background():
+    scheduler = RefreshScheduler(rate_per_minute=600, workers=1, min_hits=1)
+    entries = TTLCache("t", ttl=100, max_size=10)
+    entries.set("miami", "plan")
+    loaded = threading.Event()
+
+    def loader():
+        loaded.set()
+        return "new plan"
+
+    scheduler.schedule(entries, "miami", loader, hits=3)
+
+    assert loaded.wait(2)
+    deadline = time.monotonic() + 2
+    while not scheduler.stats()["completed"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert entries.get("miami") == "new plan"
+
+
+def test_rarely_used_entries_are_left_to_expire():
+    scheduler = RefreshScheduler(rate_per_minute=600, workers=0, min_hits=2)
+
+    scheduler.schedule(TTLCache("t", 100, 10), "quiet", lambda: None, hits=1)
+
+    assert scheduler.stats()["scheduled"] == 0
+
+
+def test_pending_refreshes_are_deduplicated_and_least_accessed_dropped():
+    scheduler = RefreshScheduler(rate_per_minute=600, workers=0, max_pending=2, min_hits=1)
+    entries = TTLCache("t", 100, 10)
+
+    scheduler.schedule(entries, "a", lambda: None, hits=5)
+    scheduler.schedule(entries, "a", lambda: None, hits=6)
+    scheduler.schedule(entries, "b", lambda: None, hits=1)
+    scheduler.schedule(entries, "c", lambda: None, hits=3)
+
+    stats = scheduler.stats()
+    assert (stats["scheduled"], stats["pending"], stats["dropped"]) == (3, 2, 1)
+    assert set(scheduler._pending) == {("t", "a"), ("t", "c")}
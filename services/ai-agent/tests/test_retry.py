@@ -0,0 +1,103 @@
+"""Tests for upstream retries, hedged reads and the 503 answer once they are exhausted"""
+import threading
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+import database
+import main
+import retry
+from retry import RetryPolicy, UpstreamUnavailable
+
+
+class Reply:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class ScriptedGet:
+    """requests.get stand-in playing back replies (status codes, exceptions or (delay, status) pairs)"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, timeout, **kwargs):
+        with self._lock:
+            self.calls += 1
+            step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(step, Exception):
+            raise step
+        if isinstance(step, tuple):
+            delay, step = step
+            time.sleep(delay)
+        return Reply(step)
+
+
+def policy(**kwargs):
+    options = dict(attempts=3, timeout=1.0, budget=2.0, base_delay=0.001, max_delay=0.002)
+    options.update(kwargs)
+    return RetryPolicy("booking", **options)
+
+
+def test_transient_failures_are_retried(monkeypatch):
+    get = ScriptedGet(requests.exceptions.ConnectionError("refused"), 503, 200)
+    monkeypatch.setattr(retry.requests, "get", get)
+    booking = policy()
+
+    assert booking.get("http://booking/1").status_code == 200
+    assert get.calls == 3
+    assert booking.stats()["retries"] == 2
+
+
+def test_other_statuses_are_returned_without_retrying(monkeypatch):
+    get = ScriptedGet(404)
+    monkeypatch.setattr(retry.requests, "get", get)
+
+    assert policy().get("http://booking/1").status_code == 404
+    assert get.calls == 1
+
+
+def test_exhausted_attempts_raise_upstream_unavailable(monkeypatch):
+    monkeypatch.setattr(retry.requests, "get", ScriptedGet(502))
+    booking = policy()
+
+    with pytest.raises(UpstreamUnavailable, match="HTTP 502"):
+        booking.get("http://booking/1")
+    assert booking.stats()["exhausted"] == 1
+
+
+def test_budget_caps_the_retries(monkeypatch):
+    get = ScriptedGet(requests.exceptions.Timeout("slow"))
+    monkeypatch.setattr(retry.requests, "get", get)
+
+    with pytest.raises(UpstreamUnavailable):
+        policy(attempts=10, budget=0.05, base_delay=0.04, max_delay=0.04).get("http://booking/1")
+    assert get.calls < 10
+
+
+def test_slow_request_is_hedged(monkeypatch):
+    monkeypatch.setattr(retry.requests, "get", ScriptedGet((0.5, 200), 200))
+    booking = policy(hedge=True, hedge_min_samples=5)
+    for _ in range(5):
+        booking.latency.record(0.01)
+
+    started = time.perf_counter()
+    assert booking.get("http://booking/1").status_code == 200
+
+    assert time.perf_counter() - started < 0.4
+    assert (booking.stats()["hedges"], booking.stats()["hedge_wins"]) == (1, 1)
+
+
+def test_unavailable_booking_service_answers_503(monkeypatch):
+    monkeypatch.setattr(retry.requests, "get", ScriptedGet(requests.exceptions.ConnectionError("refused")))
+    monkeypatch.setattr(database, "booking_policy", policy(attempts=2))
+
+    response = TestClient(main.app).post("/api/concierge/plan-from-booking", json={"booking_id": "unreachable-1"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert "booking" in response.json()["detail"]
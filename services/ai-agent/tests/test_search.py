@@ -0,0 +1,99 @@
+"""Tests for adaptive search depth"""
+import pytest
+
+from admission import UpstreamBusy
+from search import CONTENT_CHARS, SNIPPET_CHARS, AdaptiveSearch, compact_result
+
+
+class DepthSearch:
+    """Search callable returning a configured result list per depth, recording the depths used"""
+
+    def __init__(self, basic, advanced):
+        self.results = {"basic": basic, "advanced": advanced}
+        self.depths = []
+
+    def __call__(self, query, max_results, search_depth, **kwargs):
+        self.depths.append(search_depth)
+        results = self.results[search_depth]
+        if isinstance(results, Exception):
+            raise results
+        return {"results": results}
+
+
+def results(count, city="Miami", published_date=None):
+    return [
+        {"title": f"Spot {i}", "content": f"Things to do in {city}", "url": f"https://example.com/{i}",
+         "published_date": published_date}
+        for i in range(count)
+    ]
+
+
+def test_sufficient_basic_results_are_not_escalated():
+    fn = DepthSearch(results(5), results(5))
+    searcher = AdaptiveSearch(fn)
+
+    assert len(searcher.search("beaches", 5, location="Miami, FL")) == 5
+    assert fn.depths == ["basic"]
+    assert searcher.stats()["escalations"] == 0
+
+
+@pytest.mark.parametrize("basic", [
+    results(2),                                                  # too few
+    results(5, city="Orlando"),                                  # wrong place
+    results(5, published_date="Mon, 01 Jan 2018 00:00:00 GMT"),  # stale
+])
+def test_insufficient_basic_results_escalate_to_advanced(basic):
+    fn = DepthSearch(basic, results(5))
+    searcher = AdaptiveSearch(fn)
+
+    searcher.search("beaches", 5, location="Miami, FL")
+
+    assert fn.depths == ["basic", "advanced"]
+    assert searcher.stats()["escalation_rate"] == 1.0
+
+
+def test_failed_escalation_keeps_basic_results():
+    fn = DepthSearch(results(2), RuntimeError("timeout"))
+
+    assert len(AdaptiveSearch(fn).search("beaches", 5, location="Miami")) == 2
+
+
+def test_failed_basic_search_escalates_but_busy_does_not():
+    fn = DepthSearch(RuntimeError("timeout"), results(5))
+    assert len(AdaptiveSearch(fn).search("beaches", 5)) == 5
+    assert fn.depths == ["basic", "advanced"]
+
+    busy = DepthSearch(UpstreamBusy("tavily", 1.0, 5), results(5))
+    with pytest.raises(UpstreamBusy):
+        AdaptiveSearch(busy).search("beaches", 5)
+    assert busy.depths == ["basic"]
+
+
+def test_advanced_mode_skips_basic():
+    fn = DepthSearch(results(5), results(5))
+
+    AdaptiveSearch(fn, mode="advanced").search("beaches", 5)
+
+    assert fn.depths == ["advanced"]
+
+
+def test_hedged_mode_returns_a_sufficient_answer():
+    fn = DepthSearch(results(1), results(5))
+    searcher = AdaptiveSearch(fn, mode="hedged")
+
+    assert len(searcher.search("beaches", 5, location="Miami")) == 5
+    assert sorted(fn.depths) == ["advanced", "basic"]
+    assert searcher.stats()["hedge_wins"] == {"basic": 0, "advanced": 1}
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveSearch(DepthSearch([], []), mode="deep")
+
+
+def test_compact_result_keeps_only_pipeline_fields():
+    compact = compact_result({"title": "T", "content": "x" * 5000, "raw_content": "...", "url": "u", "score": 0.5})
+
+    assert set(compact) == {"title", "url", "content", "snippet", "score", "published_date"}
+    assert len(compact["content"]) == CONTENT_CHARS
+    assert len(compact["snippet"]) == SNIPPET_CHARS
@@ -0,0 +1,52 @@
+"""Tests for recognising follow-up questions in a conversation session"""
+import pytest
+
+from sessions import FOLLOW_UP_PATTERN, ConversationSession
+
+
+@pytest.mark.parametrize("query", [
+    "only vegan ones",
+    "Just the cheaper ones",
+    "what about closer to the beach?",
+    "How about those with outdoor seating",
+    "anything nearer instead?",
+    "show me more like the second one",
+])
+def test_pattern_matches_refinements(query):
+    assert FOLLOW_UP_PATTERN.search(query)
+
+
+@pytest.mark.parametrize("query", [
+    "Which museums are open on Monday?",
+    "Any good beaches?",
+    "And where can I rent a bike?",
+    "But is there a farmers market?",
+    "Best tacos near the hotel",
+])
+def test_pattern_ignores_new_questions(query):
+    assert not FOLLOW_UP_PATTERN.search(query)
+
+
+@pytest.fixture
+def session():
+    session = ConversationSession("1", "s1", history_turns=5)
+    session.remember(
+        "best tacos near the beach",
+        "Here are five taco spots",
+        [{"title": "Vegan Taco Bar", "content": "Plant-based tacos with outdoor seating", "url": "https://example.com/1"}],
+        "1. Vegan Taco Bar"
+    )
+    return session
+
+
+def test_refinement_of_previous_topic_is_follow_up(session):
+    assert session.is_follow_up("only vegan ones")
+    assert session.is_follow_up("just the cheaper ones")
+
+
+def test_new_topic_with_marker_is_not_follow_up(session):
+    assert not session.is_follow_up("what about museums?")
+
+
+def test_no_follow_up_without_history():
+    assert not ConversationSession("1", "s1", history_turns=5).is_follow_up("only vegan ones")
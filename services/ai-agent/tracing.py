@@ -0,0 +1,259 @@
+"""
+Request tracing for AI Concierge Agent
+Parent/child spans with attributes, exported per finished trace off the request path
+"""
+import functools
+import importlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from config import config
+from logs import get_logger
+
+logger = get_logger("tracing")
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "error", "_trace")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        # Spans of the trace finished so far, shared by every span in the trace
+        self._trace: List["Span"] = parent._trace if parent is not None else []
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def update(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(((self.end or time.time()) - self.start) * 1000, 2),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace is not sampled"""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def update(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# Innermost open span of the current request; copied into worker threads with the context
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# False inside a trace that was sampled out, so its child spans are skipped too
+_sampled: ContextVar[bool] = ContextVar("trace_sampled", default=True)
+# Name of the outermost span (the endpoint) while a stage hook is attached
+_stage_root: ContextVar[Optional[str]] = ContextVar("stage_root", default=None)
+
+
+class JsonlFileExporter:
+    """
+    Appends one JSON line per span to a local file
+
+    The file rotates like a RotatingFileHandler: past `max_bytes` it moves
+    to `<path>.1` (older files shift up) and at most `backups` are kept.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, backups: int = 0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+        )
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        for span in spans:
+            self._handler.emit(logging.makeLogRecord({"msg": json.dumps(span, default=str)}))
+
+
+class LogExporter:
+    """Writes each finished trace through the logging pipeline"""
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        logger.info("trace", extra={"trace": spans})
+
+
+class Tracer:
+    """
+    Creates spans and hands each finished trace to an exporter
+
+    A trace is exported once its root span ends, on a background thread so
+    exporter I/O never runs on the request path; if the export queue is full
+    the trace is dropped and counted. `sample_rate` is applied per trace.
+    """
+
+    def __init__(self, exporter, enabled: bool = True, sample_rate: float = 1.0, queue_size: int = 1000):
+        self.exporter = exporter
+        self.enabled = enabled and exporter is not None
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.traces_exported = 0
+        self.traces_dropped = 0
+        self.export_errors = 0
+        # Optional callable(endpoint, stage, entering) invoked around every span
+        self.stage_hook: Optional[Callable[[str, str, bool], None]] = None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the block as a child of the current span (or as a new trace)"""
+        hook = self.stage_hook
+        if hook is None:
+            with self._span(name, attributes) as span:
+                yield span
+            return
+
+        # Report (endpoint, stage) transitions, e.g. to the profiler, even when tracing is off
+        root = _stage_root.get()
+        token = _stage_root.set(name) if root is None else None
+        hook(root or name, name, True)
+        try:
+            with self._span(name, attributes) as span:
+                yield span
+        finally:
+            hook(root or name, name, False)
+            if token is not None:
+                _stage_root.reset(token)
+
+    @contextmanager
+    def _span(self, name: str, attributes: Dict[str, Any]):
+        if not self.enabled or not _sampled.get():
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is None and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            token = _sampled.set(False)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _sampled.reset(token)
+            return
+
+        span = Span(name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{e.__class__.__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.time()
+            span._trace.append(span)
+            if parent is None:
+                self._submit([s.to_dict() for s in span._trace])
+
+    def current(self):
+        """The innermost open span, for adding attributes from deeper code"""
+        return _current_span.get() or NOOP_SPAN
+
+    def _submit(self, spans: List[Dict[str, Any]]) -> None:
+        self._start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.traces_dropped += 1
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+                self.traces_exported += 1
+            except Exception as e:
+                self.export_errors += 1
+                logger.warning("Trace export failed: %s", e)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "exporter": self.exporter.__class__.__name__ if self.exporter is not None else None,
+            "sample_rate": self.sample_rate,
+            "traces_exported": self.traces_exported,
+            "traces_dropped": self.traces_dropped,
+            "export_errors": self.export_errors,
+            "queue_depth": self._queue.qsize(),
+        }
+
+
+def traced(name: str):
+    """Decorator running the function inside a span of the given name"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def build_exporter(name: str):
+    """
+    Exporter from configuration
+
+    `jsonl` (default) writes TRACE_FILE with rotation, `log` goes through
+    the logging pipeline, `none` disables tracing, and `package.module:factory` calls
+    that factory, so a collector exporter can be plugged in without changes here.
+    """
+    if name == "none":
+        return None
+    if name == "jsonl":
+        return JsonlFileExporter(config.TRACE_FILE, config.TRACE_FILE_MAX_BYTES, config.TRACE_FILE_BACKUPS)
+    if name == "log":
+        return LogExporter()
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+tracer = Tracer(
+    build_exporter(config.TRACE_EXPORTER) if config.TRACING_ENABLED else None,
+    enabled=config.TRACING_ENABLED,
+    sample_rate=config.TRACE_SAMPLE_RATE
+)
@@ -1,17 +1,23 @@
 """
 Utility functions for AI Concierge Agent
 """
+import json
 import requests
-from typing import List, Dict, Optional
+from math import fsum
+from operator import attrgetter
+from typing import List, Dict, Optional, Tuple, NamedTuple
 from datetime import date, timedelta
 from config import config
-from models import WeatherInfo, PackingItem
+from logs import get_logger
+from records import WeatherRecord, PackingRecord
+
+logger = get_logger("utils")
 
 class WeatherService:
     """Weather API service"""
     
     @staticmethod
-    def get_weather_forecast(location: str, start_date: date, end_date: date) -> List[WeatherInfo]:
+    def get_weather_forecast(location: str, start_date: date, end_date: date) -> List[WeatherRecord]:
         """
         Get weather forecast for location and date range
         Uses OpenWeather API (free tier supports 5-day forecast)
@@ -35,12 +41,12 @@ class WeatherService:
             data = response.json()
             return WeatherService._parse_weather_data(data, start_date, end_date)
         except Exception as e:
-            print(f"Weather API error: {e}")
+            logger.warning("Weather API error, using mock forecast: %s", e)
             # Fallback to mock data
             return WeatherService._generate_mock_weather(start_date, end_date)
     
     @staticmethod
-    def _parse_weather_data(data: Dict, start_date: date, end_date: date) -> List[WeatherInfo]:
+    def _parse_weather_data(data: Dict, start_date: date, end_date: date) -> List[WeatherRecord]:
         """Parse OpenWeather API response"""
         weather_list = []
         current_date = start_date
@@ -50,7 +56,7 @@ class WeatherService:
             date_str = current_date.strftime("%Y-%m-%d")
             
             # Simplified: Use first available forecast or mock data
-            weather_list.append(WeatherInfo(
+            weather_list.append(WeatherRecord(
                 date=date_str,
                 temperature_high=75.0,
                 temperature_low=55.0,
@@ -63,13 +69,13 @@ class WeatherService:
         return weather_list
     
     @staticmethod
-    def _generate_mock_weather(start_date: date, end_date: date) -> List[WeatherInfo]:
+    def _generate_mock_weather(start_date: date, end_date: date) -> List[WeatherRecord]:
         """Generate mock weather data"""
         weather_list = []
         current_date = start_date
         
         while current_date <= end_date:
-            weather_list.append(WeatherInfo(
+            weather_list.append(WeatherRecord(
                 date=current_date.strftime("%Y-%m-%d"),
                 temperature_high=72.0,
                 temperature_low=58.0,
@@ -80,67 +86,150 @@ class WeatherService:
         
         return weather_list
 
-class PackingListGenerator:
-    """Generate weather-aware packing lists"""
+class PackingRule(NamedTuple):
+    """A packing list rule: add these items when all conditions hold"""
+    when: Tuple[str, ...]
+    items: Tuple[PackingRecord, ...]
+
+def _items(*specs: Tuple[str, str, str]) -> Tuple[PackingRecord, ...]:
+    """Build a tuple of PackingRecord from (item, category, reason) triples"""
+    return tuple(PackingRecord(item=item, category=category, reason=reason) for item, category, reason in specs)
+
+# Declarative packing rules, applied in order. Conditions are the names in
+# PackingListGenerator.CONDITIONS; an empty condition tuple always applies.
+PACKING_RULES: Tuple[PackingRule, ...] = (
+    PackingRule(("hot",), _items(
+        ("Lightweight shorts", "clothing", "Warm weather expected"),
+        ("T-shirts", "clothing", "Comfortable for warm days"),
+        ("Sunglasses", "accessories", "Sun protection"),
+        ("Sunscreen", "toiletries", "UV protection"),
+    )),
+    PackingRule(("mild",), _items(
+        ("Light jacket", "clothing", "Mild temperatures"),
+        ("Comfortable jeans", "clothing", "Versatile for day/evening"),
+        ("Layers (sweater/cardigan)", "clothing", "Temperature changes"),
+    )),
+    PackingRule(("cold",), _items(
+        ("Warm jacket", "clothing", "Cold weather expected"),
+        ("Warm pants", "clothing", "Cold protection"),
+        ("Scarf and gloves", "accessories", "Extra warmth"),
+    )),
+    PackingRule(("rain",), _items(
+        ("Rain jacket", "clothing", "Rain expected"),
+        ("Umbrella", "accessories", "Stay dry"),
+    )),
+    PackingRule((), _items(
+        ("Comfortable walking shoes", "footwear", "Essential for sightseeing"),
+        ("Toiletries kit", "toiletries", "Personal hygiene"),
+        ("Phone charger", "electronics", "Stay connected"),
+        ("Travel documents", "documents", "ID, booking confirmations"),
+    )),
+    PackingRule(("children",), _items(
+        ("Snacks for kids", "food", "Keep children happy"),
+        ("Entertainment (books/toys)", "entertainment", "Downtime activities"),
+    )),
+    PackingRule(("long_trip",), _items(
+        ("Laundry detergent", "toiletries", "Extended stay"),
+    )),
+)
+
+_temperature_high = attrgetter("temperature_high")
+_precipitation_chance = attrgetter("precipitation_chance")
+
+def load_packing_rules(path: Optional[str]) -> Tuple[PackingRule, ...]:
+    """
+    Load extra packing rules from a JSON file
+    Format: [{"when": ["rain", "children"], "item": "Kids rain boots", "category": "footwear", "reason": "..."}]
+    """
+    if not path:
+        return ()
     
-    @staticmethod
-    def generate(weather_forecast: List[WeatherInfo], trip_length: int, preferences: Dict) -> List[PackingItem]:
-        """Generate packing list based on weather and trip details"""
-        items = []
+    try:
+        with open(path) as f:
+            raw_rules = json.load(f)
         
-        # Analyze weather
-        temps = [w.temperature_high for w in weather_forecast]
-        avg_temp = sum(temps) / len(temps) if temps else 70
-        has_rain = any(w.precipitation_chance > 30 for w in weather_forecast)
+        rules = []
+        for raw in raw_rules:
+            when = tuple(raw.get("when", []))
+            unknown = [c for c in when if c not in PackingListGenerator.CONDITIONS]
+            if unknown:
+                raise ValueError(f"unknown packing conditions {unknown}")
+            rules.append(PackingRule(when, _items((raw["item"], raw["category"], raw.get("reason")))))
+        return tuple(rules)
+    except Exception as e:
+        logger.warning("Packing rules error (%s): %s", path, e)
+        return ()
+
+class PackingListGenerator:
+    """
+    Generate weather-aware packing lists
+    
+    The rule table is compiled once into one shared item tuple per condition
+    bitmask, so generating a list is a mask computation and a lookup.
+    """
+    
+    CONDITIONS = ("hot", "mild", "cold", "rain", "children", "long_trip")
+    HOT = 1 << 0
+    MILD = 1 << 1
+    COLD = 1 << 2
+    RAIN = 1 << 3
+    CHILDREN = 1 << 4
+    LONG_TRIP = 1 << 5
+    
+    HOT_ABOVE = 75
+    MILD_ABOVE = 60
+    RAIN_CHANCE_ABOVE = 30
+    LONG_TRIP_ABOVE = 3
+    DEFAULT_TEMPERATURE = 70
+    
+    _table: Tuple[Tuple[PackingRecord, ...], ...] = ()
+    
+    @classmethod
+    def compile(cls, rules: Tuple[PackingRule, ...]) -> None:
+        """Precompute the item tuple for every combination of conditions"""
+        bits = {name: 1 << i for i, name in enumerate(cls.CONDITIONS)}
+        compiled_rules = [(sum(bits[c] for c in rule.when), rule.items) for rule in rules]
         
-        # Clothing based on temperature
-        if avg_temp > 75:
-            items.extend([
-                PackingItem(item="Lightweight shorts", category="clothing", reason="Warm weather expected"),
-                PackingItem(item="T-shirts", category="clothing", reason="Comfortable for warm days"),
-                PackingItem(item="Sunglasses", category="accessories", reason="Sun protection"),
-                PackingItem(item="Sunscreen", category="toiletries", reason="UV protection"),
-            ])
-        elif avg_temp > 60:
-            items.extend([
-                PackingItem(item="Light jacket", category="clothing", reason="Mild temperatures"),
-                PackingItem(item="Comfortable jeans", category="clothing", reason="Versatile for day/evening"),
-                PackingItem(item="Layers (sweater/cardigan)", category="clothing", reason="Temperature changes"),
-            ])
+        table = []
+        for mask in range(1 << len(cls.CONDITIONS)):
+            selected = []
+            for required, items in compiled_rules:
+                if required & mask == required:
+                    selected.extend(items)
+            table.append(tuple(selected))
+        cls._table = tuple(table)
+    
+    @classmethod
+    def condition_mask(cls, weather_forecast: List[WeatherRecord], trip_length: int, preferences: Dict) -> int:
+        """Compute the condition bitmask for a trip"""
+        if weather_forecast:
+            avg_temp = fsum(map(_temperature_high, weather_forecast)) / len(weather_forecast)
+            max_rain = max(map(_precipitation_chance, weather_forecast))
         else:
-            items.extend([
-                PackingItem(item="Warm jacket", category="clothing", reason="Cold weather expected"),
-                PackingItem(item="Warm pants", category="clothing", reason="Cold protection"),
-                PackingItem(item="Scarf and gloves", category="accessories", reason="Extra warmth"),
-            ])
+            avg_temp = cls.DEFAULT_TEMPERATURE
+            max_rain = 0
         
-        # Rain gear
-        if has_rain:
-            items.extend([
-                PackingItem(item="Rain jacket", category="clothing", reason="Rain expected"),
-                PackingItem(item="Umbrella", category="accessories", reason="Stay dry"),
-            ])
-        
-        # Essentials
-        items.extend([
-            PackingItem(item="Comfortable walking shoes", category="footwear", reason="Essential for sightseeing"),
-            PackingItem(item="Toiletries kit", category="toiletries", reason="Personal hygiene"),
-            PackingItem(item="Phone charger", category="electronics", reason="Stay connected"),
-            PackingItem(item="Travel documents", category="documents", reason="ID, booking confirmations"),
-        ])
+        if avg_temp > cls.HOT_ABOVE:
+            mask = cls.HOT
+        elif avg_temp > cls.MILD_ABOVE:
+            mask = cls.MILD
+        else:
+            mask = cls.COLD
         
-        # Children-specific items
+        if max_rain > cls.RAIN_CHANCE_ABOVE:
+            mask |= cls.RAIN
         if preferences.get("has_children"):
-            items.extend([
-                PackingItem(item="Snacks for kids", category="food", reason="Keep children happy"),
-                PackingItem(item="Entertainment (books/toys)", category="entertainment", reason="Downtime activities"),
-            ])
-        
-        # Trip length specific
-        if trip_length > 3:
-            items.append(PackingItem(item="Laundry detergent", category="toiletries", reason="Extended stay"))
-        
-        return items
+            mask |= cls.CHILDREN
+        if trip_length > cls.LONG_TRIP_ABOVE:
+            mask |= cls.LONG_TRIP
+        return mask
+    
+    @classmethod
+    def generate(cls, weather_forecast: List[WeatherRecord], trip_length: int, preferences: Dict) -> Tuple[PackingRecord, ...]:
+        """Generate packing list based on weather and trip details"""
+        return cls._table[cls.condition_mask(weather_forecast, trip_length, preferences)]
+
+PackingListGenerator.compile(PACKING_RULES + load_packing_rules(config.PACKING_RULES_FILE))
 
 def extract_location_city(location: str) -> str:
     """
@@ -168,6 +257,27 @@ def extract_location_city(location: str) -> str:
         # Single part - just return it
         return location.strip()
 
+def canonical_location(booking) -> str:
+    """
+    Canonical cache key for a booking's destination
+    Example: " Miami ", "fl", "USA" -> "miami|fl|usa"
+    """
+    parts = (booking.city, booking.state, booking.country)
+    return "|".join(" ".join((part or "").lower().split()) for part in parts)
+
+def preferences_fingerprint(preferences) -> tuple:
+    """Order-insensitive, hashable fingerprint of TravelerPreferences"""
+    return (
+        str(getattr(preferences.budget, "value", preferences.budget)).lower(),
+        tuple(sorted({i.strip().lower() for i in preferences.interests})),
+        tuple(sorted({d.strip().lower() for d in preferences.dietary_restrictions})),
+        preferences.has_children,
+        preferences.wheelchair_accessible,
+        preferences.avoid_long_hikes,
+        (preferences.mobility_needs or "").strip().lower(),
+        tuple(sorted({l.strip().lower() for l in preferences.languages})),
+    )
+
 def calculate_trip_length(start_date: date, end_date: date) -> int:
     """Calculate number of days in trip"""
     return (end_date - start_date).days + 1